@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from contextlib import redirect_stderr
+from dataclasses import dataclass, field
+import json
+import os
+from pathlib import Path
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+import kern.runtime as runtime
+from kern.stage_output import parse_stage_output
+from kern.types import StageExecution, StageSpec
+from kern.validation import SuccessCriteriaValidator
+
+_SUBPROCESSES = 0
+
+
+def _audit(event: str, _args: tuple[Any, ...]) -> None:
+    global _SUBPROCESSES
+    if event == "subprocess.Popen":
+        _SUBPROCESSES += 1
+
+
+def parse_latency(spec: str) -> tuple[str, list[float]]:
+    kind, _, raw = spec.partition(":")
+    values = [float(item) for item in raw.split(":")] if raw else []
+    expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise argparse.ArgumentTypeError(
+            f"invalid latency {spec!r}: use fixed:MS, uniform:LO_MS:HI_MS or lognormal:MU:SIGMA"
+        )
+    return kind, values
+
+
+@dataclass
+class SimulatedRunner:
+    tasks: int
+    latency: tuple[str, list[float]] = ("fixed", [0.0])
+    output_bytes: int = 2048
+    seed: int = 0
+    pending: list[int] = field(init=False)
+    gaps: dict[int, list[float]] = field(init=False)
+    intervals: list[tuple[float, float]] = field(init=False)
+    subprocesses: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        self.pending = list(range(1, self.tasks + 1))
+        self.gaps = {}
+        self.intervals = []
+        self._random = random.Random(self.seed)
+        self._returned_at: dict[Path, float] = {}
+        self._last_return = time.perf_counter()
+
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        entered = time.perf_counter()
+        previous = self._returned_at.get(cwd, self._last_return)
+        self.gaps.setdefault(stage.number, []).append(entered - previous)
+        task_id = _prompt_task_id(prompt)
+        if stage.number == 1 and task_id is None:
+            task_id = self.pending.pop(0) if self.pending else None
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        if stage.number == 5:
+            (cwd / _task_file(task_id)).write_text(f"task {task_id}\n", encoding="utf-8")
+            self._git(cwd, ["add", "-N", _task_file(task_id)])
+        if stage.number == 6:
+            self._git(cwd, ["add", _task_file(task_id)])
+            self._git(cwd, ["commit", "-qm", f"task {task_id}"])
+        execution = parse_stage_output(self._output(stage.number, task_id), stage.number)
+        returned = time.perf_counter()
+        self._returned_at[cwd] = self._last_return = returned
+        self.intervals.append((entered, returned))
+        return execution
+
+    def model_seconds(self) -> float:
+        total = 0.0
+        current_start, current_end = None, None
+        for start, end in sorted(self.intervals):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    total += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            total += current_end - current_start
+        return total
+
+    def _git(self, cwd: Path, args: list[str]) -> None:
+        self.subprocesses += 1
+        subprocess.run(["git", *args], cwd=cwd, capture_output=True, check=True)
+
+    def _delay(self) -> float:
+        kind, values = self.latency
+        if kind == "fixed":
+            millis = values[0]
+        elif kind == "uniform":
+            millis = self._random.uniform(values[0], values[1])
+        else:
+            millis = self._random.lognormvariate(values[0], values[1])
+        return max(0.0, millis) / 1000
+
+    def _output(self, stage_number: int, task_id: int | None) -> str:
+        padding = "x" * max(0, self.output_bytes - 400)
+        if stage_number == 0:
+            return f"{padding}\nSUCCESS created={self.tasks} existing=0"
+        machine: dict[str, Any] = {
+            "stage": stage_number,
+            "status": "success",
+            "task_id": task_id,
+            "queue_empty": task_id is None,
+            "skip": False,
+            "summary": "simulated",
+        }
+        if stage_number == 3:
+            machine["planned_files"] = [_task_file(task_id)]
+        if stage_number == 4:
+            machine["criteria"] = [{"kind": "file_contains", "value": f"{_task_file(task_id)}::task {task_id}"}]
+        if stage_number == 1 and task_id is None:
+            success = "SUCCESS task_id=none"
+        elif stage_number == 6:
+            success = "SUCCESS"
+        else:
+            success = f"SUCCESS task_id={task_id}"
+        return "\n".join(
+            [
+                padding,
+                "<<MACHINE>>",
+                json.dumps(machine),
+                "<<END_MACHINE>>",
+                "<<HANDOFF>>",
+                f"## Stage {stage_number}",
+                "- Summary: simulated",
+                "<<END_HANDOFF>>",
+                success,
+            ]
+        )
+
+
+def _task_file(task_id: int | None) -> str:
+    return f"task-{task_id}.txt"
+
+
+def _prompt_task_id(prompt: str) -> int | None:
+    for line in prompt.splitlines():
+        if line.startswith("Task ID: "):
+            value = line[len("Task ID: ") :].strip()
+            return int(value) if value.isdigit() else None
+    return None
+
+
+def _init_repo(root: Path, tasks: int) -> None:
+    for command in (
+        ["git", "init", "-q"],
+        ["git", "config", "user.name", "kern-bench"],
+        ["git", "config", "user.email", "kern-bench@example.com"],
+    ):
+        subprocess.run(command, cwd=root, check=True)
+    (root / ".gitignore").write_text(".kern/\n", encoding="utf-8")
+    lines = "".join(f"- [ ] task {number}\n" for number in range(1, tasks + 1))
+    (root / "SPEC.md").write_text(f"# Tasks\n{lines}", encoding="utf-8")
+    subprocess.run(["git", "add", "."], cwd=root, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=root, check=True)
+
+
+def _io_counters() -> dict[str, int] | None:
+    try:
+        text = Path("/proc/self/io").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    counters: dict[str, int] = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(":")
+        counters[key.strip()] = int(value)
+    return counters
+
+
+def _directory_bytes(path: Path) -> int:
+    return sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+
+
+def _summary_ms(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def run_benchmark(
+    tasks: int,
+    *,
+    latency: tuple[str, list[float]] = ("fixed", [0.0]),
+    output_bytes: int = 2048,
+    jobs: int = 1,
+    seed: int = 0,
+) -> dict[str, Any]:
+    global _SUBPROCESSES
+    with tempfile.TemporaryDirectory(prefix="kern-bench-") as tmp:
+        root = Path(tmp)
+        _init_repo(root, tasks)
+        runner = SimulatedRunner(tasks=tasks, latency=latency, output_bytes=output_bytes, seed=seed)
+
+        io_before = _io_counters()
+        _SUBPROCESSES = 0
+        tracemalloc.start()
+        started = time.perf_counter()
+        with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stderr(devnull):
+            code = runtime.run(
+                task_id=None,
+                max_tasks=tasks,
+                hint="",
+                dry_run=False,
+                verbose=False,
+                jobs=jobs,
+                stage_runner=runner,
+                validator=SuccessCriteriaValidator(),
+                run_dir=root,
+            )
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        subprocesses = _SUBPROCESSES - runner.subprocesses
+        io_after = _io_counters()
+
+        model = runner.model_seconds()
+        result: dict[str, Any] = {
+            "tasks": tasks,
+            "jobs": jobs,
+            "latency": f"{latency[0]}:{':'.join(f'{value:g}' for value in latency[1])}",
+            "output_bytes": output_bytes,
+            "exit_code": code,
+            "wall_s": round(wall, 4),
+            "model_s": round(model, 4),
+            "overhead_s": round(max(0.0, wall - model), 4),
+            "overhead_per_task_ms": round(max(0.0, wall - model) * 1000 / tasks, 3),
+            "subprocesses": subprocesses,
+            "subprocesses_per_task": round(subprocesses / tasks, 2),
+            "peak_traced_bytes": peak,
+            "kern_dir_bytes": _directory_bytes(root / ".kern"),
+            "stage_gaps": {str(stage): _summary_ms(samples) for stage, samples in sorted(runner.gaps.items())},
+        }
+        if io_before is not None and io_after is not None:
+            result["io"] = {key: io_after[key] - io_before[key] for key in ("rchar", "wchar", "syscr", "syscw")}
+        return result
+
+
+def _print_result(result: dict[str, Any]) -> None:
+    io = result.get("io")
+    print(
+        f"tasks={result['tasks']} jobs={result['jobs']} latency={result['latency']} "
+        f"exit={result['exit_code']} wall={result['wall_s']:.3f}s overhead={result['overhead_s']:.3f}s "
+        f"({result['overhead_per_task_ms']:.1f} ms/task) subprocesses={result['subprocesses']} "
+        f"({result['subprocesses_per_task']}/task) peak_mem={result['peak_traced_bytes'] / 1024:.0f} KiB "
+        f"kern_dir={result['kern_dir_bytes'] / 1024:.0f} KiB"
+        + (f" read={io['rchar'] / 1024:.0f} KiB written={io['wchar'] / 1024:.0f} KiB" if io else "")
+    )
+    for stage, summary in result["stage_gaps"].items():
+        print(
+            f"  stage {stage}: n={summary['count']} mean={summary['mean_ms']:.2f}ms "
+            f"p50={summary['p50_ms']:.2f}ms p95={summary['p95_ms']:.2f}ms max={summary['max_ms']:.2f}ms"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure kern orchestration overhead with a simulated stage runner.")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1, 10, 100], help="Queue sizes to run (1-1000)")
+    parser.add_argument("--latency", type=parse_latency, default="fixed:0", help="Simulated model latency per stage")
+    parser.add_argument("--output-bytes", type=int, default=2048, help="Approximate raw output size per stage")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Parallel jobs passed to kern")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if any(count < 1 or count > 1000 for count in args.tasks):
+        print("ERROR: --tasks values must be between 1 and 1000", file=sys.stderr)
+        return 1
+
+    sys.addaudithook(_audit)
+    results = []
+    for count in args.tasks:
+        result = run_benchmark(
+            count,
+            latency=args.latency,
+            output_bytes=args.output_bytes,
+            jobs=args.jobs,
+            seed=args.seed,
+        )
+        _print_result(result)
+        results.append(result)
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return 0 if all(result["exit_code"] == 0 for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
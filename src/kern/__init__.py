@@ -1,4 +1,18 @@
-from .runtime import run
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
 from .version import VERSION
 
+if TYPE_CHECKING:
+    from .runtime import run
+
 __all__ = ["run", "VERSION"]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "run":
+        from .runtime import run
+
+        return run
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+TOKEN_KEYS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+# USD per million tokens, in TOKEN_KEYS order; used only to estimate cost while a stage is streaming.
+MODEL_PRICES: dict[str, tuple[float, float, float, float]] = {
+    "haiku": (1.0, 5.0, 1.25, 0.1),
+    "sonnet": (3.0, 15.0, 3.75, 0.3),
+    "opus": (15.0, 75.0, 18.75, 1.5),
+}
+
+
+def estimate_cost(model: str, usage: dict[str, int]) -> float | None:
+    prices = next((value for name, value in MODEL_PRICES.items() if name in model.lower()), None)
+    if prices is None:
+        return None
+    return sum(usage.get(key, 0) * price for key, price in zip(TOKEN_KEYS, prices)) / 1_000_000
+
+
+@dataclass
+class StageMeter:
+    model: str
+    max_tokens: int | None = None
+    max_cost_usd: float | None = None
+    exceeded: str | None = None
+    _settled: dict[str, int] = field(default_factory=dict)
+    _current: dict[str, int] = field(default_factory=dict)
+
+    def observe(self, event: dict[str, Any]) -> str | None:
+        kind = event.get("type")
+        if kind == "message_start":
+            message = event.get("message")
+            usage = message.get("usage") if isinstance(message, dict) else None
+            self._settle()
+            self._current = _token_counts(usage)
+        elif kind == "message_delta":
+            self._current.update(_token_counts(event.get("usage")))
+        else:
+            return None
+        return self.check()
+
+    def check(self) -> str | None:
+        if self.exceeded is not None:
+            return self.exceeded
+        tokens = self.tokens()
+        if self.max_tokens is not None and tokens > self.max_tokens:
+            self.exceeded = f"token budget exceeded ({tokens} > {self.max_tokens})"
+            return self.exceeded
+        cost = self.cost_usd()
+        if self.max_cost_usd is not None and cost is not None and cost > self.max_cost_usd:
+            self.exceeded = f"cost budget exceeded (${cost:.4f} > ${self.max_cost_usd:.4f})"
+        return self.exceeded
+
+    def usage(self) -> dict[str, int]:
+        return {key: self._settled.get(key, 0) + self._current.get(key, 0) for key in TOKEN_KEYS}
+
+    def tokens(self) -> int:
+        return sum(self.usage().values())
+
+    def cost_usd(self) -> float | None:
+        return estimate_cost(self.model, self.usage())
+
+    def _settle(self) -> None:
+        for key, value in self._current.items():
+            self._settled[key] = self._settled.get(key, 0) + value
+        self._current = {}
+
+
+@dataclass
+class Budget:
+    max_cost_per_task: float | None = None
+    max_cost_per_run: float | None = None
+    max_tokens_per_stage: int | None = None
+    run_cost_usd: float = 0.0
+    task_cost_usd: dict[int, float] = field(default_factory=dict)
+    shared: Budget | None = None
+
+    def scoped(self) -> Budget:
+        # Task IDs are numbered per repo: a scope keeps its own per-task spend but charges the shared run total.
+        return Budget(
+            max_cost_per_task=self.max_cost_per_task,
+            max_cost_per_run=self.max_cost_per_run,
+            max_tokens_per_stage=self.max_tokens_per_stage,
+            shared=self.shared or self,
+        )
+
+    def exhausted(self, task_id: int | None) -> str | None:
+        run = self.shared or self
+        if self.max_cost_per_run is not None and run.run_cost_usd >= self.max_cost_per_run:
+            return f"run cost budget exhausted (${run.run_cost_usd:.4f} of ${self.max_cost_per_run:.4f})"
+        if self.max_cost_per_task is not None and task_id is not None:
+            spent = self.task_cost_usd.get(task_id, 0.0)
+            if spent >= self.max_cost_per_task:
+                return f"task {task_id} cost budget exhausted (${spent:.4f} of ${self.max_cost_per_task:.4f})"
+        return None
+
+    def meter(self, task_id: int | None, model: str, stage_max_tokens: int | None = None) -> StageMeter | None:
+        remaining: list[float] = []
+        if self.max_cost_per_run is not None:
+            remaining.append(self.max_cost_per_run - (self.shared or self).run_cost_usd)
+        if self.max_cost_per_task is not None and task_id is not None:
+            remaining.append(self.max_cost_per_task - self.task_cost_usd.get(task_id, 0.0))
+        max_tokens = stage_max_tokens if stage_max_tokens is not None else self.max_tokens_per_stage
+        if not remaining and max_tokens is None:
+            return None
+        return StageMeter(
+            model=model,
+            max_tokens=max_tokens,
+            max_cost_usd=max(0.0, min(remaining)) if remaining else None,
+        )
+
+    def charge(self, task_id: int | None, cost_usd: float | None) -> None:
+        if not cost_usd:
+            return
+        (self.shared or self).run_cost_usd += cost_usd
+        if task_id is not None:
+            self.task_cost_usd[task_id] = self.task_cost_usd.get(task_id, 0.0) + cost_usd
+
+
+_active_meter: ContextVar[StageMeter | None] = ContextVar("kern_stage_meter", default=None)
+
+
+def active_meter() -> StageMeter | None:
+    return _active_meter.get()
+
+
+@contextmanager
+def metered(meter: StageMeter | None) -> Iterator[None]:
+    token = _active_meter.set(meter)
+    try:
+        yield
+    finally:
+        _active_meter.reset(token)
+
+
+def _token_counts(usage: Any) -> dict[str, int]:
+    if not isinstance(usage, dict):
+        return {}
+    return {key: value for key in TOKEN_KEYS if isinstance(value := usage.get(key), int)}
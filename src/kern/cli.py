@@ -1,21 +1,34 @@
 from __future__ import annotations
 
 import argparse
-import subprocess
+from pathlib import Path
 import sys
+from typing import Any
 
-from .runtime import run
+from .defaults import DEFAULT_VALIDATION_JOBS
 from .version import VERSION
 
 UPDATE_URL = "https://raw.githubusercontent.com/0xjgv/kern/main/install.sh"
 
 
+def run(*args: Any, **kwargs: Any) -> int:
+    from .runtime import run as run_pipeline
+
+    return run_pipeline(*args, **kwargs)
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="kern",
         description="Autonomous staged development pipeline.",
     )
     parser.add_argument("task_id", nargs="?", type=int, help="Run a specific task by ID")
+    parser.add_argument(
+        "--resume",
+        type=int,
+        metavar="ID",
+        help="Resume a task, skipping stages recorded as completed in .kern/state",
+    )
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose mode")
     parser.add_argument("-n", "--dry-run", action="store_true", help="Dry-run mode")
     parser.add_argument(
@@ -25,13 +38,474 @@ def build_parser() -> argparse.ArgumentParser:
         default=5,
         help="Max number of tasks to process in queue mode (default: 5)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run up to N queue tasks in parallel git worktrees (default: 1)",
+    )
+    parser.add_argument(
+        "--speculate",
+        type=int,
+        default=0,
+        metavar="DEPTH",
+        help="Run read-only stages 1..DEPTH of the next queue task while the current one validates and commits "
+        "(default: 0)",
+    )
+    parser.add_argument(
+        "--session-pool",
+        action="store_true",
+        help="Reuse warm Claude CLI sessions across stages with the same model, tools and permission mode",
+    )
+    parser.add_argument(
+        "--route",
+        action="store_true",
+        help="Pick a smaller model for stages 2-5 on small tasks, escalating on failure",
+    )
+    parser.add_argument(
+        "--compact-handoff",
+        action="store_true",
+        help="Point stages 2-6 at a size-bounded per-stage view of the handoff instead of the full log",
+    )
+    parser.add_argument(
+        "--stage-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Wall-clock limit per stage invocation; front matter timeout overrides (default: none)",
+    )
+    parser.add_argument(
+        "--stage-retries",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Retries for stages that time out or hit a transient SDK error (default: 2)",
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="Base delay for jittered exponential backoff between stage retries (default: 2)",
+    )
+    parser.add_argument(
+        "--max-cost-per-task",
+        type=float,
+        default=None,
+        metavar="USD",
+        help="Fail a task once its stages have cost this much, cancelling the stage that crosses it",
+    )
+    parser.add_argument(
+        "--max-cost-per-run",
+        type=float,
+        default=None,
+        metavar="USD",
+        help="Stop the run once its stages have cost this much, cancelling the stage that crosses it",
+    )
+    parser.add_argument(
+        "--max-tokens-per-stage",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Cancel a stage after N tokens (input, output and cache); front matter max_tokens overrides",
+    )
+    parser.add_argument(
+        "--validation-jobs",
+        type=int,
+        default=DEFAULT_VALIDATION_JOBS,
+        help=f"Max command_succeeds criteria run concurrently (default: {DEFAULT_VALIDATION_JOBS})",
+    )
+    parser.add_argument(
+        "--command-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Per-command timeout for command_succeeds criteria",
+    )
+    parser.add_argument(
+        "--cache-command",
+        action="append",
+        default=None,
+        metavar="PATTERN",
+        help="Cache results of command_succeeds criteria matching this glob, keyed on the working tree contents "
+        "(repeatable; only for deterministic commands)",
+    )
+    parser.add_argument(
+        "--full-revalidate",
+        action="store_true",
+        help="Re-run every criterion after a fix attempt instead of reusing untouched passing checks",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record a per-stage phase breakdown in .kern/runs/<run_id>/events.jsonl",
+    )
+    parser.add_argument(
+        "--store",
+        choices=("files", "sqlite"),
+        default="files",
+        help="Where stage events and evaluations go: JSONL files or .kern/kern.db (default: files)",
+    )
     parser.add_argument("--hint", default="", help="Guidance hint for stage prompts")
     parser.add_argument("-V", "--version", action="store_true", help="Print version and exit")
     parser.add_argument("--update", action="store_true", help="Install latest release")
     return parser
 
 
+def build_profile_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kern profile",
+        description="Show the critical path and top time sinks of a run.",
+    )
+    parser.add_argument("run_id", nargs="?", help="Run ID under .kern/runs (default: latest)")
+    parser.add_argument("--top", type=int, default=10, help="Number of time sinks to show (default: 10)")
+    return parser
+
+
+def profile_main(argv: list[str]) -> int:
+    from .profiling import format_profile, latest_run_id, load_events
+
+    args = build_profile_parser().parse_args(argv)
+    if args.top < 1:
+        print("ERROR: --top must be >= 1", file=sys.stderr)
+        return 1
+    kern_dir = Path.cwd() / ".kern"
+    run_id = args.run_id or latest_run_id(kern_dir)
+    if run_id is None:
+        print(f"ERROR: no runs found under {kern_dir / 'runs'}", file=sys.stderr)
+        return 1
+    try:
+        events = load_events(kern_dir, run_id)
+    except OSError:
+        print(f"ERROR: run {run_id} not found", file=sys.stderr)
+        return 1
+    print(format_profile(run_id, events, top=args.top))
+    return 0
+
+
+def build_stats_parser() -> argparse.ArgumentParser:
+    from .stats import GROUPS
+
+    parser = argparse.ArgumentParser(
+        prog="kern stats",
+        description="Aggregate duration, tokens and cost across .kern/runs and .kern/reports.",
+    )
+    parser.add_argument(
+        "--by",
+        choices=GROUPS,
+        action="append",
+        help="Group to show (repeatable, default: all)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore .kern/stats/index.json and re-read all files")
+    return parser
+
+
+def stats_main(argv: list[str]) -> int:
+    import json
+
+    from .stats import GROUPS, collect_stats, format_stats, stats_payload
+
+    args = build_stats_parser().parse_args(argv)
+    index, _ = collect_stats(Path.cwd() / ".kern", rebuild=args.rebuild)
+    groups = tuple(dict.fromkeys(args.by)) if args.by else GROUPS
+    if args.json:
+        print(json.dumps(stats_payload(index, groups), indent=2, sort_keys=True))
+    else:
+        print(format_stats(index, groups))
+    return 0
+
+
+def _add_socket_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        help="Daemon socket path (default: $KERN_SOCKET, $XDG_RUNTIME_DIR/kern.sock or /tmp/kern-<uid>.sock)",
+    )
+
+
+def build_serve_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kern serve",
+        description="Run a long-lived kern daemon that accepts jobs on a Unix socket.",
+    )
+    _add_socket_argument(parser)
+    parser.add_argument("--max-jobs", type=int, default=2, help="Jobs run concurrently, one per repo (default: 2)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose mode")
+    parser.add_argument(
+        "--cache-command",
+        action="append",
+        default=None,
+        metavar="PATTERN",
+        help="Cache results of deterministic command_succeeds criteria matching this glob (repeatable)",
+    )
+    parser.add_argument("--session-pool", action="store_true", help="Reuse warm Claude CLI sessions within a job")
+    parser.add_argument("--route", action="store_true", help="Route stages 2-5 of small tasks to a smaller model")
+    parser.add_argument("--compact-handoff", action="store_true", help="Point stages 2-6 at per-stage handoff views")
+    return parser
+
+
+def serve_main(argv: list[str]) -> int:
+    from .client import default_socket_path
+    from .daemon import serve
+
+    args = build_serve_parser().parse_args(argv)
+    if args.max_jobs < 1:
+        print("ERROR: --max-jobs must be >= 1", file=sys.stderr)
+        return 1
+    try:
+        serve(
+            args.socket or default_socket_path(),
+            max_jobs=args.max_jobs,
+            verbose=args.verbose,
+            cache_commands=args.cache_command or [],
+            session_pool=args.session_pool,
+            route=args.route,
+            compact_handoff=args.compact_handoff,
+        )
+    except (OSError, RuntimeError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_submit_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kern submit",
+        description="Submit a job to the kern daemon and stream its progress.",
+    )
+    parser.add_argument("task_id", nargs="?", type=int, help="Run a specific task by ID")
+    parser.add_argument("--repo", type=Path, default=None, help="Repository to run in (default: current directory)")
+    parser.add_argument("-c", "--count", type=int, default=5, help="Max tasks in queue mode (default: 5)")
+    parser.add_argument("--hint", default="", help="Guidance hint for stage prompts")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Dry-run mode")
+    parser.add_argument("--detach", action="store_true", help="Print the job ID and return without waiting")
+    _add_socket_argument(parser)
+    return parser
+
+
+def submit_main(argv: list[str]) -> int:
+    from .client import DaemonUnavailable, daemon_request, default_socket_path, format_event, format_job
+
+    args = build_submit_parser().parse_args(argv)
+    if args.count < 1:
+        print("ERROR: --count must be >= 1", file=sys.stderr)
+        return 1
+    request = {
+        "op": "submit",
+        "repo": str((args.repo or Path.cwd()).resolve()),
+        "task_id": args.task_id,
+        "count": args.count,
+        "hint": args.hint,
+        "dry_run": args.dry_run,
+        "follow": not args.detach,
+    }
+    job: dict[str, object] | None = None
+    try:
+        for message in daemon_request(args.socket or default_socket_path(), request):
+            if "error" in message:
+                print(f"ERROR: {message['error']}", file=sys.stderr)
+                return 1
+            if "event" in message:
+                line = format_event(message["event"])
+                if line is not None:
+                    print(line, flush=True)
+            elif "job" in message:
+                job = message["job"]
+                print(format_job(job), flush=True)
+    except DaemonUnavailable as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+    if job is None:
+        print("ERROR: daemon closed the connection without a reply", file=sys.stderr)
+        return 1
+    if args.detach:
+        return 0
+    exit_code = job.get("exit_code")
+    return exit_code if isinstance(exit_code, int) else 1
+
+
+def build_status_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kern status",
+        description="Show jobs known to the kern daemon.",
+    )
+    parser.add_argument("job", nargs="?", type=int, help="Job ID (default: all jobs)")
+    parser.add_argument("--follow", action="store_true", help="Stream the job's progress until it finishes")
+    parser.add_argument("--json", action="store_true", help="Print daemon replies as JSON lines")
+    _add_socket_argument(parser)
+    return parser
+
+
+def status_main(argv: list[str]) -> int:
+    import json
+
+    from .client import DaemonUnavailable, daemon_request, default_socket_path, format_event, format_job
+
+    args = build_status_parser().parse_args(argv)
+    if args.follow and args.job is None:
+        print("ERROR: --follow requires a job ID", file=sys.stderr)
+        return 1
+    request = {"op": "status", "job": args.job, "follow": args.follow}
+    try:
+        for message in daemon_request(args.socket or default_socket_path(), request):
+            if "error" in message:
+                print(f"ERROR: {message['error']}", file=sys.stderr)
+                return 1
+            if args.json:
+                print(json.dumps(message, sort_keys=True), flush=True)
+            elif "event" in message:
+                line = format_event(message["event"])
+                if line is not None:
+                    print(line, flush=True)
+            elif "jobs" in message and not message["jobs"]:
+                print("No jobs")
+            else:
+                for job in message.get("jobs", [message.get("job")]):
+                    print(format_job(job), flush=True)
+    except DaemonUnavailable as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_fleet_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kern fleet",
+        description="Run the task queues of several repositories under one scheduler.",
+    )
+    parser.add_argument("--repos", type=Path, required=True, help="File listing one repository path per line")
+    parser.add_argument(
+        "-j",
+        "--max-concurrent",
+        type=int,
+        default=4,
+        help="Tasks running at once across all repos, one per repo (default: 4)",
+    )
+    parser.add_argument("-c", "--count", type=int, default=5, help="Max tasks per repo (default: 5)")
+    parser.add_argument("--hint", default="", help="Guidance hint for stage prompts")
+    parser.add_argument("--max-cost", type=float, default=None, metavar="USD", help="Cost budget shared by all repos")
+    parser.add_argument("--max-cost-per-task", type=float, default=None, metavar="USD", help="Cost budget per task")
+    parser.add_argument(
+        "--max-tokens-per-stage",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Cancel a stage after N tokens",
+    )
+    parser.add_argument("--report", type=Path, default=None, help="Fleet directory (default: .kern/fleet/<id>)")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Dry-run mode")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose mode")
+    parser.add_argument(
+        "--cache-command",
+        action="append",
+        default=None,
+        metavar="PATTERN",
+        help="Cache results of deterministic command_succeeds criteria matching this glob (repeatable)",
+    )
+    parser.add_argument("--session-pool", action="store_true", help="Reuse warm Claude CLI sessions within a turn")
+    parser.add_argument("--route", action="store_true", help="Route stages 2-5 of small tasks to a smaller model")
+    parser.add_argument("--compact-handoff", action="store_true", help="Point stages 2-6 at per-stage handoff views")
+    return parser
+
+
+def fleet_main(argv: list[str]) -> int:
+    import asyncio
+
+    from .budget import Budget
+    from .fleet import FleetError, FleetScheduler, fleet_dir_for, format_fleet_report, load_repos
+    from .prompting import validate_hint
+
+    args = build_fleet_parser().parse_args(argv)
+    for flag, value in (("--max-concurrent", args.max_concurrent), ("--count", args.count)):
+        if value < 1:
+            print(f"ERROR: {flag} must be >= 1", file=sys.stderr)
+            return 1
+    for flag, value in (
+        ("--max-cost", args.max_cost),
+        ("--max-cost-per-task", args.max_cost_per_task),
+        ("--max-tokens-per-stage", args.max_tokens_per_stage),
+    ):
+        if value is not None and value <= 0:
+            print(f"ERROR: {flag} must be > 0", file=sys.stderr)
+            return 1
+    try:
+        validate_hint(args.hint)
+        repos = load_repos(args.repos)
+    except (FleetError, ValueError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+
+    scheduler = FleetScheduler(
+        repos,
+        fleet_dir=args.report or fleet_dir_for(Path.cwd()),
+        max_concurrent=args.max_concurrent,
+        count=args.count,
+        hint=args.hint,
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+        budget=Budget(
+            max_cost_per_task=args.max_cost_per_task,
+            max_cost_per_run=args.max_cost,
+            max_tokens_per_stage=args.max_tokens_per_stage,
+        ),
+        run_options={
+            "cache_commands": args.cache_command or [],
+            "session_pool": args.session_pool,
+            "route": args.route,
+            "compact_handoff": args.compact_handoff,
+        },
+    )
+    report = asyncio.run(scheduler.run())
+    print(format_fleet_report(report))
+    return 1 if report["failed"] else 0
+
+
+def build_export_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kern export",
+        description="Write .kern/kern.db back out as runs/*/events.jsonl, reports/*.jsonl and state/*.json.",
+    )
+    parser.add_argument("--out", type=Path, default=None, help="Output directory (default: .kern/export)")
+    return parser
+
+
+def export_main(argv: list[str]) -> int:
+    from .run_store import export_store, open_existing_store, store_path
+
+    args = build_export_parser().parse_args(argv)
+    kern_dir = Path.cwd() / ".kern"
+    store = open_existing_store(kern_dir)
+    if store is None:
+        print(f"ERROR: no run store at {store_path(kern_dir)}", file=sys.stderr)
+        return 1
+    out_dir = args.out or kern_dir / "export"
+    try:
+        counts = export_store(store, out_dir)
+    finally:
+        store.close()
+    print(f"Exported {counts['runs']} runs, {counts['reports']} reports and {counts['states']} task states to {out_dir}")
+    return 0
+
+
+SUBCOMMANDS = {
+    "export": export_main,
+    "fleet": fleet_main,
+    "profile": profile_main,
+    "serve": serve_main,
+    "stats": stats_main,
+    "status": status_main,
+    "submit": submit_main,
+}
+
+
 def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
 
@@ -40,6 +514,8 @@ def main(argv: list[str] | None = None) -> int:
         return 0
 
     if args.update:
+        import subprocess
+
         completed = subprocess.run(
             ["bash", "-lc", f"curl -fsSL {UPDATE_URL} | bash"],
             check=False,
@@ -50,12 +526,75 @@ def main(argv: list[str] | None = None) -> int:
         print("ERROR: --count must be >= 1", file=sys.stderr)
         return 1
 
+    task_id = args.task_id
+    if args.resume is not None:
+        if task_id is not None and task_id != args.resume:
+            print("ERROR: --resume conflicts with task_id argument", file=sys.stderr)
+            return 1
+        task_id = args.resume
+
+    if args.jobs < 1:
+        print("ERROR: --jobs must be >= 1", file=sys.stderr)
+        return 1
+
+    if not 0 <= args.speculate <= 4:
+        print("ERROR: --speculate must be between 0 and 4", file=sys.stderr)
+        return 1
+
+    if args.speculate and args.jobs > 1:
+        print("ERROR: --speculate cannot be combined with --jobs", file=sys.stderr)
+        return 1
+
+    if args.validation_jobs < 1:
+        print("ERROR: --validation-jobs must be >= 1", file=sys.stderr)
+        return 1
+
+    if args.command_timeout is not None and args.command_timeout <= 0:
+        print("ERROR: --command-timeout must be > 0", file=sys.stderr)
+        return 1
+
+    if args.stage_retries < 0:
+        print("ERROR: --stage-retries must be >= 0", file=sys.stderr)
+        return 1
+
+    if args.retry_backoff < 0:
+        print("ERROR: --retry-backoff must be >= 0", file=sys.stderr)
+        return 1
+
+    for flag, value in (
+        ("--stage-timeout", args.stage_timeout),
+        ("--max-cost-per-task", args.max_cost_per_task),
+        ("--max-cost-per-run", args.max_cost_per_run),
+        ("--max-tokens-per-stage", args.max_tokens_per_stage),
+    ):
+        if value is not None and value <= 0:
+            print(f"ERROR: {flag} must be > 0", file=sys.stderr)
+            return 1
+
     return run(
-        task_id=args.task_id,
+        task_id=task_id,
         max_tasks=args.count,
         hint=args.hint,
         dry_run=args.dry_run,
         verbose=args.verbose,
+        jobs=args.jobs,
+        resume=args.resume is not None,
+        validation_jobs=args.validation_jobs,
+        command_timeout=args.command_timeout,
+        cache_commands=args.cache_command or [],
+        profile=args.profile,
+        speculate=args.speculate,
+        route=args.route,
+        compact_handoff=args.compact_handoff,
+        max_cost_per_task=args.max_cost_per_task,
+        max_cost_per_run=args.max_cost_per_run,
+        max_tokens_per_stage=args.max_tokens_per_stage,
+        stage_timeout=args.stage_timeout,
+        stage_retries=args.stage_retries,
+        retry_backoff=args.retry_backoff,
+        full_revalidate=args.full_revalidate,
+        session_pool=args.session_pool,
+        store=args.store,
     )
 
 
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import socket
+import tempfile
+from typing import Any, Iterator
+
+
+class DaemonUnavailable(RuntimeError):
+    pass
+
+
+def default_socket_path() -> Path:
+    override = os.environ.get("KERN_SOCKET")
+    if override:
+        return Path(override).expanduser()
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "kern.sock"
+    return Path(tempfile.gettempdir()) / f"kern-{os.getuid()}.sock"
+
+
+def daemon_request(socket_path: Path, payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError as exc:
+            raise DaemonUnavailable(f"no kern daemon listening on {socket_path} ({exc.strerror or exc})") from exc
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as fh:
+            for line in fh:
+                yield json.loads(line)
+
+
+def format_job(job: dict[str, Any]) -> str:
+    target = f"task {job['task_id']}" if job.get("task_id") is not None else f"queue x{job.get('count')}"
+    line = f"job {job['id']}  {job['state']:<9}  {target}  {job['repo']}"
+    if job.get("exit_code") is not None:
+        line += f"  exit={job['exit_code']}"
+    if job.get("error"):
+        line += f"  {job['error']}"
+    return line
+
+
+def format_event(event: dict[str, Any]) -> str | None:
+    task = f"task {event['task_id']}" if event.get("task_id") is not None else "queue"
+    kind = event.get("event")
+    if kind == "validation_check":
+        status = "PASS" if event.get("passed") else "FAIL"
+        return f"{task}  check {status}  {event.get('criterion')}"
+    if kind is not None:
+        return None
+    if event.get("success"):
+        status = "ok"
+    else:
+        status = f"failed ({event.get('failure_kind') or event.get('error') or 'error'})"
+    return f"{task}  stage {event.get('stage_number')} {event.get('stage_name')}  {status}  {event.get('duration_ms')}ms"
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+from pathlib import Path
+import signal
+import socket
+from typing import Any
+
+from .git_snapshot import close_git_snapshots
+from .logging import log
+from .prompting import validate_hint
+from .runlog import utc_now
+from .runtime import SPEC_FILE, run_async
+
+DEFAULT_MAX_JOBS = 2
+MAX_REQUEST_BYTES = 64 * 1024
+MAX_JOB_EVENTS = 500
+MAX_FINISHED_JOBS = 200
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobRequestError(ValueError):
+    pass
+
+
+@dataclass
+class Job:
+    id: int
+    repo: Path
+    task_id: int | None
+    count: int
+    hint: str
+    dry_run: bool
+    state: str = "queued"
+    exit_code: int | None = None
+    error: str | None = None
+    submitted_at: str = field(default_factory=utc_now)
+    started_at: str | None = None
+    ended_at: str | None = None
+    events: deque[dict[str, Any]] = field(default_factory=lambda: deque(maxlen=MAX_JOB_EVENTS))
+    watchers: list[asyncio.Queue[dict[str, Any] | None]] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "repo": str(self.repo),
+            "task_id": self.task_id,
+            "count": self.count,
+            "hint": self.hint,
+            "dry_run": self.dry_run,
+            "state": self.state,
+            "exit_code": self.exit_code,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "events": len(self.events),
+        }
+
+    def publish(self, event: dict[str, Any]) -> None:
+        if event.get("event") == "phase":
+            return
+        self.events.append(event)
+        for watcher in self.watchers:
+            watcher.put_nowait(event)
+
+    def watch(self) -> asyncio.Queue[dict[str, Any] | None]:
+        watcher: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        for event in self.events:
+            watcher.put_nowait(event)
+        if self.finished:
+            watcher.put_nowait(None)
+        else:
+            self.watchers.append(watcher)
+        return watcher
+
+    def finish(self, state: str, exit_code: int | None, error: str | None = None) -> None:
+        self.state = state
+        self.exit_code = exit_code
+        self.error = error
+        self.ended_at = utc_now()
+        for watcher in self.watchers:
+            watcher.put_nowait(None)
+        self.watchers.clear()
+
+
+def parse_job_request(payload: dict[str, Any]) -> tuple[Path, int | None, int, str, bool]:
+    repo = payload.get("repo")
+    if not isinstance(repo, str) or not Path(repo).is_absolute():
+        raise JobRequestError("repo must be an absolute path")
+    if not Path(repo).is_dir():
+        raise JobRequestError(f"repo {repo} is not a directory")
+    task_id = payload.get("task_id")
+    if task_id is not None and (not isinstance(task_id, int) or isinstance(task_id, bool) or task_id < 0):
+        raise JobRequestError("task_id must be a non-negative integer or null")
+    count = payload.get("count", 5)
+    if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+        raise JobRequestError("count must be >= 1")
+    hint = payload.get("hint", "")
+    if not isinstance(hint, str):
+        raise JobRequestError("hint must be a string")
+    try:
+        validate_hint(hint)
+    except ValueError as exc:
+        raise JobRequestError(str(exc)) from exc
+    return Path(repo).resolve(), task_id, count, hint, bool(payload.get("dry_run", False))
+
+
+class KernDaemon:
+    def __init__(
+        self,
+        socket_path: Path,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        verbose: bool = False,
+        run_options: dict[str, Any] | None = None,
+    ) -> None:
+        self.socket_path = socket_path
+        self.max_jobs = max_jobs
+        self.verbose = verbose
+        self.run_options = dict(run_options or {})
+        self.jobs: dict[int, Job] = {}
+        self._next_id = 1
+        self._slots = asyncio.Semaphore(max_jobs)
+        self._repo_locks: dict[Path, asyncio.Lock] = {}
+        self._synced_specs: dict[Path, str] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def serve(self, stop: asyncio.Event | None = None) -> None:
+        stop = stop or asyncio.Event()
+        _claim_socket(self.socket_path)
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path), limit=MAX_REQUEST_BYTES)
+        finally:
+            os.umask(umask)
+        log(f"kern daemon listening on {self.socket_path} (max jobs: {self.max_jobs})")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            with suppress(OSError):
+                self.socket_path.unlink()
+            for repo in self._repo_locks:
+                close_git_snapshots(repo)
+            log("kern daemon stopped")
+
+    def submit(self, payload: dict[str, Any]) -> Job:
+        repo, task_id, count, hint, dry_run = parse_job_request(payload)
+        job = Job(id=self._next_id, repo=repo, task_id=task_id, count=count, hint=hint, dry_run=dry_run)
+        self._next_id += 1
+        self.jobs[job.id] = job
+        self._prune()
+        task = asyncio.create_task(self._execute(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _execute(self, job: Job) -> None:
+        lock = self._repo_locks.setdefault(job.repo, asyncio.Lock())
+        try:
+            async with lock, self._slots:
+                job.state = "running"
+                job.started_at = utc_now()
+                log(f"job {job.id} started in {job.repo}")
+                spec = _spec_digest(job.repo)
+                code = await run_async(
+                    job.task_id,
+                    job.count,
+                    job.hint,
+                    job.dry_run,
+                    self.verbose,
+                    run_dir=job.repo,
+                    on_event=job.publish,
+                    populate_queue=spec is None or self._synced_specs.get(job.repo) != spec,
+                    keep_git_snapshots=True,
+                    **self.run_options,
+                )
+                # The queue matches SPEC.md as the job left it; the next job skips Stage 0 unless SPEC.md changes.
+                synced = _spec_digest(job.repo) if code == 0 and not job.dry_run and job.task_id is None else None
+                if synced is None:
+                    self._synced_specs.pop(job.repo, None)
+                else:
+                    self._synced_specs[job.repo] = synced
+        except asyncio.CancelledError:
+            job.finish("cancelled", None, "daemon stopped")
+            raise
+        except Exception as exc:  # noqa: BLE001
+            job.finish("failed", 1, f"{type(exc).__name__}: {exc}")
+        else:
+            job.finish("succeeded" if code == 0 else "failed", code)
+        log(f"job {job.id} {job.state} (exit={job.exit_code})")
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                payload = json.loads(await reader.readline())
+            except ValueError:
+                await _send(writer, {"error": "request must be one JSON object per line"})
+                return
+            if not isinstance(payload, dict):
+                await _send(writer, {"error": "request must be a JSON object"})
+                return
+            await self._dispatch(payload, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _dispatch(self, payload: dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        op = payload.get("op")
+        if op == "submit":
+            try:
+                job = self.submit(payload)
+            except JobRequestError as exc:
+                await _send(writer, {"error": str(exc)})
+                return
+            await _send(writer, {"job": job.summary()})
+            if payload.get("follow", True):
+                await self._stream(job, writer)
+        elif op == "status":
+            job_id = payload.get("job")
+            if job_id is None:
+                await _send(writer, {"jobs": [job.summary() for job in self.jobs.values()]})
+                return
+            job = self.jobs.get(job_id) if isinstance(job_id, int) else None
+            if job is None:
+                await _send(writer, {"error": f"unknown job {job_id}"})
+                return
+            await _send(writer, {"job": job.summary()})
+            if payload.get("follow", False):
+                await self._stream(job, writer)
+        else:
+            await _send(writer, {"error": f"unknown op {op!r}"})
+
+    async def _stream(self, job: Job, writer: asyncio.StreamWriter) -> None:
+        watcher = job.watch()
+        try:
+            while (event := await watcher.get()) is not None:
+                await _send(writer, {"event": event})
+            await _send(writer, {"job": job.summary()})
+        finally:
+            if watcher in job.watchers:
+                job.watchers.remove(watcher)
+
+
+async def _send(writer: asyncio.StreamWriter, payload: dict[str, Any]) -> None:
+    writer.write((json.dumps(payload, sort_keys=True) + "\n").encode("utf-8"))
+    await writer.drain()
+
+
+def _spec_digest(repo: Path) -> str | None:
+    try:
+        return hashlib.sha256((repo / SPEC_FILE).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _claim_socket(path: Path) -> None:
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except OSError:
+            path.unlink()
+            return
+    raise RuntimeError(f"another kern daemon is listening on {path}")
+
+
+def serve(socket_path: Path, max_jobs: int = DEFAULT_MAX_JOBS, verbose: bool = False, **run_options: Any) -> None:
+    daemon = KernDaemon(socket_path, max_jobs=max_jobs, verbose=verbose, run_options=run_options)
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        await daemon.serve(stop)
+
+    asyncio.run(main())
@@ -0,0 +1 @@
+DEFAULT_VALIDATION_JOBS = 4
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import mmap
+from pathlib import Path
+import re
+
+MMAP_THRESHOLD_BYTES = 1024 * 1024
+
+Content = bytes | mmap.mmap
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(regex: str) -> re.Pattern[bytes]:
+    return re.compile(regex.encode("utf-8"), flags=re.MULTILINE)
+
+
+def match_pattern(content: Content, pattern: str) -> tuple[bool, str]:
+    if pattern.startswith("/") and pattern.endswith("/") and len(pattern) >= 2:
+        return compile_pattern(pattern[1:-1]).search(content) is not None, "regex"
+    return content.find(pattern.encode("utf-8")) != -1, "literal"
+
+
+class FileMatcher:
+    def __init__(self, mmap_threshold: int = MMAP_THRESHOLD_BYTES) -> None:
+        self.mmap_threshold = mmap_threshold
+        self.reads = 0
+        self._contents: dict[Path, Content | None] = {}
+        self._maps: list[mmap.mmap] = []
+
+    def search(self, path: Path, pattern: str) -> tuple[bool, str] | None:
+        content = self._content(path)
+        if content is None:
+            return None
+        return match_pattern(content, pattern)
+
+    def clear(self) -> None:
+        for mapped in self._maps:
+            mapped.close()
+        self._maps.clear()
+        self._contents.clear()
+
+    def close(self) -> None:
+        self.clear()
+
+    def __enter__(self) -> FileMatcher:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _content(self, path: Path) -> Content | None:
+        if path not in self._contents:
+            self._contents[path] = self._load(path)
+        return self._contents[path]
+
+    def _load(self, path: Path) -> Content | None:
+        try:
+            with path.open("rb") as fh:
+                self.reads += 1
+                size = path.stat().st_size
+                if size < self.mmap_threshold or size == 0:
+                    return fh.read()
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        self._maps.append(mapped)
+        return mapped
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from .budget import TOKEN_KEYS, Budget
+from .logging import log, log_label
+from .runtime import run_async
+
+DEFAULT_MAX_CONCURRENT = 4
+
+
+class FleetError(ValueError):
+    pass
+
+
+@dataclass
+class RepoProgress:
+    path: Path
+    label: str
+    status: str = "pending"
+    turns: int = 0
+    tasks_started: int = 0
+    tasks_completed: int = 0
+    exit_code: int | None = None
+    error: str | None = None
+    run_ids: list[str] = field(default_factory=list)
+    stage_events: int = 0
+    duration_ms: float = 0.0
+    cost_usd: float = 0.0
+    tokens: int = 0
+    queue_empty: bool = False
+    failure_kind: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ("pending", "running")
+
+    def observe(self, event: dict[str, Any]) -> None:
+        run_id = event.get("run_id")
+        if isinstance(run_id, str) and run_id not in self.run_ids:
+            self.run_ids.append(run_id)
+        if "event" in event:
+            return
+        self.stage_events += 1
+        self.duration_ms += event.get("duration_ms") or 0
+        self.cost_usd += event.get("total_cost_usd") or 0.0
+        usage = event.get("usage")
+        if isinstance(usage, dict):
+            self.tokens += sum(value for key in TOKEN_KEYS if isinstance(value := usage.get(key), int))
+        if event.get("stage_number") == 1 and event.get("queue_empty"):
+            self.queue_empty = True
+        elif event.get("stage_number") == 1 and event.get("success") and event.get("task_id") is not None:
+            self.tasks_started += 1
+        if event.get("failure_kind"):
+            self.failure_kind = event["failure_kind"]
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "repo": str(self.path),
+            "label": self.label,
+            "status": self.status,
+            "turns": self.turns,
+            "tasks_completed": self.tasks_completed,
+            "exit_code": self.exit_code,
+            "error": self.error,
+            "run_ids": self.run_ids,
+            "stage_events": self.stage_events,
+            "duration_ms": round(self.duration_ms, 3),
+            "cost_usd": round(self.cost_usd, 6),
+            "tokens": self.tokens,
+        }
+
+
+def load_repos(repos_file: Path) -> list[Path]:
+    try:
+        lines = repos_file.read_text(encoding="utf-8").splitlines()
+    except OSError as exc:
+        raise FleetError(f"cannot read {repos_file}: {exc.strerror or exc}") from exc
+    repos: list[Path] = []
+    for number, line in enumerate(lines, start=1):
+        entry = line.split("#", 1)[0].strip()
+        if not entry:
+            continue
+        path = Path(entry).expanduser()
+        if not path.is_absolute():
+            path = repos_file.parent / path
+        path = path.resolve()
+        if not path.is_dir():
+            raise FleetError(f"{repos_file}:{number}: {entry} is not a directory")
+        if path not in repos:
+            repos.append(path)
+    if not repos:
+        raise FleetError(f"{repos_file} lists no repositories")
+    return repos
+
+
+def repo_labels(repos: list[Path]) -> list[str]:
+    labels: list[str] = []
+    for repo in repos:
+        duplicate = sum(other.name == repo.name for other in repos) > 1
+        labels.append(f"{repo.parent.name}/{repo.name}" if duplicate else repo.name)
+    return labels
+
+
+class FleetScheduler:
+    def __init__(
+        self,
+        repos: list[Path],
+        *,
+        fleet_dir: Path,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        count: int = 5,
+        hint: str = "",
+        dry_run: bool = False,
+        verbose: bool = False,
+        budget: Budget | None = None,
+        run_options: dict[str, Any] | None = None,
+    ) -> None:
+        self.repos = [RepoProgress(path=path, label=label) for path, label in zip(repos, repo_labels(repos))]
+        self.fleet_dir = fleet_dir
+        self.max_concurrent = max_concurrent
+        self.count = count
+        self.hint = hint
+        self.dry_run = dry_run
+        self.verbose = verbose
+        self.budget = budget or Budget()
+        self.repo_budgets = {repo.path: self.budget.scoped() for repo in self.repos}
+        self.run_options = dict(run_options or {})
+        self.events_file = fleet_dir / "events.jsonl"
+        self.report_file = fleet_dir / "report.json"
+
+    async def run(self) -> dict[str, Any]:
+        self.fleet_dir.mkdir(parents=True, exist_ok=True)
+        started = datetime.now(timezone.utc)
+        # Each repo is queued at most once, so a repo never runs two turns at the same time and every
+        # repo with work left gets a turn before any repo gets its next one.
+        turns: asyncio.Queue[RepoProgress] = asyncio.Queue()
+        for repo in self.repos:
+            turns.put_nowait(repo)
+        workers = [asyncio.create_task(self._worker(turns)) for _ in range(min(self.max_concurrent, len(self.repos)))]
+        try:
+            await turns.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        report = self.report(started)
+        tmp_file = self.report_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp_file, self.report_file)
+        return report
+
+    def report(self, started: datetime) -> dict[str, Any]:
+        repos = [repo.summary() for repo in self.repos]
+        return {
+            "fleet_dir": str(self.fleet_dir),
+            "started_at": started.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "wall_ms": round((datetime.now(timezone.utc) - started).total_seconds() * 1000, 3),
+            "max_concurrent": self.max_concurrent,
+            "max_cost_usd": self.budget.max_cost_per_run,
+            "cost_usd": round(self.budget.run_cost_usd, 6),
+            "tasks_completed": sum(repo["tasks_completed"] for repo in repos),
+            "failed": [repo["label"] for repo in repos if repo["status"] == "failed"],
+            "repos": repos,
+        }
+
+    async def _worker(self, turns: asyncio.Queue[RepoProgress]) -> None:
+        while True:
+            repo = await turns.get()
+            try:
+                await self._turn(repo)
+                if not repo.finished:
+                    turns.put_nowait(repo)
+            finally:
+                turns.task_done()
+
+    async def _turn(self, repo: RepoProgress) -> None:
+        exhausted = self.budget.exhausted(None)
+        if exhausted is not None:
+            repo.status = "skipped" if repo.turns == 0 else "budget"
+            repo.error = exhausted
+            return
+        repo.status = "running"
+        repo.turns += 1
+        started_before = repo.tasks_started
+        with log_label(repo.label):
+            try:
+                code = await run_async(
+                    None,
+                    self.count if self.dry_run else 1,
+                    self.hint,
+                    self.dry_run,
+                    self.verbose,
+                    run_dir=repo.path,
+                    on_event=lambda event: self._record(repo, event),
+                    budget=self.repo_budgets[repo.path],
+                    populate_queue=repo.turns == 1,
+                    **self.run_options,
+                )
+            except Exception as exc:  # noqa: BLE001
+                code = 1
+                repo.error = f"{type(exc).__name__}: {exc}"
+                log(f"ERROR: {repo.error}")
+        repo.exit_code = code
+        if code != 0:
+            out_of_budget = repo.failure_kind == "budget" or self.budget.exhausted(None) is not None
+            repo.status = "budget" if out_of_budget else "failed"
+            return
+        if repo.tasks_started > started_before:
+            repo.tasks_completed += 1
+        if self.dry_run or repo.queue_empty or repo.tasks_started == started_before or repo.tasks_completed >= self.count:
+            repo.status = "done"
+        else:
+            repo.status = "pending"
+
+    def _record(self, repo: RepoProgress, event: dict[str, Any]) -> None:
+        repo.observe(event)
+        with self.events_file.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps({**event, "repo": repo.label}, sort_keys=True) + "\n")
+
+
+def fleet_dir_for(base: Path) -> Path:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    return base / ".kern" / "fleet" / f"{stamp}-{os.getpid()}"
+
+
+def format_fleet_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"Fleet report {report['fleet_dir']}",
+        f"  {len(report['repos'])} repos  {report['tasks_completed']} tasks  "
+        f"${report['cost_usd']:.4f}  {report['wall_ms'] / 1000:.1f}s wall",
+    ]
+    width = max(len(repo["label"]) for repo in report["repos"])
+    for repo in report["repos"]:
+        line = (
+            f"  {repo['label']:<{width}}  {repo['status']:<7}  tasks={repo['tasks_completed']}  "
+            f"turns={repo['turns']}  ${repo['cost_usd']:.4f}  {repo['duration_ms'] / 1000:.1f}s"
+        )
+        if repo["error"]:
+            line += f"  {repo['error']}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+from pathlib import Path
+import subprocess
+import threading
+
+STATUS_COMMAND = ["git", "status", "--porcelain=v2", "--branch", "-z", "--untracked-files=no"]
+
+
+@dataclass
+class _Entry:
+    fingerprint: tuple[object, ...] | None
+    head: str | None
+    branch: str | None
+    unstaged: list[str]
+    staged: list[str]
+    values: dict[str, str] = field(default_factory=dict)
+
+
+class GitSnapshot:
+    def __init__(self, cwd: Path) -> None:
+        self.cwd = cwd
+        self.git_calls = 0
+        self._entry: _Entry | None = None
+        self._stale = True
+        self._toplevel: Path | None = None
+        self._lock = threading.RLock()
+
+    def mark_stale(self) -> None:
+        with self._lock:
+            self._stale = True
+
+    def head(self) -> str | None:
+        return self._current().head
+
+    def branch(self) -> str | None:
+        return self._current().branch
+
+    def root(self) -> Path:
+        with self._lock:
+            return self._root()
+
+    def changed_files(self) -> list[str]:
+        entry = self._current()
+        ordered = list(entry.unstaged)
+        seen = set(ordered)
+        ordered.extend(name for name in entry.staged if name not in seen)
+        return ordered
+
+    def has_changes(self) -> bool:
+        entry = self._current()
+        return bool(entry.unstaged or entry.staged)
+
+    def patch(self) -> str:
+        with self._lock:
+            entry = self._current()
+            if "patch" not in entry.values:
+                chunks: list[str] = []
+                for command in (["git", "diff"], ["git", "diff", "--cached"]):
+                    output = self._run(command, strip=False)
+                    if output:
+                        chunks.append(output)
+                entry.values["patch"] = "\n".join(chunks)
+            return entry.values["patch"]
+
+    def diff_stat(self) -> str:
+        return self._cached("stat", ["git", "diff", "--stat"])
+
+    def recent_commits(self, limit: int = 5) -> str:
+        return self._cached(f"log:{limit}", ["git", "log", f"-{limit}", "--format=[%h] %s"])
+
+    def changed_since(self, base: str) -> list[str]:
+        output = self._cached(f"since:{base}", ["git", "diff", "--name-only", base, "HEAD"])
+        return [line for line in output.splitlines() if line]
+
+    def tree_hash(self) -> str:
+        with self._lock:
+            entry = self._current()
+            if "tree" not in entry.values:
+                digest = hashlib.sha256()
+                digest.update(repr(entry.fingerprint[0] if entry.fingerprint else None).encode("utf-8"))
+                for path in entry.unstaged:
+                    digest.update(f"\0{path}\0".encode("utf-8"))
+                    digest.update(self.file_digest(path))
+                for path in self._untracked():
+                    digest.update(f"\0?{path}\0".encode("utf-8"))
+                    digest.update(self.file_digest(path))
+                entry.values["tree"] = digest.hexdigest()
+            return entry.values["tree"]
+
+    def dirty_digests(self) -> dict[str, str]:
+        with self._lock:
+            paths = {*self.changed_files(), *self._untracked()}
+            return {path: self.file_digest(path).hex() for path in sorted(paths)}
+
+    def file_digest(self, path: str) -> bytes:
+        digest = hashlib.sha256()
+        try:
+            with (self.root() / path).open("rb") as fh:
+                for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        except OSError:
+            return b"missing"
+        return digest.digest()
+
+    def _untracked(self) -> list[str]:
+        untracked = self._run(
+            ["git", "ls-files", "-o", "--exclude-standard", "-z", "--full-name", "--", ".", ":(exclude).kern"],
+            strip=False,
+        )
+        return sorted(filter(None, (untracked or "").split("\0")))
+
+    def _cached(self, key: str, command: list[str]) -> str:
+        with self._lock:
+            entry = self._current()
+            if key not in entry.values:
+                entry.values[key] = self._run(command) or ""
+            return entry.values[key]
+
+    def _current(self) -> _Entry:
+        with self._lock:
+            if self._entry is not None and not self._stale:
+                return self._entry
+            entry = self._read_status()
+            if self._entry is None or entry.fingerprint is None or entry.fingerprint != self._entry.fingerprint:
+                self._entry = entry
+            else:
+                # Untracked files are not part of the fingerprint, so the tree hash is always recomputed.
+                self._entry.values.pop("tree", None)
+            self._stale = False
+            return self._entry
+
+    def _read_status(self) -> _Entry:
+        raw = self._run(STATUS_COMMAND, strip=False)
+        if raw is None:
+            return _Entry(fingerprint=None, head=None, branch=None, unstaged=[], staged=[])
+
+        head: str | None = None
+        branch: str | None = None
+        unstaged: list[str] = []
+        staged: list[str] = []
+        fields = raw.split("\0")
+        index = 0
+        while index < len(fields):
+            record = fields[index]
+            index += 1
+            if record.startswith("# branch.oid "):
+                oid = record.split(" ", 2)[2]
+                head = None if oid == "(initial)" else oid
+                continue
+            if record.startswith("# branch.head "):
+                name = record.split(" ", 2)[2]
+                branch = "HEAD" if name == "(detached)" else name
+                continue
+            kind = record[:1]
+            if kind == "1":
+                xy, path = record.split(" ", 2)[1], record.split(" ", 8)[8]
+            elif kind == "2":
+                xy, path = record.split(" ", 2)[1], record.split(" ", 9)[9]
+                index += 1
+            elif kind == "u":
+                xy, path = record.split(" ", 2)[1], record.split(" ", 10)[10]
+            else:
+                continue
+            if xy[0] != ".":
+                staged.append(path)
+            if xy[1] != ".":
+                unstaged.append(path)
+
+        return _Entry(
+            fingerprint=(raw, self._worktree_stats(unstaged)),
+            head=head,
+            branch=branch,
+            unstaged=unstaged,
+            staged=staged,
+        )
+
+    def _worktree_stats(self, paths: list[str]) -> tuple[tuple[str, int, int], ...]:
+        if not paths:
+            return ()
+        root = self.root()
+        stats: list[tuple[str, int, int]] = []
+        for path in paths:
+            try:
+                info = (root / path).stat()
+            except OSError:
+                stats.append((path, -1, -1))
+                continue
+            stats.append((path, info.st_mtime_ns, info.st_size))
+        return tuple(stats)
+
+    def _root(self) -> Path:
+        if self._toplevel is None:
+            toplevel = self._run(["git", "rev-parse", "--show-toplevel"])
+            self._toplevel = Path(toplevel) if toplevel else self.cwd
+        return self._toplevel
+
+    def _run(self, command: list[str], strip: bool = True) -> str | None:
+        self.git_calls += 1
+        completed = subprocess.run(
+            command,
+            cwd=self.cwd,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if completed.returncode != 0:
+            return None
+        return completed.stdout.strip() if strip else completed.stdout
+
+
+_SNAPSHOTS: dict[Path, GitSnapshot] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def git_snapshot(cwd: Path) -> GitSnapshot:
+    key = cwd.resolve()
+    with _SNAPSHOTS_LOCK:
+        snapshot = _SNAPSHOTS.get(key)
+        if snapshot is None:
+            snapshot = GitSnapshot(key)
+            _SNAPSHOTS[key] = snapshot
+        return snapshot
+
+
+def close_git_snapshots(root: Path) -> None:
+    root = root.resolve()
+    with _SNAPSHOTS_LOCK:
+        for key in [key for key in _SNAPSHOTS if key.is_relative_to(root)]:
+            del _SNAPSHOTS[key]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
 
 from .types import IterationEvaluation, ValidationResult
 
@@ -49,6 +50,10 @@ def append_validation_result(file_path: Path, result: ValidationResult, attempt:
     ]
     for check in result.checks:
         prefix = "PASS" if check.passed else "FAIL"
+        if check.reused:
+            prefix = f"{prefix} (reused)"
+        elif check.cached:
+            prefix = f"{prefix} (cached)"
         lines.append(f"- {prefix}: {check.criterion} :: {check.details}")
     with file_path.open("a", encoding="utf-8") as fh:
         fh.write("\n" + "\n".join(lines) + "\n")
@@ -85,3 +90,126 @@ def append_fix_context(file_path: Path, result: ValidationResult) -> None:
         lines.append(f"- Details: {check.details}")
     with file_path.open("a", encoding="utf-8") as fh:
         fh.write("\n" + "\n".join(lines) + "\n")
+
+
+VIEW_SECTIONS: dict[int, tuple[str, ...]] = {
+    2: ("Research",),
+    3: ("Research", "Design"),
+    4: ("Research", "Design", "Structure"),
+    5: ("Design", "Structure", "Plan", "Implement", "Validation", "Evaluation", "Fix Context"),
+    6: ("Plan", "Implement", "Validation", "Evaluation"),
+}
+DEFAULT_VIEW_MAX_BYTES = 16 * 1024
+TRUNCATED_MARKER = "- ... (truncated, see full log)"
+
+
+def handoff_view_path(handoff_dir: Path, task_id: int, stage_number: int) -> Path:
+    return handoff_dir / "views" / f"task-{task_id}-stage-{stage_number}.md"
+
+
+def split_handoff_sections(text: str) -> tuple[list[str], list[tuple[str, list[str]]]]:
+    header: list[str] = []
+    sections: list[tuple[str, list[str]]] = []
+    for line in text.splitlines():
+        if line.startswith("## "):
+            sections.append((line[3:].strip(), []))
+        elif sections:
+            sections[-1][1].append(line)
+        else:
+            header.append(line)
+    return header, sections
+
+
+def write_handoff_view(
+    handoff_file: Path,
+    view_file: Path,
+    stage_number: int,
+    state: dict[str, Any],
+    max_bytes: int = DEFAULT_VIEW_MAX_BYTES,
+) -> tuple[int, int]:
+    text = handoff_file.read_text(encoding="utf-8")
+    header, sections = split_handoff_sections(text)
+    wanted = VIEW_SECTIONS.get(stage_number, ())
+
+    latest: dict[str, list[str]] = {}
+    validation_history: list[str] = []
+    for title, body in sections:
+        if title not in wanted:
+            continue
+        if title == "Validation" and "Validation" in latest:
+            validation_history.append(_validation_summary(latest["Validation"]))
+        latest[title] = _strip_blank_edges(body)
+
+    view_sections: list[tuple[str, list[str]]] = []
+    state_lines = _state_lines(state)
+    if state_lines:
+        view_sections.append(("State", state_lines))
+    for title in wanted:
+        if title in latest:
+            view_sections.append((title, latest[title]))
+        if title == "Validation" and validation_history:
+            view_sections.append(("Validation History", validation_history))
+
+    intro = [line for line in _strip_blank_edges(header) if line.strip()]
+    intro.append(f"Full log: {handoff_file}")
+    rendered = _render_view(intro, view_sections, max_bytes)
+    view_file.parent.mkdir(parents=True, exist_ok=True)
+    view_file.write_text(rendered, encoding="utf-8")
+    return len(text.encode("utf-8")), len(rendered.encode("utf-8"))
+
+
+def _state_lines(state: dict[str, Any]) -> list[str]:
+    lines: list[str] = []
+    planned = state.get("planned_files")
+    if isinstance(planned, list) and planned:
+        lines.append(f"- Planned files: {', '.join(str(item) for item in planned)}")
+    criteria = state.get("success_criteria")
+    if isinstance(criteria, list) and criteria:
+        lines.append("- Success criteria:")
+        for item in criteria:
+            if isinstance(item, dict):
+                lines.append(f"  - {item.get('kind')}: {item.get('value')}")
+    completed = state.get("completed_stages")
+    if isinstance(completed, list) and completed:
+        lines.append(f"- Completed stages: {', '.join(str(item) for item in completed)}")
+    return lines
+
+
+def _validation_summary(body: list[str]) -> str:
+    attempt = next((line.split(":", 1)[1].strip() for line in body if line.startswith("- Attempt:")), "?")
+    status = next((line.split(":", 1)[1].strip() for line in body if line.startswith("- Status:")), "?")
+    failed = [line[len("- FAIL: ") :].split(" :: ", 1)[0] for line in body if line.startswith("- FAIL: ")]
+    summary = f"- Attempt {attempt}: {status}"
+    if failed:
+        summary += f" ({', '.join(failed)})"
+    return summary
+
+
+def _strip_blank_edges(lines: list[str]) -> list[str]:
+    start, end = 0, len(lines)
+    while start < end and not lines[start].strip():
+        start += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+    return lines[start:end]
+
+
+def _render_view(intro: list[str], sections: list[tuple[str, list[str]]], max_bytes: int) -> str:
+    bodies = [list(body) for _, body in sections]
+
+    def render() -> str:
+        parts = ["\n".join(intro)]
+        for (title, _), body in zip(sections, bodies):
+            parts.append("\n".join([f"## {title}", *body]))
+        return "\n\n".join(parts) + "\n"
+
+    rendered = render()
+    while len(rendered.encode("utf-8")) > max_bytes:
+        largest = max(range(len(bodies)), key=lambda index: len("\n".join(bodies[index])), default=None)
+        if largest is None or len(bodies[largest]) <= 4:
+            encoded = rendered.encode("utf-8")[: max(0, max_bytes - len(TRUNCATED_MARKER) - 2)]
+            return encoded.decode("utf-8", errors="ignore") + f"\n{TRUNCATED_MARKER}\n"
+        body = bodies[largest]
+        bodies[largest] = [*body[: len(body) // 2], TRUNCATED_MARKER]
+        rendered = render()
+    return rendered
@@ -1,20 +1,36 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 import sys
+from typing import Iterator
 
+_label: ContextVar[str | None] = ContextVar("kern_log_label", default=None)
 
-def _ts() -> str:
-    return datetime.now().strftime("%H:%M:%S")
+
+def _prefix() -> str:
+    stamp = f"[{datetime.now().strftime('%H:%M:%S')}]"
+    label = _label.get()
+    return stamp if label is None else f"{stamp} [{label}]"
+
+
+@contextmanager
+def log_label(label: str) -> Iterator[None]:
+    token = _label.set(label)
+    try:
+        yield
+    finally:
+        _label.reset(token)
 
 
 def log(message: str) -> None:
-    print(f"[{_ts()}] {message}", file=sys.stderr)
+    print(f"{_prefix()} {message}", file=sys.stderr)
 
 
 def debug(enabled: bool, message: str) -> None:
     if enabled:
-        print(f"[{_ts()}] [DEBUG] {message}", file=sys.stderr)
+        print(f"{_prefix()} [DEBUG] {message}", file=sys.stderr)
 
 
 def die(code: int, message: str) -> int:
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+import json
+from pathlib import Path
+from typing import Any
+
+from .run_store import open_existing_store
+
+STAGE_PHASES = ("render_ms", "startup_ms", "model_ms", "parse_ms")
+MAX_PATH_LINES = 40
+
+
+@dataclass(frozen=True)
+class Span:
+    task_id: int | None
+    label: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def runs_dir(kern_dir: Path) -> Path:
+    return kern_dir / "runs"
+
+
+def latest_run_id(kern_dir: Path) -> str | None:
+    candidates = [path.name for path in runs_dir(kern_dir).glob("*") if (path / "events.jsonl").exists()]
+    store = open_existing_store(kern_dir)
+    if store is not None:
+        candidates.extend(store.run_ids())
+        store.close()
+    return max(candidates) if candidates else None
+
+
+def load_events(kern_dir: Path, run_id: str) -> list[dict[str, Any]]:
+    events_file = runs_dir(kern_dir) / run_id / "events.jsonl"
+    if not events_file.exists():
+        store = open_existing_store(kern_dir)
+        if store is not None:
+            events = [event for _, event in store.events(run_id=run_id)]
+            store.close()
+            if events:
+                return events
+    events: list[dict[str, Any]] = []
+    for line in events_file.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(payload, dict):
+            events.append(payload)
+    return events
+
+
+def spans(events: list[dict[str, Any]]) -> list[Span]:
+    result: list[Span] = []
+    for event in events:
+        start = event.get("monotonic_start")
+        end = event.get("monotonic_end")
+        if not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
+            continue
+        kind = event.get("event", "stage")
+        if kind == "stage":
+            label = f"stage {event.get('stage_number')} {event.get('stage_name', '')}".rstrip()
+        elif kind == "phase":
+            label = f"stage {event.get('stage_number')} {event.get('phase')}"
+        else:
+            continue
+        result.append(Span(task_id=event.get("task_id"), label=label, start=float(start), end=float(end)))
+    return result
+
+
+def critical_path(items: list[Span]) -> list[Span]:
+    if not items:
+        return []
+    order = sorted(items, key=lambda span: (span.end, span.start))
+    ends = [span.end for span in order]
+    by_task: dict[int | None, list[int]] = defaultdict(list)
+    for index, span in enumerate(order):
+        by_task[span.task_id].append(index)
+
+    index = len(order) - 1
+    path = [order[index]]
+    while True:
+        current = order[index]
+        limit = min(bisect_right(ends, current.start + 1e-6), index)
+        if limit == 0:
+            break
+        same_task = by_task[current.task_id]
+        position = bisect_left(same_task, limit) - 1
+        index = same_task[position] if position >= 0 else limit - 1
+        path.append(order[index])
+    path.reverse()
+    return path
+
+
+def time_sinks(events: list[dict[str, Any]]) -> list[tuple[str, float, int]]:
+    totals: dict[str, float] = defaultdict(float)
+    counts: dict[str, int] = defaultdict(int)
+
+    def add(label: str, millis: Any) -> None:
+        if isinstance(millis, (int, float)):
+            totals[label] += float(millis)
+            counts[label] += 1
+
+    for event in events:
+        kind = event.get("event", "stage")
+        if kind == "stage":
+            stage = f"stage {event.get('stage_number')}"
+            profile = event.get("profile")
+            if isinstance(profile, dict):
+                for key in STAGE_PHASES:
+                    add(f"{stage} {key[:-3]}", profile.get(key))
+            else:
+                add(f"{stage} total", event.get("duration_ms"))
+        elif kind == "phase":
+            add(f"stage {event.get('stage_number')} {event.get('phase')}", event.get("duration_ms"))
+        elif kind == "validation_check":
+            add(f"check {event.get('criterion')}", event.get("duration_ms"))
+    return sorted(((label, totals[label], counts[label]) for label in totals), key=lambda item: -item[1])
+
+
+def format_profile(run_id: str, events: list[dict[str, Any]], top: int = 10) -> str:
+    items = spans(events)
+    lines = [f"Run {run_id}"]
+    wall = 0.0
+    if not items:
+        lines.append("No timed events (run with --profile for a phase breakdown)")
+    else:
+        run_start = min(span.start for span in items)
+        wall = max(span.end for span in items) - run_start
+        path = critical_path(items)
+        busy = sum(span.duration for span in path)
+        lines.append(f"Wall time: {wall:.3f}s")
+        lines.append(f"Critical path ({len(path)} spans, {busy:.3f}s busy, {max(0.0, wall - busy):.3f}s between spans):")
+        shown = path if len(path) <= MAX_PATH_LINES else sorted(path, key=lambda span: -span.duration)[:top]
+        if len(shown) < len(path):
+            lines.append(f"  (longest {len(shown)} spans shown)")
+        for span in sorted(shown, key=lambda span: span.start):
+            task = "-" if span.task_id is None else span.task_id
+            lines.append(f"  +{span.start - run_start:8.3f}s {span.duration * 1000:10.1f} ms  task {task}  {span.label}")
+
+    sinks = time_sinks(events)
+    if sinks:
+        lines.append(f"Top time sinks (of {len(sinks)}):")
+        for label, millis, count in sinks[:top]:
+            share = f"{millis / (wall * 1000) * 100:5.1f}%" if wall else "    -"
+            lines.append(f"  {millis:10.1f} ms {share} of wall  x{count:<3} {label}")
+    return "\n".join(lines)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import re
-import subprocess
+
+from .git_snapshot import git_snapshot
 
 HINT_RE = re.compile(
     r"ignore.*(previous|all).*instructions|disregard.*above|</(system|user|data)>",
@@ -15,6 +17,8 @@ HINT_RE = re.compile(
 class PromptTemplate:
     model: str | None
     body: str
+    max_tokens: int | None = None
+    timeout_seconds: float | None = None
 
 
 def validate_hint(hint: str) -> None:
@@ -29,32 +33,25 @@ def wrap_untrusted(source: str, content: str) -> str:
     return f'<data source="{source}">\n{escaped}\n</data>'
 
 
-def _run_capture(cwd: Path, command: list[str]) -> str:
-    completed = subprocess.run(
-        command,
-        cwd=cwd,
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    if completed.returncode != 0:
-        return "none"
-    return completed.stdout.strip() or "none"
-
-
 def collect_recent_commits(cwd: Path) -> str:
-    output = _run_capture(cwd, ["git", "log", "-5", "--format=[%h] %s"])
+    output = git_snapshot(cwd).recent_commits(5) or "none"
     lines = output.splitlines()[:80]
     return wrap_untrusted("git-log", "\n".join(lines))
 
 
 def collect_diff_stat(cwd: Path) -> str:
-    output = _run_capture(cwd, ["git", "diff", "--stat"])
+    output = git_snapshot(cwd).diff_stat() or "none"
     lines = output.splitlines()[:30]
     return wrap_untrusted("git-diff", "\n".join(lines))
 
 
 def parse_prompt_template(path: Path) -> PromptTemplate:
+    info = path.stat()
+    return _parse_prompt_file(path, info.st_mtime_ns, info.st_size)
+
+
+@lru_cache(maxsize=64)
+def _parse_prompt_file(path: Path, mtime_ns: int, size: int) -> PromptTemplate:
     raw = path.read_text(encoding="utf-8")
     if raw.startswith("---\n"):
         end = raw.find("\n---\n", 4)
@@ -62,14 +59,28 @@ def parse_prompt_template(path: Path) -> PromptTemplate:
             front_matter = raw[4:end]
             body = raw[end + 5 :]
             model = None
+            max_tokens = None
+            timeout_seconds = None
             for line in front_matter.splitlines():
-                if line.strip().startswith("model:"):
-                    model = line.split(":", 1)[1].strip() or None
-                    break
-            return PromptTemplate(model=model, body=body)
+                key, _, value = line.strip().partition(":")
+                if key == "model" and model is None:
+                    model = value.strip() or None
+                elif key == "max_tokens" and value.strip().isdigit():
+                    max_tokens = int(value.strip())
+                elif key == "timeout":
+                    timeout_seconds = _positive_float(value)
+            return PromptTemplate(model=model, body=body, max_tokens=max_tokens, timeout_seconds=timeout_seconds)
     return PromptTemplate(model=None, body=raw)
 
 
+def _positive_float(value: str) -> float | None:
+    try:
+        parsed = float(value.strip())
+    except ValueError:
+        return None
+    return parsed if parsed > 0 else None
+
+
 def render_prompt(body: str, substitutions: dict[str, str]) -> str:
     rendered = body
     for key, value in substitutions.items():
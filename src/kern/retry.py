@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import random
+
+RETRYABLE_FAILURES = {"timeout", "transient"}
+TRANSIENT_MARKERS = ("overloaded", "rate_limit", "rate limit", "429", "529", "503", "timed out", "connection reset")
+
+
+def is_transient(text: str | None) -> bool:
+    lowered = (text or "").lower()
+    return any(marker in lowered for marker in TRANSIENT_MARKERS)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    retries: int = 2
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+
+    def should_retry(self, failure_kind: str | None, attempt: int) -> bool:
+        return failure_kind in RETRYABLE_FAILURES and attempt <= self.retries
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
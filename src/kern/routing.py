@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .stats import Aggregate, collect_stats
+
+MODEL_LADDER = ("haiku", "sonnet", "opus")
+ROUTED_STAGES = {2, 3, 4, 5}
+MIN_HISTORY = 5
+MIN_SUCCESS_RATE = 0.9
+
+
+@dataclass(frozen=True)
+class TaskSize:
+    files: int
+    constraints: int
+
+
+def task_size(stage1_metadata: Any) -> TaskSize | None:
+    if not isinstance(stage1_metadata, dict):
+        return None
+    research = stage1_metadata.get("research")
+    if not isinstance(research, dict):
+        return None
+    files = research.get("files")
+    constraints = research.get("constraints")
+    if not isinstance(files, list):
+        return None
+    return TaskSize(
+        files=len([item for item in files if item]),
+        constraints=len([item for item in constraints if item]) if isinstance(constraints, list) else 0,
+    )
+
+
+@dataclass
+class ModelRouter:
+    history: dict[str, Aggregate] = field(default_factory=dict)
+
+    @classmethod
+    def from_kern_dir(cls, kern_dir: Path) -> ModelRouter:
+        index, _ = collect_stats(kern_dir, save=False)
+        return cls(history=dict(index.groups["stage_model"]))
+
+    def choose(self, stage_number: int, configured: str, size: TaskSize | None, escalation: int = 0) -> str:
+        if stage_number not in ROUTED_STAGES or configured not in MODEL_LADDER:
+            return configured
+        ceiling = MODEL_LADDER.index(configured)
+        tier = min(ceiling, self._size_tier(stage_number, size, ceiling))
+        while tier < ceiling and not self._trusted(stage_number, MODEL_LADDER[tier], configured):
+            tier += 1
+        return MODEL_LADDER[min(ceiling, tier + escalation)]
+
+    def can_escalate(self, model: str, configured: str) -> bool:
+        if model not in MODEL_LADDER or configured not in MODEL_LADDER:
+            return False
+        return MODEL_LADDER.index(model) < MODEL_LADDER.index(configured)
+
+    @staticmethod
+    def _size_tier(stage_number: int, size: TaskSize | None, ceiling: int) -> int:
+        if size is None:
+            return ceiling
+        if size.files <= 2 and size.constraints <= 2:
+            return 1 if stage_number == 5 else 0
+        if size.files <= 6 and size.constraints <= 4:
+            return 1
+        return ceiling
+
+    def _trusted(self, stage_number: int, model: str, configured: str) -> bool:
+        candidate = self.history.get(f"{stage_number} {model}")
+        if candidate is None or candidate.count < MIN_HISTORY:
+            return True
+        if 1 - candidate.failures / candidate.count < MIN_SUCCESS_RATE:
+            return False
+        reference = self.history.get(f"{stage_number} {configured}")
+        if reference is None or reference.count < MIN_HISTORY:
+            return True
+        cheaper = candidate.cost_usd / candidate.count < reference.cost_usd / reference.count
+        faster = (candidate.percentile(50) or 0) < (reference.percentile(50) or 0)
+        return cheaper or faster
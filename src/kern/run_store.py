@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator
+
+STORE_FILE = "kern.db"
+SCHEMA_VERSION = 1
+DEFAULT_BATCH_SIZE = 64
+BUSY_TIMEOUT_MS = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    task_id INTEGER,
+    stage_number INTEGER,
+    kind TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_run ON events (run_id, id);
+CREATE INDEX IF NOT EXISTS events_task ON events (task_id, id);
+CREATE INDEX IF NOT EXISTS events_stage ON events (stage_number, kind);
+CREATE INDEX IF NOT EXISTS events_time ON events (recorded_at);
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    attempt INTEGER,
+    score INTEGER,
+    passed_soft_gate INTEGER,
+    timestamp_utc TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evaluations_task ON evaluations (task_id, id);
+CREATE TABLE IF NOT EXISTS task_states (
+    task_id INTEGER PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def store_path(kern_dir: Path) -> Path:
+    return kern_dir / STORE_FILE
+
+
+class RunStore:
+    def __init__(self, path: Path, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._conn.executescript(SCHEMA)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._events: list[tuple[object, ...]] = []
+        self._evaluations: list[tuple[object, ...]] = []
+        self._states: dict[int, tuple[object, ...]] = {}
+        self._lock = threading.Lock()
+
+    def append_event(self, payload: dict[str, Any]) -> None:
+        row = (
+            payload.get("run_id") or "",
+            payload.get("task_id"),
+            payload.get("stage_number"),
+            payload.get("event", "stage"),
+            time.time(),
+            json.dumps(payload, sort_keys=True),
+        )
+        with self._lock:
+            self._events.append(row)
+            pending = len(self._events) + len(self._evaluations)
+        if pending >= self.batch_size:
+            self.flush()
+
+    def append_evaluation(self, payload: dict[str, Any]) -> None:
+        row = (
+            payload["task_id"],
+            payload.get("attempt"),
+            payload.get("score"),
+            None if payload.get("passed_soft_gate") is None else int(bool(payload["passed_soft_gate"])),
+            payload.get("timestamp_utc"),
+            json.dumps(payload, sort_keys=True),
+        )
+        with self._lock:
+            self._evaluations.append(row)
+
+    def save_task_state(self, task_id: int, payload: dict[str, Any]) -> None:
+        with self._lock:
+            self._states[task_id] = (task_id, time.time(), json.dumps(payload, sort_keys=True))
+
+    def flush(self) -> None:
+        with self._lock:
+            events, self._events = self._events, []
+            evaluations, self._evaluations = self._evaluations, []
+            states, self._states = list(self._states.values()), {}
+            if not (events or evaluations or states):
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO events (run_id, task_id, stage_number, kind, recorded_at, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    events,
+                )
+                self._conn.executemany(
+                    "INSERT INTO evaluations (task_id, attempt, score, passed_soft_gate, timestamp_utc, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    evaluations,
+                )
+                self._conn.executemany(
+                    "INSERT INTO task_states (task_id, updated_at, payload) VALUES (?, ?, ?) "
+                    "ON CONFLICT (task_id) DO UPDATE SET updated_at = excluded.updated_at, payload = excluded.payload",
+                    states,
+                )
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def events(
+        self,
+        *,
+        run_id: str | None = None,
+        task_id: int | None = None,
+        stage_number: int | None = None,
+        kind: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        after_id: int = 0,
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        clauses = ["id > ?"]
+        params: list[object] = [after_id]
+        for column, value in (("run_id", run_id), ("task_id", task_id), ("stage_number", stage_number), ("kind", kind)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("recorded_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("recorded_at < ?")
+            params.append(until)
+        yield from self._rows(f"SELECT id, payload FROM events WHERE {' AND '.join(clauses)} ORDER BY id", params)
+
+    def evaluations(self, task_id: int | None = None, after_id: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+        if task_id is None:
+            query, params = "SELECT id, payload FROM evaluations WHERE id > ? ORDER BY id", [after_id]
+        else:
+            query = "SELECT id, payload FROM evaluations WHERE task_id = ? AND id > ? ORDER BY id"
+            params = [task_id, after_id]
+        yield from self._rows(query, params)
+
+    def last_score(self, task_id: int) -> int | None:
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score FROM evaluations WHERE task_id = ? AND score IS NOT NULL ORDER BY id DESC LIMIT 1",
+                (task_id,),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def task_states(self) -> dict[int, dict[str, Any]]:
+        return {task_id: payload for task_id, payload in self._rows("SELECT task_id, payload FROM task_states", [])}
+
+    def run_ids(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT run_id FROM events ORDER BY run_id")]
+
+    def max_ids(self) -> tuple[int, int]:
+        with self._lock:
+            events = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+            evaluations = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM evaluations").fetchone()[0]
+        return events, evaluations
+
+    def _rows(self, query: str, params: list[object]) -> Iterator[tuple[Any, dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for key, raw in rows:
+            yield key, json.loads(raw)
+
+
+def open_existing_store(kern_dir: Path) -> RunStore | None:
+    path = store_path(kern_dir)
+    return RunStore(path) if path.exists() else None
+
+
+def export_store(store: RunStore, kern_dir: Path) -> dict[str, int]:
+    store.flush()
+    runs: dict[str, list[str]] = {}
+    for _, event in store.events():
+        runs.setdefault(str(event.get("run_id") or "unknown"), []).append(json.dumps(event, sort_keys=True))
+    for run_id, lines in runs.items():
+        _write_lines(kern_dir / "runs" / run_id / "events.jsonl", lines)
+
+    reports: dict[int, list[str]] = {}
+    for _, evaluation in store.evaluations():
+        reports.setdefault(int(evaluation["task_id"]), []).append(json.dumps(evaluation, sort_keys=True))
+    for task_id, lines in reports.items():
+        _write_lines(kern_dir / "reports" / f"task-{task_id}.jsonl", lines)
+        (kern_dir / "reports" / f"task-{task_id}.index.json").unlink(missing_ok=True)
+
+    states = store.task_states()
+    for task_id, payload in states.items():
+        path = kern_dir / "state" / f"task-{task_id}.json"
+        _write_text(path, json.dumps(payload, indent=2, sort_keys=True) + "\n")
+    return {"runs": len(runs), "reports": len(reports), "states": len(states)}
+
+
+def _write_lines(path: Path, lines: list[str]) -> None:
+    _write_text(path, "".join(f"{line}\n" for line in lines))
+
+
+def _write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 import json
+import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from .types import IterationEvaluation, StageExecution, StageSpec
+from .run_store import RunStore
+from .state import task_state
+from .types import IterationEvaluation, StageExecution, StageSpec, ValidationResult
 
 
 def utc_now() -> str:
@@ -13,13 +16,24 @@ def utc_now() -> str:
 
 
 class RunLogger:
-    def __init__(self, kern_dir: Path, run_id: str) -> None:
+    def __init__(
+        self,
+        kern_dir: Path,
+        run_id: str,
+        on_event: Callable[[dict[str, Any]], None] | None = None,
+        store: RunStore | None = None,
+    ) -> None:
         self.run_id = run_id
+        self.on_event = on_event
+        self.store = store
+        self.state_dir = kern_dir / "state"
         self.runs_dir = kern_dir / "runs" / run_id
-        self.runs_dir.mkdir(parents=True, exist_ok=True)
         self.events_file = self.runs_dir / "events.jsonl"
         self.reports_dir = kern_dir / "reports"
-        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self._task_ids: set[int] = set()
+        if store is None:
+            self.runs_dir.mkdir(parents=True, exist_ok=True)
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
 
     def log_stage_event(
         self,
@@ -31,6 +45,9 @@ class RunLogger:
         ended_at: str,
         duration_ms: int,
         execution: StageExecution,
+        monotonic_start: float | None = None,
+        monotonic_end: float | None = None,
+        extra: dict[str, Any] | None = None,
     ) -> None:
         payload: dict[str, Any] = {
             "run_id": self.run_id,
@@ -41,6 +58,8 @@ class RunLogger:
             "started_at": started_at,
             "ended_at": ended_at,
             "duration_ms": duration_ms,
+            "monotonic_start": monotonic_start,
+            "monotonic_end": monotonic_end,
             "success": execution.success,
             "skip": execution.skip,
             "queue_empty": execution.queue_empty,
@@ -49,43 +68,157 @@ class RunLogger:
         }
         if execution.error:
             payload["error"] = execution.error
-        self._append_jsonl(self.events_file, payload)
+        if execution.failure_kind:
+            payload["failure_kind"] = execution.failure_kind
+        if extra:
+            payload.update(extra)
+        self._emit(payload)
+        if self.store is not None:
+            if task_id is not None:
+                self._task_ids.add(task_id)
+            self._sync_store(self.store)
 
-    def append_evaluation(self, evaluation: IterationEvaluation) -> Path:
-        report_file = self.reports_dir / f"task-{evaluation.task_id}.jsonl"
-        self._append_jsonl(
-            report_file,
+    def log_phase(
+        self,
+        *,
+        task_id: int | None,
+        stage_number: int,
+        phase: str,
+        monotonic_start: float,
+        monotonic_end: float,
+    ) -> None:
+        self._emit(
             {
-                "task_id": evaluation.task_id,
-                "attempt": evaluation.attempt,
-                "score": evaluation.score,
-                "critical_failures": evaluation.critical_failures,
-                "advisories": evaluation.advisories,
-                "passed_soft_gate": evaluation.passed_soft_gate,
-                "timestamp_utc": evaluation.timestamp_utc,
+                "run_id": self.run_id,
+                "event": "phase",
+                "task_id": task_id,
+                "stage_number": stage_number,
+                "phase": phase,
+                "monotonic_start": monotonic_start,
+                "monotonic_end": monotonic_end,
+                "duration_ms": round((monotonic_end - monotonic_start) * 1000, 3),
             },
         )
+
+    def log_validation_checks(self, *, task_id: int, attempt: int, validation: ValidationResult) -> None:
+        for check in validation.checks:
+            payload: dict[str, Any] = {
+                "run_id": self.run_id,
+                "event": "validation_check",
+                "task_id": task_id,
+                "attempt": attempt,
+                "criterion": check.criterion,
+                "kind": check.kind,
+                "passed": check.passed,
+                "duration_ms": None if check.duration_ms is None else round(check.duration_ms, 3),
+            }
+            if check.reused:
+                payload["reused"] = True
+            if check.cached:
+                payload["cached"] = True
+            self._emit(payload)
+
+    def append_evaluation(self, evaluation: IterationEvaluation) -> Path:
+        payload = {
+            "task_id": evaluation.task_id,
+            "attempt": evaluation.attempt,
+            "score": evaluation.score,
+            "critical_failures": evaluation.critical_failures,
+            "advisories": evaluation.advisories,
+            "passed_soft_gate": evaluation.passed_soft_gate,
+            "timestamp_utc": evaluation.timestamp_utc,
+        }
+        if self.store is not None:
+            self.store.append_evaluation(payload)
+            return self.store.path
+        report_file = self.reports_dir / f"task-{evaluation.task_id}.jsonl"
+        self._append_jsonl(report_file, payload)
+        self.report_index(evaluation.task_id)
         return report_file
 
     def previous_score(self, task_id: int) -> int | None:
+        if self.store is not None:
+            return self.store.last_score(task_id)
+        return self.report_index(task_id)["last_score"]
+
+    def close(self) -> None:
+        if self.store is not None:
+            self._sync_store(self.store)
+            self.store.close()
+
+    def report_index(self, task_id: int) -> dict[str, Any]:
         report_file = self.reports_dir / f"task-{task_id}.jsonl"
-        if not report_file.exists():
-            return None
-        last_score: int | None = None
-        for line in report_file.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                payload = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            score = payload.get("score")
-            if isinstance(score, int):
-                last_score = score
-        return last_score
+        index_file = self.reports_dir / f"task-{task_id}.index.json"
+        try:
+            size = report_file.stat().st_size
+        except OSError:
+            return _empty_report_index(task_id)
+
+        index = _load_report_index(index_file, task_id)
+        if index is None or index["offset"] > size:
+            index = _empty_report_index(task_id)
+        if index["offset"] == size:
+            return index
+
+        with report_file.open("rb") as fh:
+            fh.seek(index["offset"])
+            for raw in fh:
+                if not raw.endswith(b"\n"):
+                    break
+                index["offset"] += len(raw)
+                try:
+                    payload = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                score = payload.get("score") if isinstance(payload, dict) else None
+                if isinstance(score, int):
+                    index["attempts"] += 1
+                    index["last_score"] = score
+                    index["best_score"] = score if index["best_score"] is None else max(index["best_score"], score)
+
+        tmp_file = index_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(index, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp_file, index_file)
+        return index
+
+    def _emit(self, payload: dict[str, Any]) -> None:
+        if self.store is not None:
+            self.store.append_event(payload)
+        else:
+            self._append_jsonl(self.events_file, payload)
+        if self.on_event is not None:
+            self.on_event(payload)
+
+    def _sync_store(self, store: RunStore) -> None:
+        # The in-memory task state stays the working copy; the store gets a snapshot at every stage boundary.
+        for task_id in sorted(self._task_ids):
+            state = task_state(self.state_dir, task_id).payload
+            if state:
+                store.save_task_state(task_id, state)
+        store.flush()
 
     @staticmethod
     def _append_jsonl(path: Path, payload: dict[str, Any]) -> None:
         with path.open("a", encoding="utf-8") as fh:
             fh.write(json.dumps(payload, sort_keys=True) + "\n")
+
+
+def _empty_report_index(task_id: int) -> dict[str, Any]:
+    return {"task_id": task_id, "offset": 0, "attempts": 0, "last_score": None, "best_score": None}
+
+
+def _load_report_index(index_file: Path, task_id: int) -> dict[str, Any] | None:
+    try:
+        payload = json.loads(index_file.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("task_id") != task_id:
+        return None
+    offset = payload.get("offset")
+    attempts = payload.get("attempts")
+    if not isinstance(offset, int) or offset < 0 or not isinstance(attempts, int):
+        return None
+    for key in ("last_score", "best_score"):
+        if payload.get(key) is not None and not isinstance(payload.get(key), int):
+            return None
+    return {key: payload.get(key) for key in _empty_report_index(task_id)}
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
+from functools import lru_cache
+import inspect
 import os
 from pathlib import Path
 import random
-import re
-import subprocess
+import shutil
 import sys
-from typing import Iterable
+import time
+from typing import Any, Callable, Iterable, Iterator
 
+from .budget import Budget, metered
+from .defaults import DEFAULT_VALIDATION_JOBS
 from .evaluation import evaluate_iteration
+from .git_snapshot import close_git_snapshots, git_snapshot
 from .handoff import (
     append_evaluation_result,
     append_fix_context,
@@ -18,7 +25,9 @@ from .handoff import (
     append_validation_result,
     ensure_handoff_dir,
     handoff_path,
+    handoff_view_path,
     init_handoff_file,
+    write_handoff_view,
 )
 from .logging import debug, die, log
 from .prompting import (
@@ -29,10 +38,24 @@ from .prompting import (
     validate_hint,
     wrap_untrusted,
 )
+from .retry import RetryPolicy
+from .routing import ROUTED_STAGES, ModelRouter, task_size
+from .run_store import RunStore, store_path
 from .runlog import RunLogger
-from .sdk_runner import ClaudeSdkRunner
-from .stages import stage_specs
-from .state import ensure_state_dir, load_planned_files, load_success_criteria, update_task_state_from_machine
+from .spec_graph import SpecGraphError, critical_path, load_spec_tasks, makespan, project_schedule, ready_tasks
+from .stages import is_read_only, stage_specs
+from .state import (
+    TaskStateError,
+    close_task_states,
+    copy_stage_state,
+    load_completed_stages,
+    load_planned_files,
+    load_success_criteria,
+    mark_stage_completed,
+    reset_completed_stages,
+    task_state,
+    update_task_state_from_machine,
+)
 from .types import (
     IterationEvaluation,
     RunContext,
@@ -43,7 +66,7 @@ from .types import (
     ValidationResult,
     Validator,
 )
-from .validation import SuccessCriteriaValidator
+from .worktree import WorktreeError, create_worktree, integrate_worktree, remove_worktree, worktrees_dir
 
 SPEC_FILE = "SPEC.md"
 
@@ -56,16 +79,213 @@ class TaskFailed(Exception):
     pass
 
 
-def run(
+@dataclass
+class _JobPool:
+    run_dir: Path
+    selection: asyncio.Lock = field(default_factory=asyncio.Lock)
+    commit: asyncio.Lock = field(default_factory=asyncio.Lock)
+    worktrees: asyncio.Lock = field(default_factory=asyncio.Lock)
+    active: set[int] = field(default_factory=set)
+    finished: asyncio.Event = field(default_factory=asyncio.Event)
+    completions: int = 0
+
+
+@dataclass
+class _SpeculativeStage:
+    number: int
+    execution: StageExecution
+    handoff_size: int
+
+
+@dataclass
+class _Speculation:
+    task: asyncio.Task[list[_SpeculativeStage]]
+    ctx: RunContext
+    after_task_id: int
+    head: str | None
+    seen: dict[str, bytes]
+
+
+class _Pipeline:
+    def __init__(
+        self,
+        ctx: RunContext,
+        specs: dict[int, StageSpec],
+        stage_runner: StageRunner,
+        run_logger: RunLogger,
+    ) -> None:
+        self.ctx = ctx
+        self.specs = {number: _without_subagents(spec) for number, spec in specs.items()}
+        self.stage_runner = stage_runner
+        self.run_logger = run_logger
+        self.enabled = True
+        self.pending: _Speculation | None = None
+        self.depth = 0
+        for number in range(1, ctx.speculate + 1):
+            if not is_read_only(self.specs[number]):
+                break
+            self.depth = number
+
+    async def start(self, current: RunContext) -> None:
+        if not self.enabled or self.pending is not None or self.depth == 0 or current.task_id is None:
+            return
+        spec_dir = self.ctx.kern_dir / "speculative" / self.ctx.run_id
+        _remove_speculative_dir(spec_dir)
+        spec_ctx = replace(
+            self.ctx,
+            handoff_dir=spec_dir / "handoff",
+            state_dir=spec_dir / "state",
+            task_id=None,
+            active_task_ids={current.task_id},
+            speculative=True,
+            model_escalation={},
+        )
+        head, seen = await asyncio.to_thread(_tree_digests, self.ctx.run_dir)
+        log(f"Speculating Stage 1-{self.depth} of the next task while task {current.task_id} finishes")
+        self.pending = _Speculation(
+            task=asyncio.create_task(self._speculate(spec_ctx)),
+            ctx=spec_ctx,
+            after_task_id=current.task_id,
+            head=head,
+            seen=seen,
+        )
+
+    async def adopt(self, ctx: RunContext) -> set[int]:
+        speculation, self.pending = self.pending, None
+        if speculation is None:
+            return set()
+        stages = await speculation.task
+        spec_ctx = speculation.ctx
+        try:
+            if not stages or spec_ctx.task_id == speculation.after_task_id:
+                return set()
+            changed = await asyncio.to_thread(self._changed_paths, speculation)
+            kept = stages
+            for index, stage in enumerate(stages):
+                if _references_any(stage.execution, changed):
+                    kept = stages[:index]
+                    log(
+                        f"Speculative Stage {stage.number} for task {spec_ctx.task_id} read files changed since: "
+                        f"{', '.join(sorted(changed)[:5])}; re-running from Stage {stage.number}"
+                    )
+                    break
+            if not kept:
+                return set()
+
+            task_id = spec_ctx.task_id
+            ensure_handoff_dir(ctx.handoff_dir)
+            source = handoff_path(spec_ctx.handoff_dir, task_id)
+            with source.open("rb") as fh:
+                handoff_path(ctx.handoff_dir, task_id).write_bytes(fh.read(kept[-1].handoff_size))
+            copy_stage_state(spec_ctx.state_dir, ctx.state_dir, task_id, (stage.number for stage in kept))
+            reset_completed_stages(ctx.state_dir, task_id)
+            for stage in kept:
+                mark_stage_completed(ctx.state_dir, task_id, stage.number)
+
+            ctx.task_id = task_id
+            log(f"Executing task: {task_id} (reusing speculative Stage 1-{kept[-1].number})")
+            return {stage.number for stage in kept}
+        finally:
+            _remove_speculative_dir(spec_ctx.handoff_dir.parent)
+
+    async def close(self) -> None:
+        speculation, self.pending = self.pending, None
+        if speculation is None:
+            return
+        speculation.task.cancel()
+        try:
+            await speculation.task
+        except asyncio.CancelledError:
+            pass
+        _remove_speculative_dir(speculation.ctx.handoff_dir.parent)
+
+    async def _speculate(self, ctx: RunContext) -> list[_SpeculativeStage]:
+        stages: list[_SpeculativeStage] = []
+        try:
+            first = await _run_stage(ctx, self.specs[1], self.stage_runner, run_logger=self.run_logger)
+            if first.queue_empty or first.skip or ctx.task_id is None:
+                return stages
+            handoff_file = _record_first_stage(ctx, self.run_logger, first)
+            stages.append(_SpeculativeStage(1, first, handoff_file.stat().st_size))
+            for number in range(2, self.depth + 1):
+                result = await _run_stage(
+                    ctx,
+                    self.specs[number],
+                    self.stage_runner,
+                    run_logger=self.run_logger,
+                    handoff_file=handoff_file,
+                )
+                _record_stage(ctx, self.run_logger, handoff_file, number, result)
+                stages.append(_SpeculativeStage(number, result, handoff_file.stat().st_size))
+        except Exception as exc:  # noqa: BLE001
+            log(f"Speculative Stage {len(stages) + 1} failed, will run it normally: {exc}")
+        return stages
+
+    def _changed_paths(self, speculation: _Speculation) -> set[str]:
+        snapshot = git_snapshot(self.ctx.run_dir)
+        touched = set(snapshot.changed_files()) | set(speculation.seen)
+        if speculation.head is not None and snapshot.head() != speculation.head:
+            touched.update(snapshot.changed_since(speculation.head))
+        changed: set[str] = set()
+        for path in touched:
+            if path not in speculation.seen or snapshot.file_digest(path) != speculation.seen[path]:
+                changed.add(path)
+        return changed
+
+
+def _without_subagents(spec: StageSpec) -> StageSpec:
+    # Speculative stages run beside the current task's commit; without Task they cannot reach a writing subagent.
+    if spec.allowed_tools is None:
+        return spec
+    return replace(spec, allowed_tools=[tool for tool in spec.allowed_tools if tool != "Task"])
+
+
+def _tree_digests(run_dir: Path) -> tuple[str | None, dict[str, bytes]]:
+    snapshot = git_snapshot(run_dir)
+    return snapshot.head(), {path: snapshot.file_digest(path) for path in snapshot.changed_files()}
+
+
+def _remove_speculative_dir(spec_dir: Path) -> None:
+    close_task_states(spec_dir)
+    shutil.rmtree(spec_dir, ignore_errors=True)
+
+
+def run(task_id: int | None, max_tasks: int, hint: str, dry_run: bool, verbose: bool, **options: Any) -> int:
+    return asyncio.run(run_async(task_id, max_tasks, hint, dry_run, verbose, **options))
+
+
+async def run_async(
     task_id: int | None,
     max_tasks: int,
     hint: str,
     dry_run: bool,
     verbose: bool,
     *,
+    jobs: int = 1,
+    resume: bool = False,
+    validation_jobs: int = DEFAULT_VALIDATION_JOBS,
+    command_timeout: float | None = None,
+    cache_commands: Iterable[str] = (),
+    profile: bool = False,
+    speculate: int = 0,
+    route: bool = False,
+    compact_handoff: bool = False,
+    max_cost_per_task: float | None = None,
+    max_cost_per_run: float | None = None,
+    max_tokens_per_stage: int | None = None,
+    stage_timeout: float | None = None,
+    stage_retries: int = 2,
+    retry_backoff: float = 2.0,
+    full_revalidate: bool = False,
+    session_pool: bool = False,
     stage_runner: StageRunner | None = None,
     validator: Validator | None = None,
     run_dir: Path | None = None,
+    on_event: Callable[[dict[str, Any]], None] | None = None,
+    budget: Budget | None = None,
+    populate_queue: bool = True,
+    keep_git_snapshots: bool = False,
+    store: str = "files",
 ) -> int:
     try:
         validate_hint(hint)
@@ -73,9 +293,11 @@ def run(
         return die(1, str(exc))
 
     active_run_dir = (run_dir or Path.cwd()).resolve()
+    git_snapshot(active_run_dir).mark_stale()
     kern_dir = active_run_dir / ".kern"
     run_id = _new_run_id()
-    run_logger = RunLogger(kern_dir, run_id)
+    run_store = RunStore(store_path(kern_dir)) if store == "sqlite" else None
+    run_logger = RunLogger(kern_dir, run_id, on_event=on_event, store=run_store)
     handoff_dir = kern_dir / "handoff"
     state_dir = kern_dir / "state"
     ctx = RunContext(
@@ -91,18 +313,98 @@ def run(
         run_log_file=run_logger.events_file,
         report_dir=run_logger.reports_dir,
         state_dir=state_dir,
+        jobs=jobs,
+        resume=resume,
+        profile=profile,
+        speculate=speculate,
+        router=ModelRouter.from_kern_dir(kern_dir) if route else None,
+        compact_handoff=compact_handoff,
+        budget=budget
+        or Budget(
+            max_cost_per_task=max_cost_per_task,
+            max_cost_per_run=max_cost_per_run,
+            max_tokens_per_stage=max_tokens_per_stage,
+        ),
+        stage_timeout=stage_timeout,
+        retry_policy=RetryPolicy(retries=stage_retries, base_delay=retry_backoff),
+        full_revalidate=full_revalidate,
+        populate_queue=populate_queue,
     )
 
     if stage_runner is None:
-        env = {
-            "CLAUDE_CODE_TASK_LIST_ID": _task_list_id(active_run_dir),
-            "CLAUDE_CODE_ENABLE_TASKS": "true",
-        }
-        stage_runner = ClaudeSdkRunner(env=env, verbose=verbose)
+        if dry_run:
+            stage_runner = _DryRunStageRunner()
+        else:
+            task_list_id = await asyncio.to_thread(_task_list_id, active_run_dir)
+            stage_runner = _sdk_stage_runner(task_list_id, verbose, session_pool)
     if validator is None:
-        validator = SuccessCriteriaValidator()
+        validator = (
+            _DryRunValidator()
+            if dry_run
+            else _criteria_validator(validation_jobs, command_timeout, kern_dir, list(cache_commands))
+        )
+
+    return await _run_and_close(ctx, stage_runner, validator, run_logger, keep_git_snapshots)
+
+
+class _DryRunStageRunner(StageRunner):
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        raise RuntimeError(f"Stage {stage.number} invoked during a dry run")
 
-    return asyncio.run(_run(ctx, stage_runner, validator, run_logger))
+
+class _DryRunValidator(Validator):
+    def validate(
+        self,
+        task_id: int,
+        run_dir: Path,
+        handoff_file: Path,
+        criteria: list[SuccessCriterion] | None = None,
+        previous: ValidationResult | None = None,
+    ) -> ValidationResult:
+        raise RuntimeError(f"Task {task_id} validated during a dry run")
+
+
+def _criteria_validator(
+    validation_jobs: int, command_timeout: float | None, kern_dir: Path, cache_commands: list[str]
+) -> Validator:
+    from .validation import SuccessCriteriaValidator
+    from .validation_cache import ValidationCache
+
+    cache = ValidationCache(kern_dir / "cache" / "validation", cache_commands) if cache_commands else None
+    return SuccessCriteriaValidator(max_workers=validation_jobs, command_timeout=command_timeout, cache=cache)
+
+
+def _sdk_stage_runner(task_list_id: str, verbose: bool, session_pool: bool) -> StageRunner:
+    env = {
+        "CLAUDE_CODE_TASK_LIST_ID": task_list_id,
+        "CLAUDE_CODE_ENABLE_TASKS": "true",
+    }
+    if session_pool:
+        from .session_pool import PooledSdkRunner
+
+        return PooledSdkRunner(env=env, verbose=verbose)
+    from .sdk_runner import ClaudeSdkRunner
+
+    return ClaudeSdkRunner(env=env, verbose=verbose)
+
+
+async def _run_and_close(
+    ctx: RunContext,
+    stage_runner: StageRunner,
+    validator: Validator,
+    run_logger: RunLogger,
+    keep_git_snapshots: bool = False,
+) -> int:
+    try:
+        return await _run(ctx, stage_runner, validator, run_logger)
+    finally:
+        close = getattr(stage_runner, "aclose", None)
+        if close is not None:
+            await close()
+        run_logger.close()
+        close_task_states(ctx.kern_dir)
+        if not keep_git_snapshots:
+            close_git_snapshots(ctx.run_dir)
 
 
 async def _run(ctx: RunContext, stage_runner: StageRunner, validator: Validator, run_logger: RunLogger) -> int:
@@ -117,32 +419,43 @@ async def _run(ctx: RunContext, stage_runner: StageRunner, validator: Validator,
             return 0
         except NoTaskAvailable:
             return die(1, f"Task {ctx.task_id} failed")
-        except TaskFailed as exc:
+        except (TaskFailed, TaskStateError) as exc:
             return die(1, str(exc))
 
     if ctx.dry_run:
-        _print_dry_run_queue(ctx.run_dir, ctx.max_tasks)
+        _print_dry_run_queue(ctx.run_dir, ctx.max_tasks, ctx.jobs)
         return 0
 
-    try:
-        await _run_stage(ctx, specs[0], stage_runner, run_logger=run_logger)
-    except TaskFailed as exc:
-        return die(1, f"Failed to populate task queue: {exc}")
-
-    task_count = 0
-    while True:
-        if task_count >= ctx.max_tasks:
-            log(f"Reached max tasks limit ({ctx.max_tasks})")
-            break
-        ctx.task_id = None
+    if ctx.populate_queue:
         try:
-            await _run_task(ctx, specs, stage_runner, validator, run_logger)
-            task_count += 1
-        except NoTaskAvailable:
-            break
+            await _run_stage(ctx, specs[0], stage_runner, run_logger=run_logger)
         except TaskFailed as exc:
-            current = ctx.task_id if ctx.task_id is not None else "unknown"
-            return die(1, f"Task {current} failed: {exc}")
+            return die(1, f"Failed to populate task queue: {exc}")
+
+    if ctx.jobs > 1:
+        return await _run_parallel(ctx, specs, stage_runner, validator, run_logger)
+
+    pipeline = _Pipeline(ctx, specs, stage_runner, run_logger) if ctx.speculate > 0 else None
+    task_count = 0
+    try:
+        while True:
+            if task_count >= ctx.max_tasks:
+                log(f"Reached max tasks limit ({ctx.max_tasks})")
+                break
+            ctx.task_id = None
+            if pipeline is not None:
+                pipeline.enabled = task_count + 1 < ctx.max_tasks
+            try:
+                await _run_task(ctx, specs, stage_runner, validator, run_logger, pipeline=pipeline)
+                task_count += 1
+            except NoTaskAvailable:
+                break
+            except (TaskFailed, TaskStateError) as exc:
+                current = ctx.task_id if ctx.task_id is not None else "unknown"
+                return die(1, f"Task {current} failed: {exc}")
+    finally:
+        if pipeline is not None:
+            await pipeline.close()
 
     if task_count == 0:
         log("No pending tasks in queue")
@@ -151,39 +464,158 @@ async def _run(ctx: RunContext, stage_runner: StageRunner, validator: Validator,
     return 0
 
 
+async def _run_parallel(
+    ctx: RunContext,
+    specs: dict[int, StageSpec],
+    stage_runner: StageRunner,
+    validator: Validator,
+    run_logger: RunLogger,
+) -> int:
+    pool = _JobPool(run_dir=ctx.run_dir)
+    failures: list[str] = []
+    started = 0
+    completed = 0
+    exhausted = False
+
+    async def worker() -> None:
+        nonlocal started, completed, exhausted
+        while not exhausted and not failures and started < ctx.max_tasks:
+            started += 1
+            worktree = worktrees_dir(ctx.kern_dir) / f"{ctx.run_id}-{started}"
+            try:
+                async with pool.worktrees:
+                    await asyncio.to_thread(create_worktree, ctx.run_dir, worktree)
+            except WorktreeError as exc:
+                failures.append(str(exc))
+                return
+            job_ctx = _job_context(ctx, worktree, pool.active)
+            seen = pool.completions
+            try:
+                await _run_task(job_ctx, specs, stage_runner, validator, run_logger, pool=pool)
+            except NoTaskAvailable:
+                started -= 1
+                async with pool.worktrees:
+                    await asyncio.to_thread(_discard_worktree, ctx.run_dir, worktree)
+                if pool.completions != seen:
+                    continue
+                if pool.active:
+                    # A running task may unblock a dependent one; pick again once it ends.
+                    await pool.finished.wait()
+                    continue
+                exhausted = True
+                return
+            except (TaskFailed, TaskStateError, WorktreeError) as exc:
+                current = job_ctx.task_id if job_ctx.task_id is not None else "unknown"
+                failures.append(f"Task {current} failed: {exc}")
+                log(f"Keeping worktree for inspection: {worktree}")
+                return
+            finally:
+                if job_ctx.task_id is not None:
+                    pool.active.discard(job_ctx.task_id)
+                    pool.completions += 1
+                    pool.finished.set()
+                    pool.finished.clear()
+            completed += 1
+            async with pool.worktrees:
+                await asyncio.to_thread(_discard_worktree, ctx.run_dir, worktree)
+
+    log(f"Running up to {ctx.jobs} task(s) in parallel worktrees")
+    await asyncio.gather(*(worker() for _ in range(ctx.jobs)))
+
+    if failures:
+        for failure in failures[1:]:
+            log(f"ERROR: {failure}")
+        return die(1, failures[0])
+    if completed == 0:
+        log("No pending tasks in queue")
+    else:
+        log(f"Completed {completed} task(s)")
+    return 0
+
+
+def _job_context(ctx: RunContext, worktree: Path, active_task_ids: set[int]) -> RunContext:
+    kern_dir = worktree / ".kern"
+    return replace(
+        ctx,
+        run_dir=worktree,
+        kern_dir=kern_dir,
+        handoff_dir=kern_dir / "handoff",
+        state_dir=kern_dir / "state",
+        task_id=None,
+        active_task_ids=active_task_ids,
+        spec_dir=ctx.run_dir,
+    )
+
+
+def _discard_worktree(run_dir: Path, worktree: Path) -> None:
+    close_task_states(worktree)
+    close_git_snapshots(worktree)
+    _keep_job_records(run_dir / ".kern", worktree / ".kern")
+    try:
+        remove_worktree(run_dir, worktree)
+    except WorktreeError as exc:
+        log(f"WARNING: {exc}")
+
+
+def _keep_job_records(kern_dir: Path, job_kern_dir: Path) -> None:
+    # The handoff and task state are the task's audit trail and what --resume reads; keep them past the worktree.
+    for directory, pattern in (("handoff", "task-*.md"), ("state", "task-*.json")):
+        for source in (job_kern_dir / directory).glob(pattern):
+            target = kern_dir / directory / source.name
+            close_task_states(target)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, target)
+
+
 async def _run_task(
     ctx: RunContext,
     specs: dict[int, StageSpec],
     stage_runner: StageRunner,
     validator: Validator,
     run_logger: RunLogger,
+    *,
+    pool: _JobPool | None = None,
+    pipeline: _Pipeline | None = None,
 ) -> None:
     if ctx.dry_run:
         for number in range(1, 7):
             await _run_stage(ctx, specs[number], stage_runner, run_logger=run_logger)
         return
 
-    if ctx.task_id is None:
-        log("Selecting next task...")
-
-    first = await _run_stage(ctx, specs[1], stage_runner, run_logger=run_logger)
-    if first.queue_empty or ctx.task_id is None:
-        log("No more tasks in queue")
-        raise NoTaskAvailable
-
-    ensure_handoff_dir(ctx.handoff_dir)
-    ensure_state_dir(ctx.state_dir)
-    handoff_file = handoff_path(ctx.handoff_dir, ctx.task_id)
-    init_handoff_file(handoff_file, ctx.task_id, ctx.hint, ctx.run_dir)
-    append_handoff_block(handoff_file, first.handoff_block, required=True)
-    update_task_state_from_machine(ctx.state_dir, ctx.task_id, first.machine)
-
-    log(f"Executing task: {ctx.task_id}")
-    if first.skip:
-        log(f"Task {ctx.task_id} already complete, skipping implementation")
-        return
+    ctx.model_escalation = {}
+    completed = _resumable_stages(ctx)
+    if not completed and pipeline is not None:
+        completed = await pipeline.adopt(ctx)
+    if 1 in completed:
+        if ctx.resume:
+            log(f"Resuming task {ctx.task_id}: skipping completed stage(s) {', '.join(map(str, sorted(completed)))}")
+        handoff_file = handoff_path(ctx.handoff_dir, ctx.task_id)
+    else:
+        if ctx.task_id is None:
+            log("Selecting next task...")
+
+        async with pool.selection if pool is not None else nullcontext():
+            first = await _run_stage(ctx, specs[1], stage_runner, run_logger=run_logger)
+            if first.queue_empty or ctx.task_id is None:
+                log("No more tasks in queue")
+                raise NoTaskAvailable
+            if pool is not None:
+                if ctx.task_id in pool.active:
+                    log(f"Task {ctx.task_id} is already running in another worktree")
+                    ctx.task_id = None
+                    raise NoTaskAvailable
+                pool.active.add(ctx.task_id)
+
+        handoff_file = _record_first_stage(ctx, run_logger, first)
+
+        log(f"Executing task: {ctx.task_id}")
+        if first.skip:
+            log(f"Task {ctx.task_id} already complete, skipping implementation")
+            return
 
     for stage_number in (2, 3, 4):
+        if stage_number in completed:
+            continue
         result = await _run_stage(
             ctx,
             specs[stage_number],
@@ -191,9 +623,90 @@ async def _run_task(
             run_logger=run_logger,
             handoff_file=handoff_file,
         )
+        _record_stage(ctx, run_logger, handoff_file, stage_number, result)
+
+    if 5 not in completed:
+        await _implement_and_validate(ctx, specs, stage_runner, validator, run_logger, handoff_file, pipeline)
+        mark_stage_completed(ctx.state_dir, ctx.task_id, 5)
+
+    if 6 in completed:
+        log(f"Task {ctx.task_id} already committed")
+    elif await asyncio.to_thread(_git_has_changes, ctx.run_dir):
+        async with pool.commit if pool is not None else nullcontext():
+            commit_result = await _run_stage(
+                ctx,
+                specs[6],
+                stage_runner,
+                run_logger=run_logger,
+                handoff_file=handoff_file,
+            )
+            with _phase(ctx, run_logger, 6, "handoff_write"):
+                append_handoff_block(handoff_file, commit_result.handoff_block, required=False)
+            if pool is not None:
+                with _phase(ctx, run_logger, 6, "integrate"):
+                    head = await asyncio.to_thread(integrate_worktree, pool.run_dir, ctx.run_dir, (SPEC_FILE,))
+                git_snapshot(pool.run_dir).mark_stale()
+                debug(ctx.verbose, f"Integrated task {ctx.task_id} at {head[:12]}")
+        mark_stage_completed(ctx.state_dir, ctx.task_id, 6)
+    else:
+        log("No changes to commit")
+        mark_stage_completed(ctx.state_dir, ctx.task_id, 6)
+
+    log(f"Task {ctx.task_id} completed")
+
+
+def _record_first_stage(ctx: RunContext, run_logger: RunLogger, first: StageExecution) -> Path:
+    with _phase(ctx, run_logger, 1, "handoff_write"):
+        ensure_handoff_dir(ctx.handoff_dir)
+        handoff_file = handoff_path(ctx.handoff_dir, ctx.task_id)
+        init_handoff_file(handoff_file, ctx.task_id, ctx.hint, ctx.run_dir)
+        append_handoff_block(handoff_file, first.handoff_block, required=True)
+        update_task_state_from_machine(ctx.state_dir, ctx.task_id, first.machine)
+        reset_completed_stages(ctx.state_dir, ctx.task_id)
+        mark_stage_completed(ctx.state_dir, ctx.task_id, 1)
+    return handoff_file
+
+
+def _record_stage(
+    ctx: RunContext,
+    run_logger: RunLogger,
+    handoff_file: Path,
+    stage_number: int,
+    result: StageExecution,
+) -> None:
+    with _phase(ctx, run_logger, stage_number, "handoff_write"):
         append_handoff_block(handoff_file, result.handoff_block, required=True)
         update_task_state_from_machine(ctx.state_dir, ctx.task_id, result.machine)
+        mark_stage_completed(ctx.state_dir, ctx.task_id, stage_number)
+
+
+def _references_any(execution: StageExecution, paths: set[str]) -> bool:
+    planned = set(execution.machine.planned_files or []) if execution.machine else set()
+    return any(path in planned or path in execution.raw_output for path in paths)
 
+
+def _resumable_stages(ctx: RunContext) -> set[int]:
+    if not ctx.resume or ctx.task_id is None:
+        return set()
+    completed = load_completed_stages(ctx.state_dir, ctx.task_id)
+    if not completed:
+        log(f"No checkpoint for task {ctx.task_id}, starting from Stage 1")
+        return set()
+    if not handoff_path(ctx.handoff_dir, ctx.task_id).exists():
+        log(f"Handoff for task {ctx.task_id} is missing, starting from Stage 1")
+        return set()
+    return completed
+
+
+async def _implement_and_validate(
+    ctx: RunContext,
+    specs: dict[int, StageSpec],
+    stage_runner: StageRunner,
+    validator: Validator,
+    run_logger: RunLogger,
+    handoff_file: Path,
+    pipeline: _Pipeline | None = None,
+) -> None:
     criteria = load_success_criteria(ctx.state_dir, ctx.task_id)
     if not criteria:
         raise TaskFailed("Stage 4 must provide normalized criteria in machine block")
@@ -206,10 +719,13 @@ async def _run_task(
         run_logger=run_logger,
         handoff_file=handoff_file,
     )
-    append_handoff_block(handoff_file, implement_result.handoff_block, required=True)
-    update_task_state_from_machine(ctx.state_dir, ctx.task_id, implement_result.machine)
+    with _phase(ctx, run_logger, 5, "handoff_write"):
+        append_handoff_block(handoff_file, implement_result.handoff_block, required=True)
+        update_task_state_from_machine(ctx.state_dir, ctx.task_id, implement_result.machine)
+    if pipeline is not None:
+        await pipeline.start(ctx)
 
-    evaluation, validation_result = _validate_and_evaluate(
+    evaluation, validation_result = await _validate_and_evaluate(
         ctx=ctx,
         task_id=ctx.task_id,
         attempt=1,
@@ -224,6 +740,8 @@ async def _run_task(
         if ctx.max_fix_attempts < 1:
             raise TaskFailed("Validation failed and fix attempts are disabled")
         append_fix_context(handoff_file, validation_result)
+        if ctx.router is not None:
+            ctx.model_escalation[5] = ctx.model_escalation.get(5, 0) + 1
         fix_hint = _build_fix_hint(ctx.hint, validation_result, evaluation)
         retry_result = await _run_stage(
             ctx,
@@ -233,10 +751,11 @@ async def _run_task(
             handoff_file=handoff_file,
             hint_override=fix_hint,
         )
-        append_handoff_block(handoff_file, retry_result.handoff_block, required=True)
-        update_task_state_from_machine(ctx.state_dir, ctx.task_id, retry_result.machine)
+        with _phase(ctx, run_logger, 5, "handoff_write"):
+            append_handoff_block(handoff_file, retry_result.handoff_block, required=True)
+            update_task_state_from_machine(ctx.state_dir, ctx.task_id, retry_result.machine)
 
-        evaluation, validation_result = _validate_and_evaluate(
+        evaluation, validation_result = await _validate_and_evaluate(
             ctx=ctx,
             task_id=ctx.task_id,
             attempt=2,
@@ -245,28 +764,15 @@ async def _run_task(
             run_logger=run_logger,
             criteria=criteria,
             planned_files=planned_files,
+            previous=None if ctx.full_revalidate else validation_result,
         )
         if not evaluation.passed_soft_gate:
             raise TaskFailed(
                 f"Validation failed after 1 fix attempt: {', '.join(evaluation.critical_failures) or 'unknown error'}"
             )
 
-    if _git_has_changes(ctx.run_dir):
-        commit_result = await _run_stage(
-            ctx,
-            specs[6],
-            stage_runner,
-            run_logger=run_logger,
-            handoff_file=handoff_file,
-        )
-        append_handoff_block(handoff_file, commit_result.handoff_block, required=False)
-    else:
-        log("No changes to commit")
-
-    log(f"Task {ctx.task_id} completed")
-
 
-def _validate_and_evaluate(
+async def _validate_and_evaluate(
     *,
     ctx: RunContext,
     task_id: int,
@@ -276,16 +782,30 @@ def _validate_and_evaluate(
     run_logger: RunLogger,
     criteria: list[SuccessCriterion],
     planned_files: list[str],
+    previous: ValidationResult | None = None,
 ) -> tuple[IterationEvaluation, ValidationResult]:
-    validation = validator.validate(task_id, ctx.run_dir, handoff_file, criteria=criteria)
+    options: dict[str, Any] = {"criteria": criteria}
+    if previous is not None and _accepts_previous(validator):
+        options["previous"] = previous
+    with _phase(ctx, run_logger, 5, "validation"):
+        validation = await asyncio.to_thread(validator.validate, task_id, ctx.run_dir, handoff_file, **options)
+    reused = sum(1 for check in validation.checks if check.reused)
+    if reused:
+        log(f"Validation attempt {attempt}: reused {reused} of {len(validation.checks)} passing check(s)")
+    cached = sum(1 for check in validation.checks if check.cached)
+    if cached:
+        log(f"Validation attempt {attempt}: {cached} command(s) served from the validation cache, not re-run")
+    if ctx.profile:
+        run_logger.log_validation_checks(task_id=task_id, attempt=attempt, validation=validation)
     append_validation_result(handoff_file, validation, attempt=attempt)
 
     previous_score = run_logger.previous_score(task_id)
+    changed_files = await asyncio.to_thread(_git_changed_files, ctx.run_dir)
     evaluation = evaluate_iteration(
         task_id=task_id,
         attempt=attempt,
         validation=validation,
-        changed_files=_git_changed_files(ctx.run_dir),
+        changed_files=changed_files,
         planned_files=planned_files,
         contract_failures=[],
         previous_score=previous_score,
@@ -295,6 +815,16 @@ def _validate_and_evaluate(
     return evaluation, validation
 
 
+def _accepts_previous(validator: Validator) -> bool:
+    try:
+        parameters = inspect.signature(validator.validate).parameters
+    except (TypeError, ValueError):
+        return False
+    return "previous" in parameters or any(
+        parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()
+    )
+
+
 async def _run_stage(
     ctx: RunContext,
     stage_spec: StageSpec,
@@ -303,28 +833,112 @@ async def _run_stage(
     run_logger: RunLogger,
     handoff_file: Path | None = None,
     hint_override: str | None = None,
+    attempt: int = 1,
 ) -> StageExecution:
     log(f"Stage {stage_spec.number}: {stage_spec.name}")
 
+    render_started = time.monotonic()
     template = parse_prompt_template(stage_spec.prompt_path)
-    model = template.model or stage_spec.default_model
+    configured_model = template.model or stage_spec.default_model
+    model = _routed_model(ctx, stage_spec.number, configured_model)
     if ctx.dry_run:
         log(f"[DRY-RUN] Would run: claude --model {model}")
         return StageExecution(raw_output="", success=True, task_id=ctx.task_id, skip=False)
 
-    prompt = render_prompt(
-        template.body,
-        _substitutions(
-            run_dir=ctx.run_dir,
-            task_id=ctx.task_id,
-            hint=hint_override if hint_override is not None else ctx.hint,
-            handoff_file=handoff_file,
-        ),
-    )
+    prompt_handoff_file = handoff_file
+    handoff_extra: dict[str, object] = {}
+    if ctx.compact_handoff and handoff_file is not None and handoff_file.exists() and ctx.task_id is not None:
+        prompt_handoff_file = handoff_view_path(ctx.handoff_dir, ctx.task_id, stage_spec.number)
+        full_bytes, view_bytes = write_handoff_view(
+            handoff_file,
+            prompt_handoff_file,
+            stage_spec.number,
+            task_state(ctx.state_dir, ctx.task_id).payload,
+        )
+        handoff_extra = {
+            "handoff_bytes": full_bytes,
+            "handoff_view_bytes": view_bytes,
+            "handoff_bytes_saved": max(0, full_bytes - view_bytes),
+        }
+        debug(ctx.verbose, f"Stage {stage_spec.number} handoff view: {view_bytes} of {full_bytes} bytes")
 
+    substitutions = await asyncio.to_thread(
+        _substitutions,
+        run_dir=ctx.run_dir,
+        spec_dir=ctx.spec_dir or ctx.run_dir,
+        task_id=ctx.task_id,
+        hint=hint_override if hint_override is not None else ctx.hint,
+        handoff_file=prompt_handoff_file,
+        active_task_ids=ctx.active_task_ids,
+    )
+    prompt = render_prompt(template.body, substitutions)
+
+    render_ended = time.monotonic()
+
+    meter = None
+    if ctx.budget is not None:
+        exhausted = ctx.budget.exhausted(ctx.task_id)
+        if exhausted is not None:
+            raise TaskFailed(f"Stage {stage_spec.number} not started: {exhausted}")
+        meter = ctx.budget.meter(ctx.task_id, model, template.max_tokens)
+    timeout = template.timeout_seconds or stage_spec.timeout_seconds or ctx.stage_timeout
+    tree_before: str | None = None
+    if timeout is not None and not is_read_only(stage_spec):
+        tree_before = await asyncio.to_thread(git_snapshot(ctx.run_dir).tree_hash)
     started = datetime.now(timezone.utc)
-    execution = await stage_runner.run_stage(stage_spec, prompt, ctx.run_dir, model)
+    monotonic_start = time.monotonic()
+    try:
+        with metered(meter):
+            execution = await asyncio.wait_for(
+                stage_runner.run_stage(stage_spec, prompt, ctx.run_dir, model),
+                timeout,
+            )
+    except asyncio.TimeoutError:
+        execution = StageExecution(
+            raw_output="",
+            success=False,
+            task_id=None,
+            skip=False,
+            error=f"Stage {stage_spec.number} timed out after {timeout:g}s",
+            failure_kind="timeout",
+        )
+    finally:
+        git_snapshot(ctx.run_dir).mark_stale()
+    if ctx.budget is not None:
+        charged_task_id = ctx.task_id if ctx.task_id is not None else execution.task_id
+        ctx.budget.charge(charged_task_id, execution.total_cost_usd)
     ended = datetime.now(timezone.utc)
+    monotonic_end = time.monotonic()
+    extra: dict[str, object] = dict(handoff_extra)
+    if ctx.speculative:
+        extra["speculative"] = True
+    if model != configured_model:
+        extra["routed_from"] = configured_model
+    if execution.session is not None:
+        extra["session"] = execution.session
+    if "startup_ms" in execution.timings:
+        extra["startup_ms"] = round(execution.timings["startup_ms"], 3)
+    retry_delay: float | None = None
+    # A timed-out stage that changed the tree may have left a half-applied change; re-running it on top is unsafe.
+    retryable = execution.failure_kind != "timeout" or is_read_only(stage_spec)
+    if not retryable and tree_before is not None:
+        retryable = await asyncio.to_thread(git_snapshot(ctx.run_dir).tree_hash) == tree_before
+    if (
+        not execution.success
+        and retryable
+        and ctx.retry_policy is not None
+        and ctx.retry_policy.should_retry(execution.failure_kind, attempt)
+    ):
+        retry_delay = ctx.retry_policy.delay(attempt)
+        extra["retry_in_ms"] = round(retry_delay * 1000)
+    if attempt > 1:
+        extra["attempt"] = attempt
+    if ctx.profile:
+        extra["profile"] = {
+            "render_ms": round((render_ended - render_started) * 1000, 3),
+            "model_ms": round((monotonic_end - monotonic_start) * 1000, 3),
+            **{key: round(value, 3) for key, value in execution.timings.items()},
+        }
     event_task_id = execution.task_id if execution.task_id is not None else ctx.task_id
     run_logger.log_stage_event(
         task_id=event_task_id,
@@ -334,9 +948,39 @@ async def _run_stage(
         ended_at=ended.strftime("%Y-%m-%dT%H:%M:%SZ"),
         duration_ms=max(0, int((ended - started).total_seconds() * 1000)),
         execution=execution,
+        monotonic_start=monotonic_start,
+        monotonic_end=monotonic_end,
+        extra=extra,
     )
-
     if not execution.success:
+        if retry_delay is not None:
+            log(f"Stage {stage_spec.number} attempt {attempt} failed ({execution.error}), retrying in {retry_delay:.1f}s")
+            await asyncio.sleep(retry_delay)
+            return await _run_stage(
+                ctx,
+                stage_spec,
+                stage_runner,
+                run_logger=run_logger,
+                handoff_file=handoff_file,
+                hint_override=hint_override,
+                attempt=attempt + 1,
+            )
+        if (
+            ctx.router is not None
+            and execution.failure_kind is None
+            and stage_spec.number in ROUTED_STAGES
+            and ctx.router.can_escalate(model, configured_model)
+        ):
+            ctx.model_escalation[stage_spec.number] = ctx.model_escalation.get(stage_spec.number, 0) + 1
+            log(f"Stage {stage_spec.number} failed on {model}, escalating: {execution.error or 'contract failure'}")
+            return await _run_stage(
+                ctx,
+                stage_spec,
+                stage_runner,
+                run_logger=run_logger,
+                handoff_file=handoff_file,
+                hint_override=hint_override,
+            )
         if execution.error:
             raise TaskFailed(execution.error)
         raise TaskFailed(execution.raw_output)
@@ -361,91 +1005,106 @@ async def _run_stage(
     return execution
 
 
-def _substitutions(run_dir: Path, task_id: int | None, hint: str, handoff_file: Path | None) -> dict[str, str]:
+def _routed_model(ctx: RunContext, stage_number: int, configured_model: str) -> str:
+    if ctx.router is None or stage_number not in ROUTED_STAGES or ctx.task_id is None:
+        return configured_model
+    metadata = task_state(ctx.state_dir, ctx.task_id).payload.get("stage_metadata", {})
+    size = task_size(metadata.get("1") if isinstance(metadata, dict) else None)
+    model = ctx.router.choose(stage_number, configured_model, size, ctx.model_escalation.get(stage_number, 0))
+    if model != configured_model:
+        debug(ctx.verbose, f"Stage {stage_number}: routed {configured_model} -> {model}")
+    return model
+
+
+@contextmanager
+def _phase(ctx: RunContext, run_logger: RunLogger, stage_number: int, name: str) -> Iterator[None]:
+    if not ctx.profile:
+        yield
+        return
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        run_logger.log_phase(
+            task_id=ctx.task_id,
+            stage_number=stage_number,
+            phase=name,
+            monotonic_start=started,
+            monotonic_end=time.monotonic(),
+        )
+
+
+def _substitutions(
+    run_dir: Path,
+    task_id: int | None,
+    hint: str,
+    handoff_file: Path | None,
+    active_task_ids: Iterable[int] = (),
+    spec_dir: Path | None = None,
+) -> dict[str, str]:
+    active = ", ".join(str(item) for item in sorted(active_task_ids))
     return {
         "TASK_ID": "" if task_id is None else str(task_id),
+        "ACTIVE_TASKS": active or "none",
         "HINT": wrap_untrusted("hint", hint),
         "DIFF": collect_diff_stat(run_dir),
         "RECENT_COMMITS": collect_recent_commits(run_dir),
         "SPEC_FILE": SPEC_FILE,
+        "READY_SPEC_LINES": _ready_spec_lines(spec_dir or run_dir) if task_id is None else "any",
         "HANDOFF_FILE": "" if handoff_file is None else str(handoff_file),
     }
 
 
 def _task_list_id(run_dir: Path) -> str:
-    return f"{_git_project_id(run_dir)}-{_git_branch_safe(run_dir)}"
-
-
-def _git_project_id(run_dir: Path) -> str:
-    completed = subprocess.run(
-        ["git", "rev-parse", "--show-toplevel"],
-        cwd=run_dir,
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    if completed.returncode == 0 and completed.stdout.strip():
-        return Path(completed.stdout.strip()).name
-    return run_dir.name
-
-
-def _git_branch_safe(run_dir: Path) -> str:
-    completed = subprocess.run(
-        ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-        cwd=run_dir,
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    if completed.returncode != 0:
-        return "unknown"
-    return completed.stdout.strip().replace("/", "-") or "unknown"
+    snapshot = git_snapshot(run_dir)
+    branch = (snapshot.branch() or "unknown").replace("/", "-")
+    return f"{snapshot.root().name}-{branch}"
 
 
 def _git_has_changes(run_dir: Path) -> bool:
-    diff = subprocess.run(["git", "diff", "--quiet"], cwd=run_dir, check=False)
-    cached = subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=run_dir, check=False)
-    return diff.returncode != 0 or cached.returncode != 0
+    return git_snapshot(run_dir).has_changes()
 
 
 def _git_changed_files(run_dir: Path) -> list[str]:
-    names: list[str] = []
-    for command in (["git", "diff", "--name-only"], ["git", "diff", "--cached", "--name-only"]):
-        completed = subprocess.run(
-            command,
-            cwd=run_dir,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        if completed.returncode == 0:
-            names.extend(line.strip() for line in completed.stdout.splitlines() if line.strip())
-    deduped: list[str] = []
-    seen: set[str] = set()
-    for name in names:
-        if name in seen:
-            continue
-        seen.add(name)
-        deduped.append(name)
-    return deduped
-
+    return git_snapshot(run_dir).changed_files()
 
-def _extract_tasks(spec_file: Path) -> Iterable[tuple[int, str, str]]:
-    pattern = re.compile(r"^\s*-\s\[(~| )\]\s(.*)$")
-    for index, line in enumerate(spec_file.read_text(encoding="utf-8").splitlines(), start=1):
-        match = pattern.match(line)
-        if match:
-            yield index, match.group(1), match.group(2)
 
-
-def _print_dry_run_queue(run_dir: Path, max_tasks: int) -> None:
+def _print_dry_run_queue(run_dir: Path, max_tasks: int, workers: int = 1) -> None:
     log(f"[DRY-RUN] Would process up to {max_tasks} tasks from {SPEC_FILE}:")
     spec_path = run_dir / SPEC_FILE
     if not spec_path.exists():
         log(f"  - Missing {SPEC_FILE}")
         return
-    for line_no, _, desc in list(_extract_tasks(spec_path))[:max_tasks]:
-        log(f"  - Line {line_no}: {desc}")
+    try:
+        tasks = load_spec_tasks(spec_path)
+    except SpecGraphError as exc:
+        log(f"  - Invalid {SPEC_FILE}: {exc}")
+        return
+    schedule = project_schedule(tasks, workers, limit=max_tasks)
+    for item in schedule:
+        task = item.task
+        after = f" after {', '.join(map(str, task.after))}" if task.after else ""
+        log(
+            f"  - #{task.number} line {task.line} [{item.start:g}-{item.end:g}] "
+            f"priority {item.priority:g}{after}: {task.description}"
+        )
+    blocked = sum(not task.done for task in tasks) - len(schedule)
+    if blocked > 0:
+        log(f"  - {blocked} more pending task(s) beyond this run")
+    path = critical_path(tasks)
+    chain = " -> ".join(f"#{task.number}" for task in path) or "none"
+    log(
+        f"[DRY-RUN] Projected makespan: {makespan(schedule):g} size units on {workers} worker(s); "
+        f"critical path {sum(task.size for task in path):g} ({chain})"
+    )
+
+
+def _ready_spec_lines(run_dir: Path) -> str:
+    try:
+        tasks = load_spec_tasks(run_dir / SPEC_FILE)
+    except (OSError, SpecGraphError):
+        return "any"
+    return ", ".join(str(task.line) for task in ready_tasks(tasks)) or "none"
 
 
 def _build_fix_hint(base_hint: str, validation: ValidationResult, evaluation: IterationEvaluation) -> str:
@@ -467,20 +1126,29 @@ def _new_run_id() -> str:
 
 
 def _resolve_kern_home(run_dir: Path) -> Path:
+    return _probe_kern_home(
+        run_dir,
+        os.environ.get("KERN_HOME"),
+        sys.argv[0],
+        os.environ.get("XDG_DATA_HOME"),
+    )
+
+
+@lru_cache(maxsize=8)
+def _probe_kern_home(run_dir: Path, env_home: str | None, argv0_text: str, xdg_data_home: str | None) -> Path:
     candidates: list[Path] = []
-    env_home = os.environ.get("KERN_HOME")
     if env_home:
         candidates.append(Path(env_home).expanduser())
     candidates.append(run_dir)
     candidates.append(Path(__file__).resolve().parents[2])
 
-    argv0 = Path(sys.argv[0]).expanduser()
+    argv0 = Path(argv0_text).expanduser()
     if argv0.exists():
         resolved = argv0.resolve()
         if len(resolved.parents) >= 3:
             candidates.append(resolved.parents[2])
 
-    data_home = Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share")) / "kern"
+    data_home = Path(xdg_data_home or Path.home() / ".local" / "share") / "kern"
     candidates.append(data_home)
 
     for candidate in candidates:
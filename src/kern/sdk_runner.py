@@ -1,12 +1,29 @@
 from __future__ import annotations
 
 from pathlib import Path
+import time
+from typing import AsyncIterator
 
-from claude_code_sdk import AssistantMessage, ClaudeCodeOptions, ResultMessage, query
+import anyio
+from claude_code_sdk import (
+    AssistantMessage,
+    ClaudeCodeOptions,
+    ClaudeSDKError,
+    Message,
+    ResultMessage,
+    ToolUseBlock,
+    query,
+)
+from claude_code_sdk.types import StreamEvent
 
-from .stage_output import parse_stage_output
+from .budget import StageMeter, active_meter
+from .logging import debug, log
+from .retry import is_transient
+from .stage_output import StageStreamParser, parse_stage_output
 from .types import StageExecution, StageRunner, StageSpec
 
+CLOSE_TIMEOUT_SECONDS = 10.0
+
 
 class ClaudeSdkRunner(StageRunner):
     def __init__(self, env: dict[str, str], verbose: bool = False) -> None:
@@ -14,6 +31,12 @@ class ClaudeSdkRunner(StageRunner):
         self._verbose = verbose
 
     async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        meter = active_meter()
+        options = self._options(stage, cwd, model, meter)
+        started = time.monotonic()
+        return await self._collect(stage, query(prompt=prompt, options=options), meter, started)
+
+    def _options(self, stage: StageSpec, cwd: Path, model: str, meter: StageMeter | None) -> ClaudeCodeOptions:
         kwargs: dict[str, object] = {
             "model": model,
             "cwd": str(cwd),
@@ -23,41 +46,131 @@ class ClaudeSdkRunner(StageRunner):
             kwargs["allowed_tools"] = stage.allowed_tools
         if stage.permission_mode != "default":
             kwargs["permission_mode"] = stage.permission_mode
-        options = ClaudeCodeOptions(**kwargs)
+        if meter is not None:
+            kwargs["include_partial_messages"] = True
+        return ClaudeCodeOptions(**kwargs)
 
+    async def _collect(
+        self,
+        stage: StageSpec,
+        stream: AsyncIterator[Message],
+        meter: StageMeter | None,
+        started: float,
+    ) -> StageExecution:
         result_text: str | None = None
         assistant_texts: list[str] = []
         result_usage: dict[str, object] | None = None
         total_cost_usd: float | None = None
         result_error: bool = False
         result_subtype: str | None = None
-        async for message in query(prompt=prompt, options=options):
-            if isinstance(message, ResultMessage) and message.result:
-                result_text = message.result
-                result_usage = message.usage
-                total_cost_usd = message.total_cost_usd
-                result_error = message.is_error
-                result_subtype = message.subtype
-                continue
-            if isinstance(message, ResultMessage):
-                result_usage = message.usage
-                total_cost_usd = message.total_cost_usd
-                result_error = message.is_error
-                result_subtype = message.subtype
-                continue
-            if isinstance(message, AssistantMessage):
-                for block in message.content:
-                    text = getattr(block, "text", None)
-                    if text:
-                        assistant_texts.append(text)
+        stream_parser = StageStreamParser(stage.number)
+        first_message: float | None = None
+        first_token: float | None = None
+        sdk_error: ClaudeSDKError | None = None
+        try:
+            async for message in stream:
+                if first_message is None:
+                    first_message = time.monotonic()
+                if isinstance(message, StreamEvent):
+                    if meter is not None and meter.observe(message.event) is not None:
+                        debug(self._verbose, f"Stage {stage.number} cancelled: {meter.exceeded}")
+                        break
+                    continue
+                if isinstance(message, ResultMessage) and message.result:
+                    result_text = message.result
+                    result_usage = message.usage
+                    total_cost_usd = message.total_cost_usd
+                    result_error = message.is_error
+                    result_subtype = message.subtype
+                    continue
+                if isinstance(message, ResultMessage):
+                    result_usage = message.usage
+                    total_cost_usd = message.total_cost_usd
+                    result_error = message.is_error
+                    result_subtype = message.subtype
+                    continue
+                if isinstance(message, AssistantMessage):
+                    for block in message.content:
+                        if isinstance(block, ToolUseBlock):
+                            debug(self._verbose, f"Stage {stage.number} tool: {block.name}")
+                            continue
+                        text = getattr(block, "text", None)
+                        if text:
+                            if first_token is None:
+                                first_token = time.monotonic()
+                            assistant_texts.append(text)
+                            self._progress(stage, text)
+                            stream_parser.feed(text)
+                    if stream_parser.failure is not None:
+                        debug(self._verbose, f"Stage {stage.number} aborting: {stream_parser.failure}")
+                        break
+        except ClaudeSDKError as exc:
+            sdk_error = exc
+        finally:
+            # Must close in this task: the SDK stream holds an anyio task group entered here. A cancel
+            # scope bounds the wait without moving it to another task, as asyncio.wait_for would.
+            with anyio.move_on_after(CLOSE_TIMEOUT_SECONDS) as close_scope:
+                await stream.aclose()
+            if close_scope.cancelled_caught:
+                log(f"Stage {stage.number}: Claude CLI did not exit within {CLOSE_TIMEOUT_SECONDS:g}s of closing")
+        finished = time.monotonic()
+        timings = {"model_ms": (finished - started) * 1000}
+        if first_message is not None:
+            timings["startup_ms"] = (first_message - started) * 1000
+        if first_token is not None:
+            timings["first_token_ms"] = (first_token - started) * 1000
+
+        if meter is not None and meter.exceeded is not None:
+            return StageExecution(
+                raw_output="\n".join(assistant_texts).strip(),
+                success=False,
+                task_id=None,
+                skip=False,
+                error=f"Stage {stage.number} cancelled: {meter.exceeded}",
+                usage=dict(meter.usage()),
+                total_cost_usd=meter.cost_usd(),
+                timings=timings,
+                failure_kind="budget",
+            )
+
+        if sdk_error is not None:
+            return StageExecution(
+                raw_output="\n".join(assistant_texts).strip(),
+                success=False,
+                task_id=None,
+                skip=False,
+                error=f"SDK error: {sdk_error}",
+                usage=result_usage,
+                total_cost_usd=total_cost_usd,
+                timings=timings,
+                failure_kind="transient" if is_transient(str(sdk_error)) else "sdk_error",
+            )
+
+        if stream_parser.failure is not None:
+            aborted = stream_parser.aborted()
+            aborted.usage = result_usage
+            aborted.total_cost_usd = total_cost_usd
+            aborted.timings = timings
+            return aborted
 
         raw_output = (result_text or "\n".join(assistant_texts)).strip()
         if not raw_output:
             raw_output = "FAILED: empty stage output"
         parsed = parse_stage_output(raw_output, stage.number)
-        if result_error and parsed.success:
-            parsed.success = False
-            parsed.error = f"SDK returned error subtype={result_subtype or 'unknown'}"
+        timings["parse_ms"] = (time.monotonic() - finished) * 1000
+        if result_error:
+            if parsed.success:
+                parsed.success = False
+                parsed.error = f"SDK returned error subtype={result_subtype or 'unknown'}"
+            parsed.failure_kind = "transient" if is_transient(f"{result_subtype} {result_text}") else "sdk_error"
         parsed.usage = result_usage
         parsed.total_cost_usd = total_cost_usd
+        parsed.timings = timings
         return parsed
+
+    def _progress(self, stage: StageSpec, text: str) -> None:
+        if not self._verbose:
+            return
+        for line in text.strip().splitlines()[:3]:
+            if line.strip():
+                debug(True, f"Stage {stage.number} > {line.strip()[:160]}")
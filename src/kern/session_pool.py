@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from dataclasses import dataclass, field
+from pathlib import Path
+import time
+from typing import Any, AsyncIterator, Callable, Hashable
+
+from claude_code_sdk import ClaudeCodeOptions, ClaudeSDKClient, ClaudeSDKError, Message
+
+from .budget import active_meter
+from .logging import debug
+from .sdk_runner import ClaudeSdkRunner
+from .types import StageExecution, StageSpec
+
+RESET_PROMPT = "/clear"
+RESET_TIMEOUT_SECONDS = 15.0
+MAX_SESSION_USES = 25
+
+_DONE = object()
+
+
+def session_key(options: ClaudeCodeOptions) -> Hashable:
+    return (
+        str(options.cwd),
+        options.model,
+        tuple(options.allowed_tools),
+        options.permission_mode,
+        options.include_partial_messages,
+    )
+
+
+@dataclass
+class _Turn:
+    prompt: str
+    reset: bool
+    messages: asyncio.Queue[Any] = field(default_factory=asyncio.Queue)
+
+
+class _Session:
+    def __init__(self, client: Any) -> None:
+        self.uses = 0
+        self.broken = False
+        self._turns: asyncio.Queue[_Turn | None] = asyncio.Queue()
+        self._task = asyncio.create_task(self._serve(client))
+
+    async def stream(self, prompt: str) -> AsyncIterator[Message]:
+        turn = _Turn(prompt=prompt, reset=self.uses > 0)
+        self.uses += 1
+        self._turns.put_nowait(turn)
+        finished = False
+        try:
+            while True:
+                item = await turn.messages.get()
+                if item is _DONE:
+                    finished = True
+                    return
+                if isinstance(item, BaseException):
+                    finished = True
+                    raise item
+                yield item
+        finally:
+            if not finished:
+                # The CLI is mid-response; a half-consumed conversation cannot be reused.
+                self.broken = True
+                self._task.cancel()
+
+    async def close(self) -> None:
+        self._turns.put_nowait(None)
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _serve(self, client: Any) -> None:
+        # The client is connected, used and disconnected in this task only, as its anyio scopes require.
+        failure: ClaudeSDKError | None = None
+        try:
+            await client.connect()
+            while not self.broken:
+                turn = await self._turns.get()
+                if turn is None:
+                    break
+                await self._play(client, turn)
+        except Exception as exc:  # noqa: BLE001
+            self.broken = True
+            failure = _sdk_error(exc)
+        finally:
+            with suppress(Exception):
+                await client.disconnect()
+            while not self._turns.empty():
+                turn = self._turns.get_nowait()
+                if turn is not None:
+                    turn.messages.put_nowait(failure or ClaudeSDKError("session closed"))
+                    turn.messages.put_nowait(_DONE)
+
+    async def _play(self, client: Any, turn: _Turn) -> None:
+        try:
+            if turn.reset:
+                await asyncio.wait_for(self._drain(client, RESET_PROMPT), RESET_TIMEOUT_SECONDS)
+            await client.query(turn.prompt)
+            async for message in client.receive_response():
+                turn.messages.put_nowait(message)
+        except Exception as exc:  # noqa: BLE001
+            self.broken = True
+            turn.messages.put_nowait(_sdk_error(exc))
+        finally:
+            turn.messages.put_nowait(_DONE)
+
+    @staticmethod
+    async def _drain(client: Any, prompt: str) -> None:
+        await client.query(prompt)
+        async for _ in client.receive_response():
+            pass
+
+
+def _sdk_error(exc: Exception) -> ClaudeSDKError:
+    return exc if isinstance(exc, ClaudeSDKError) else ClaudeSDKError(f"session failed: {exc}")
+
+
+class SessionPool:
+    def __init__(self, client_factory: Callable[[ClaudeCodeOptions], Any] = ClaudeSDKClient) -> None:
+        self._client_factory = client_factory
+        self._idle: dict[Hashable, list[_Session]] = {}
+        self._sessions: list[_Session] = []
+        self.started = 0
+
+    def acquire(self, options: ClaudeCodeOptions) -> tuple[_Session, bool]:
+        idle = self._idle.get(session_key(options))
+        if idle:
+            return idle.pop(), True
+        session = _Session(self._client_factory(options))
+        self._sessions.append(session)
+        self.started += 1
+        return session, False
+
+    async def release(self, options: ClaudeCodeOptions, session: _Session) -> None:
+        if session.broken or session.uses >= MAX_SESSION_USES:
+            self._sessions.remove(session)
+            await session.close()
+            return
+        self._idle.setdefault(session_key(options), []).append(session)
+
+    async def close(self) -> None:
+        sessions, self._sessions, self._idle = self._sessions, [], {}
+        await asyncio.gather(*(session.close() for session in sessions))
+
+
+class PooledSdkRunner(ClaudeSdkRunner):
+    def __init__(
+        self,
+        env: dict[str, str],
+        verbose: bool = False,
+        client_factory: Callable[[ClaudeCodeOptions], Any] = ClaudeSDKClient,
+    ) -> None:
+        super().__init__(env=env, verbose=verbose)
+        self.pool = SessionPool(client_factory)
+
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        meter = active_meter()
+        options = self._options(stage, cwd, model, meter)
+        session, warm = self.pool.acquire(options)
+        debug(self._verbose, f"Stage {stage.number} using {'warm' if warm else 'new'} session")
+        started = time.monotonic()
+        try:
+            execution = await self._collect(stage, session.stream(prompt), meter, started)
+        finally:
+            await self.pool.release(options, session)
+        execution.session = "warm" if warm else "cold"
+        return execution
+
+    async def aclose(self) -> None:
+        await self.pool.close()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import heapq
+from pathlib import Path
+import re
+
+from .types import ScheduledTask, SpecTask
+
+TASK_RE = re.compile(r"^\s*-\s\[([ ~xX])\]\s(.*)$")
+ANNOTATION_RE = re.compile(r"\(\s*(after|size)\s*:\s*([^)]*)\)", re.IGNORECASE)
+
+
+class SpecGraphError(ValueError):
+    pass
+
+
+def parse_spec_tasks(text: str) -> list[SpecTask]:
+    tasks: list[SpecTask] = []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        match = TASK_RE.match(line)
+        if match is None:
+            continue
+        number = len(tasks) + 1
+        after: list[int] = []
+        size = 1.0
+        for key, value in ANNOTATION_RE.findall(match.group(2)):
+            if key.lower() == "after":
+                after.extend(_task_refs(value, line_no))
+            else:
+                size = _size(value, line_no)
+        description = " ".join(ANNOTATION_RE.sub("", match.group(2)).split())
+        tasks.append(
+            SpecTask(
+                number=number,
+                line=line_no,
+                status=match.group(1).lower(),
+                description=description,
+                after=tuple(dict.fromkeys(after)),
+                size=size,
+            )
+        )
+    _check_graph(tasks)
+    return tasks
+
+
+def load_spec_tasks(spec_file: Path) -> list[SpecTask]:
+    return parse_spec_tasks(spec_file.read_text(encoding="utf-8"))
+
+
+def priorities(tasks: list[SpecTask]) -> dict[int, float]:
+    pending = {task.number: task for task in tasks if not task.done}
+    dependents = _dependents(pending)
+    rank: dict[int, float] = {}
+    for number in reversed(_topological_order(pending)):
+        rank[number] = pending[number].size + max((rank[child] for child in dependents[number]), default=0.0)
+    return rank
+
+
+def ready_tasks(tasks: list[SpecTask]) -> list[SpecTask]:
+    done = {task.number for task in tasks if task.done}
+    rank = priorities(tasks)
+    ready = [task for task in tasks if not task.done and all(dep in done for dep in task.after)]
+    return sorted(ready, key=lambda task: (-rank[task.number], task.number))
+
+
+def critical_path(tasks: list[SpecTask]) -> list[SpecTask]:
+    rank = priorities(tasks)
+    if not rank:
+        return []
+    by_number = {task.number: task for task in tasks}
+    path: list[SpecTask] = []
+    candidates = [number for number in rank if not any(dep in rank for dep in by_number[number].after)]
+    while candidates:
+        current = max(candidates, key=lambda number: (rank[number], -number))
+        path.append(by_number[current])
+        candidates = [number for number in rank if current in by_number[number].after]
+    return path
+
+
+def project_schedule(tasks: list[SpecTask], workers: int, limit: int | None = None) -> list[ScheduledTask]:
+    rank = priorities(tasks)
+    by_number = {task.number: task for task in tasks}
+    pending = {number: by_number[number] for number in rank}
+    waiting = {number: sum(dep in pending for dep in task.after) for number, task in pending.items()}
+    dependents = _dependents(pending)
+    ready = [(-rank[number], number) for number, count in waiting.items() if count == 0]
+    heapq.heapify(ready)
+    running: list[tuple[float, int]] = []
+    schedule: list[ScheduledTask] = []
+    now = 0.0
+    remaining = len(rank) if limit is None else min(limit, len(rank))
+    while len(schedule) < remaining and (ready or running):
+        while ready and len(running) < workers and len(schedule) < remaining:
+            _, number = heapq.heappop(ready)
+            task = by_number[number]
+            schedule.append(ScheduledTask(task=task, priority=rank[number], start=now, end=now + task.size))
+            heapq.heappush(running, (now + task.size, number))
+        if not running:
+            break
+        now, finished = heapq.heappop(running)
+        for child in dependents[finished]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                heapq.heappush(ready, (-rank[child], child))
+    return schedule
+
+
+def makespan(schedule: list[ScheduledTask]) -> float:
+    return max((item.end for item in schedule), default=0.0)
+
+
+def _task_refs(value: str, line_no: int) -> list[int]:
+    refs: list[int] = []
+    for part in value.replace(",", " ").split():
+        ref = part.lstrip("#")
+        if not ref.isdigit() or int(ref) < 1:
+            raise SpecGraphError(f"line {line_no}: invalid task reference {part!r} in (after: ...)")
+        refs.append(int(ref))
+    return refs
+
+
+def _size(value: str, line_no: int) -> float:
+    try:
+        size = float(value.strip())
+    except ValueError:
+        size = 0.0
+    if size <= 0:
+        raise SpecGraphError(f"line {line_no}: size must be a positive number, got {value.strip()!r}")
+    return size
+
+
+def _check_graph(tasks: list[SpecTask]) -> None:
+    for task in tasks:
+        for dep in task.after:
+            if dep == task.number:
+                raise SpecGraphError(f"line {task.line}: task {task.number} depends on itself")
+            if dep > len(tasks):
+                raise SpecGraphError(f"line {task.line}: task {task.number} depends on unknown task {dep}")
+    _topological_order({task.number: task for task in tasks})
+
+
+def _topological_order(tasks: dict[int, SpecTask]) -> list[int]:
+    waiting = {number: sum(dep in tasks for dep in task.after) for number, task in tasks.items()}
+    dependents = _dependents(tasks)
+    queue = sorted(number for number, count in waiting.items() if count == 0)
+    order: list[int] = []
+    while queue:
+        number = queue.pop(0)
+        order.append(number)
+        for child in dependents[number]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                queue.append(child)
+    if len(order) != len(tasks):
+        cycle = ", ".join(str(number) for number in sorted(set(tasks) - set(order)))
+        raise SpecGraphError(f"dependency cycle between tasks {cycle}")
+    return order
+
+
+def _dependents(tasks: dict[int, SpecTask]) -> dict[int, list[int]]:
+    dependents: dict[int, list[int]] = {number: [] for number in tasks}
+    for number, task in tasks.items():
+        for dep in task.after:
+            if dep in dependents:
+                dependents[dep].append(number)
+    return dependents
@@ -34,14 +34,60 @@ def _extract_machine_block(output: str) -> str | None:
 
 
 def _extract_block(output: str, start_token: str, end_token: str) -> str | None:
-    start = output.find(start_token)
-    end = output.find(end_token)
-    if start == -1 or end == -1 or end <= start:
+    # The last block wins: earlier turns may quote the markers while reasoning about the output format.
+    end = output.rfind(end_token)
+    start = output.rfind(start_token, 0, end) if end != -1 else -1
+    if start == -1:
         return None
     content = output[start + len(start_token) : end].strip()
     return content or None
 
 
+class StageStreamParser:
+    def __init__(self, stage_number: int) -> None:
+        self.stage_number = stage_number
+        self.text = ""
+        self.machine: MachineEnvelope | None = None
+        self.has_handoff = False
+        self.failure: str | None = None
+        self._scanned = 0
+
+    def feed(self, chunk: str) -> str | None:
+        if self.failure is not None:
+            return self.failure
+        self.text = f"{self.text}\n{chunk}" if self.text else chunk
+
+        # Blocks are read from this chunk alone, so a marker quoted in an earlier turn never pairs with a later one.
+        # Only a well-formed envelope for this stage that reports failure is definitive; anything else may be the
+        # model quoting the format, and the final parse still checks the real block.
+        machine_block = _extract_machine_block(chunk) if self.stage_number >= 1 else None
+        if machine_block is not None:
+            machine, error = _parse_machine_envelope(machine_block)
+            if error is None and machine.stage == self.stage_number:
+                if machine.status != "success":
+                    return self._fail(f"Machine status is {machine.status!r}: {machine.summary}")
+                self.machine = machine
+        if not self.has_handoff:
+            self.has_handoff = extract_handoff_block(self.text) is not None
+
+        # Only Stage 0 treats FAILED/ERROR lines as failure; later stages report it through the machine block.
+        if self.stage_number == 0:
+            match = EXPLICIT_FAILURE_RE.search(self.text, self._scanned)
+            if match:
+                line_end = self.text.find("\n", match.start())
+                line = self.text[match.start() : line_end if line_end != -1 else None].strip()
+                return self._fail(f"Explicit failure line: {line[:200]}")
+            self._scanned = max(0, self.text.rfind("\n") + 1)
+        return None
+
+    def aborted(self) -> StageExecution:
+        return _failed(self.text, f"Stage {self.stage_number} aborted early: {self.failure}")
+
+    def _fail(self, reason: str) -> str:
+        self.failure = reason
+        return reason
+
+
 def parse_stage_output(output: str, stage_number: int) -> StageExecution:
     if stage_number == 0:
         if _has_explicit_failure(output):
@@ -4,6 +4,8 @@ from pathlib import Path
 
 from .types import StageSpec
 
+# Task runs subagents, and a subagent may have its own write tools.
+WRITE_TOOLS = {"Bash", "Edit", "MultiEdit", "NotebookEdit", "Task", "TaskCreate", "Write"}
 
 STAGE_DEFINITIONS: tuple[tuple[int, str, str, str, list[str] | None, str], ...] = (
     (
@@ -65,6 +67,12 @@ STAGE_DEFINITIONS: tuple[tuple[int, str, str, str, list[str] | None, str], ...]
 )
 
 
+def is_read_only(stage: StageSpec) -> bool:
+    if stage.allowed_tools is None or stage.permission_mode != "default":
+        return False
+    return not WRITE_TOOLS.intersection(stage.allowed_tools)
+
+
 def stage_specs(prompts_dir: Path) -> dict[int, StageSpec]:
     specs: dict[int, StageSpec] = {}
     for number, name, file_name, default_model, allowed_tools, permission_mode in STAGE_DEFINITIONS:
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import copy
 import json
+import os
 from pathlib import Path
-from typing import Any
+import threading
+from typing import Any, Iterable
 
 from .types import MachineEnvelope, SuccessCriterion
 
@@ -13,6 +16,7 @@ CRITERION_KINDS = {
     "command_succeeds",
     "git_diff_includes",
 }
+STAGE_STATE_KEYS = {3: "planned_files", 4: "success_criteria"}
 
 
 def ensure_state_dir(state_dir: Path) -> None:
@@ -23,33 +27,74 @@ def task_state_path(state_dir: Path, task_id: int) -> Path:
     return state_dir / f"task-{task_id}.json"
 
 
-def load_task_state(state_dir: Path, task_id: int) -> dict[str, Any]:
+class TaskStateError(ValueError):
+    pass
+
+
+class TaskStateStore:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.payload = _read_task_state(path)
+        self.dirty = False
+
+    def replace(self, payload: dict[str, Any]) -> None:
+        self.payload = copy.deepcopy(payload)
+        self.dirty = True
+
+    def flush(self) -> None:
+        if not self.dirty:
+            return
+        ensure_state_dir(self.path.parent)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            fh.write(json.dumps(self.payload, indent=2, sort_keys=True) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+_STORES: dict[Path, TaskStateStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def task_state(state_dir: Path, task_id: int) -> TaskStateStore:
     path = task_state_path(state_dir, task_id)
-    if not path.exists():
-        return {}
-    try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return {}
-    if not isinstance(payload, dict):
-        return {}
-    return payload
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = TaskStateStore(path)
+            _STORES[path] = store
+        return store
+
+
+def close_task_states(root: Path) -> None:
+    with _STORES_LOCK:
+        paths = [path for path in _STORES if path.is_relative_to(root)]
+        stores = [_STORES.pop(path) for path in paths]
+    for store in stores:
+        store.flush()
+
+
+def load_task_state(state_dir: Path, task_id: int) -> dict[str, Any]:
+    return copy.deepcopy(task_state(state_dir, task_id).payload)
 
 
 def save_task_state(state_dir: Path, task_id: int, payload: dict[str, Any]) -> None:
-    ensure_state_dir(state_dir)
-    path = task_state_path(state_dir, task_id)
-    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    store = task_state(state_dir, task_id)
+    store.replace(payload)
+    store.flush()
 
 
 def update_task_state_from_machine(state_dir: Path, task_id: int, machine: MachineEnvelope | None) -> None:
     if machine is None:
         return
-    payload = load_task_state(state_dir, task_id)
+    store = task_state(state_dir, task_id)
+    payload = store.payload
     payload["task_id"] = task_id
 
     if machine.stage == 3 and machine.planned_files is not None:
-        payload["planned_files"] = machine.planned_files
+        payload["planned_files"] = list(machine.planned_files)
 
     if machine.stage == 4 and machine.criteria is not None:
         payload["success_criteria"] = [
@@ -57,14 +102,34 @@ def update_task_state_from_machine(state_dir: Path, task_id: int, machine: Machi
         ]
 
     if machine.metadata is not None:
-        payload.setdefault("stage_metadata", {})[str(machine.stage)] = machine.metadata
+        payload.setdefault("stage_metadata", {})[str(machine.stage)] = copy.deepcopy(machine.metadata)
 
-    save_task_state(state_dir, task_id, payload)
+    store.dirty = True
+
+
+def copy_stage_state(source_dir: Path, state_dir: Path, task_id: int, stages: Iterable[int]) -> None:
+    source = task_state(source_dir, task_id).payload
+    store = task_state(state_dir, task_id)
+    payload = store.payload
+    payload["task_id"] = task_id
+    source_metadata = source.get("stage_metadata")
+    for stage in stages:
+        key = STAGE_STATE_KEYS.get(stage)
+        if key is not None:
+            if key in source:
+                payload[key] = copy.deepcopy(source[key])
+            else:
+                payload.pop(key, None)
+        metadata = source_metadata.get(str(stage)) if isinstance(source_metadata, dict) else None
+        if metadata is not None:
+            payload.setdefault("stage_metadata", {})[str(stage)] = copy.deepcopy(metadata)
+        elif isinstance(payload.get("stage_metadata"), dict):
+            payload["stage_metadata"].pop(str(stage), None)
+    store.dirty = True
 
 
 def load_success_criteria(state_dir: Path, task_id: int) -> list[SuccessCriterion] | None:
-    payload = load_task_state(state_dir, task_id)
-    raw = payload.get("success_criteria")
+    raw = task_state(state_dir, task_id).payload.get("success_criteria")
     if not isinstance(raw, list):
         return None
     criteria: list[SuccessCriterion] = []
@@ -79,9 +144,55 @@ def load_success_criteria(state_dir: Path, task_id: int) -> list[SuccessCriterio
 
 
 def load_planned_files(state_dir: Path, task_id: int) -> list[str]:
-    payload = load_task_state(state_dir, task_id)
-    raw = payload.get("planned_files")
+    raw = task_state(state_dir, task_id).payload.get("planned_files")
     if not isinstance(raw, list):
         return []
     values = [item.strip() for item in raw if isinstance(item, str) and item.strip()]
     return values
+
+
+def load_completed_stages(state_dir: Path, task_id: int) -> set[int]:
+    return _completed_stages(task_state(state_dir, task_id).payload)
+
+
+def mark_stage_completed(state_dir: Path, task_id: int, stage_number: int) -> None:
+    store = task_state(state_dir, task_id)
+    store.payload["task_id"] = task_id
+    completed = _completed_stages(store.payload)
+    completed.add(stage_number)
+    store.payload["completed_stages"] = sorted(completed)
+    store.dirty = True
+    store.flush()
+
+
+def reset_completed_stages(state_dir: Path, task_id: int) -> None:
+    store = task_state(state_dir, task_id)
+    if "completed_stages" not in store.payload:
+        return
+    store.payload["completed_stages"] = []
+    store.dirty = True
+
+
+def _completed_stages(payload: dict[str, Any]) -> set[int]:
+    raw = payload.get("completed_stages")
+    if not isinstance(raw, list):
+        return set()
+    return {item for item in raw if isinstance(item, int) and not isinstance(item, bool)}
+
+
+def _read_task_state(path: Path) -> dict[str, Any]:
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return {}
+    try:
+        payload = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        reason = f"invalid JSON ({exc})"
+    else:
+        if isinstance(payload, dict):
+            return payload
+        reason = f"expected a JSON object, got {type(payload).__name__}"
+    backup = path.with_suffix(".json.corrupt")
+    os.replace(path, backup)
+    raise TaskStateError(f"Task state {path} is corrupt: {reason}; moved it to {backup.name}")
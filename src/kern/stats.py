@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Iterator
+
+from .budget import TOKEN_KEYS
+from .run_store import STORE_FILE, RunStore, open_existing_store
+
+INDEX_VERSION = 2
+BUCKET_BASE = 1.05
+PERCENTILES = (50, 95, 99)
+GROUPS = ("stage", "model", "task", "stage_model")
+STORE_EVENTS = f"{STORE_FILE}#events"
+STORE_REPORTS = f"{STORE_FILE}#evaluations"
+
+
+@dataclass
+class Aggregate:
+    count: int = 0
+    failures: int = 0
+    duration_ms: float = 0.0
+    buckets: dict[int, int] = field(default_factory=dict)
+    tokens: dict[str, int] = field(default_factory=dict)
+    cost_usd: float = 0.0
+    evaluations: int = 0
+    passed: int = 0
+    score_total: int = 0
+
+    def add_event(self, event: dict[str, Any]) -> None:
+        self.count += 1
+        if event.get("success") is False:
+            self.failures += 1
+        duration = event.get("duration_ms")
+        if isinstance(duration, (int, float)) and duration >= 0:
+            self.duration_ms += duration
+            bucket = _bucket(duration)
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        usage = event.get("usage")
+        if isinstance(usage, dict):
+            for key in TOKEN_KEYS:
+                value = usage.get(key)
+                if isinstance(value, int):
+                    self.tokens[key] = self.tokens.get(key, 0) + value
+        cost = event.get("total_cost_usd")
+        if isinstance(cost, (int, float)):
+            self.cost_usd += cost
+
+    def add_evaluation(self, report: dict[str, Any]) -> None:
+        self.evaluations += 1
+        if report.get("passed_soft_gate") is True:
+            self.passed += 1
+        score = report.get("score")
+        if isinstance(score, int):
+            self.score_total += score
+
+    def percentile(self, percent: float) -> float | None:
+        total = sum(self.buckets.values())
+        if not total:
+            return None
+        rank = max(1, math.ceil(total * percent / 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return _bucket_value(bucket)
+        return None
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "duration_ms": self.duration_ms,
+            "buckets": {str(bucket): count for bucket, count in self.buckets.items()},
+            "tokens": self.tokens,
+            "cost_usd": self.cost_usd,
+            "evaluations": self.evaluations,
+            "passed": self.passed,
+            "score_total": self.score_total,
+        }
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any]) -> Aggregate:
+        return cls(
+            count=payload["count"],
+            failures=payload["failures"],
+            duration_ms=payload["duration_ms"],
+            buckets={int(bucket): count for bucket, count in payload["buckets"].items()},
+            tokens=dict(payload["tokens"]),
+            cost_usd=payload["cost_usd"],
+            evaluations=payload["evaluations"],
+            passed=payload["passed"],
+            score_total=payload["score_total"],
+        )
+
+    def summary(self) -> dict[str, Any]:
+        result: dict[str, Any] = {"count": self.count, "failures": self.failures}
+        for percent in PERCENTILES:
+            value = self.percentile(percent)
+            result[f"p{percent}_ms"] = None if value is None else round(value)
+        result["tokens"] = dict(sorted(self.tokens.items()))
+        result["cost_usd"] = round(self.cost_usd, 6)
+        if self.evaluations:
+            result["evaluations"] = self.evaluations
+            result["passed"] = self.passed
+            result["mean_score"] = round(self.score_total / self.evaluations, 1)
+        return result
+
+
+@dataclass
+class StatsIndex:
+    files: dict[str, dict[str, int]] = field(default_factory=dict)
+    groups: dict[str, dict[str, Aggregate]] = field(default_factory=lambda: {name: {} for name in GROUPS})
+
+    def aggregate(self, group: str, key: str) -> Aggregate:
+        return self.groups[group].setdefault(key, Aggregate())
+
+
+def index_path(kern_dir: Path) -> Path:
+    return kern_dir / "stats" / "index.json"
+
+
+def load_index(path: Path) -> StatsIndex:
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return StatsIndex()
+    if not isinstance(payload, dict) or payload.get("version") != INDEX_VERSION:
+        return StatsIndex()
+    try:
+        groups = {
+            name: {key: Aggregate.from_json(value) for key, value in payload["groups"].get(name, {}).items()}
+            for name in GROUPS
+        }
+        return StatsIndex(files=dict(payload["files"]), groups=groups)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return StatsIndex()
+
+
+def save_index(path: Path, index: StatsIndex) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": INDEX_VERSION,
+        "files": index.files,
+        "groups": {
+            name: {key: aggregate.to_json() for key, aggregate in sorted(aggregates.items())}
+            for name, aggregates in index.groups.items()
+        },
+    }
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def update_index(kern_dir: Path, index: StatsIndex) -> tuple[StatsIndex, int]:
+    sources = sorted([*(kern_dir / "runs").glob("*/events.jsonl"), *(kern_dir / "reports").glob("*.jsonl")])
+    for path in sources:
+        recorded = index.files.get(_relative(kern_dir, path))
+        try:
+            size = path.stat().st_size
+        except OSError:
+            continue
+        if recorded is not None and size < recorded["offset"]:
+            return update_index(kern_dir, StatsIndex())
+
+    read_files = 0
+    store = open_existing_store(kern_dir)
+    if store is not None:
+        try:
+            offsets = (_store_offset(index, STORE_EVENTS), _store_offset(index, STORE_REPORTS))
+            shrunk = any(offset > latest for offset, latest in zip(offsets, store.max_ids()))
+            if not shrunk:
+                read_files += _read_store(store, index, offsets)
+        finally:
+            store.close()
+        if shrunk:
+            return update_index(kern_dir, StatsIndex())
+
+    for path in sources:
+        name = _relative(kern_dir, path)
+        offset = index.files.get(name, {}).get("offset", 0)
+        try:
+            if path.stat().st_size == offset:
+                continue
+        except OSError:
+            continue
+        read_files += 1
+        is_report = path.parent.name == "reports"
+        for record in _records(path, index, name, offset):
+            if is_report:
+                _add_report(index, record)
+            else:
+                _add_event(index, record)
+    return index, read_files
+
+
+def collect_stats(kern_dir: Path, rebuild: bool = False, save: bool = True) -> tuple[StatsIndex, int]:
+    path = index_path(kern_dir)
+    index = StatsIndex() if rebuild else load_index(path)
+    index, read_files = update_index(kern_dir, index)
+    if save and (read_files or rebuild or not path.exists()):
+        save_index(path, index)
+    return index, read_files
+
+
+def stats_payload(index: StatsIndex, groups: tuple[str, ...] = GROUPS) -> dict[str, Any]:
+    return {
+        name: {key: aggregate.summary() for key, aggregate in sorted(index.groups[name].items(), key=_sort_key)}
+        for name in groups
+    }
+
+
+def format_stats(index: StatsIndex, groups: tuple[str, ...] = GROUPS) -> str:
+    lines: list[str] = []
+    header = f"{'count':>6} {'fail':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'in tok':>10} {'out tok':>10} {'cost $':>10}"
+    for name in groups:
+        aggregates = index.groups[name]
+        if lines:
+            lines.append("")
+        lines.append(f"By {name}:")
+        if not aggregates:
+            lines.append("  (no data)")
+            continue
+        lines.append(f"  {name:<24} {header}")
+        for key, aggregate in sorted(aggregates.items(), key=_sort_key):
+            summary = aggregate.summary()
+            percentiles = " ".join(_format_ms(summary[f"p{percent}_ms"]) for percent in PERCENTILES)
+            tokens = summary["tokens"]
+            lines.append(
+                f"  {key[:24]:<24} {summary['count']:>6} {summary['failures']:>5} {percentiles} "
+                f"{tokens.get('input_tokens', 0):>10} {tokens.get('output_tokens', 0):>10} "
+                f"{summary['cost_usd']:>10.4f}"
+            )
+    return "\n".join(lines)
+
+
+def _records(path: Path, index: StatsIndex, name: str, offset: int) -> Iterator[dict[str, Any]]:
+    with path.open("rb") as fh:
+        fh.seek(offset)
+        for raw in fh:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            try:
+                payload = json.loads(raw)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(payload, dict):
+                yield payload
+    index.files[name] = {"offset": offset}
+
+
+def _store_offset(index: StatsIndex, name: str) -> int:
+    return index.files.get(name, {}).get("offset", 0)
+
+
+def _read_store(store: RunStore, index: StatsIndex, offsets: tuple[int, int]) -> int:
+    read = 0
+    last_event = offsets[0]
+    for last_event, event in store.events(after_id=offsets[0]):
+        _add_event(index, event)
+        read = 1
+    last_report = offsets[1]
+    for last_report, report in store.evaluations(after_id=offsets[1]):
+        _add_report(index, report)
+        read = 1
+    index.files[STORE_EVENTS] = {"offset": last_event}
+    index.files[STORE_REPORTS] = {"offset": last_report}
+    return read
+
+
+def _add_event(index: StatsIndex, event: dict[str, Any]) -> None:
+    if event.get("event", "stage") != "stage":
+        return
+    stage_number = event.get("stage_number")
+    stage_name = event.get("stage_name")
+    stage_key = f"{stage_number} {stage_name}" if stage_name else str(stage_number)
+    index.aggregate("stage", stage_key).add_event(event)
+    model = str(event.get("model") or "unknown")
+    index.aggregate("model", model).add_event(event)
+    index.aggregate("stage_model", f"{stage_number} {model}").add_event(event)
+    task_id = event.get("task_id")
+    index.aggregate("task", "none" if task_id is None else str(task_id)).add_event(event)
+
+
+def _add_report(index: StatsIndex, report: dict[str, Any]) -> None:
+    task_id = report.get("task_id")
+    if task_id is not None:
+        index.aggregate("task", str(task_id)).add_evaluation(report)
+
+
+def _relative(kern_dir: Path, path: Path) -> str:
+    return path.relative_to(kern_dir).as_posix()
+
+
+def _bucket(millis: float) -> int:
+    return int(math.floor(math.log(max(millis, 1.0)) / math.log(BUCKET_BASE)))
+
+
+def _bucket_value(bucket: int) -> float:
+    return BUCKET_BASE ** (bucket + 0.5)
+
+
+def _sort_key(item: tuple[str, Aggregate]) -> tuple[int, int | str]:
+    key = item[0]
+    head = key.split(" ", 1)[0]
+    return (0, int(head)) if head.isdigit() else (1, key)
+
+
+def _format_ms(value: int | None) -> str:
+    return f"{'-':>9}" if value is None else f"{value:>7}ms"
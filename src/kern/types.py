@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Literal, Protocol
+from typing import TYPE_CHECKING, Any, Literal, Protocol
+
+if TYPE_CHECKING:
+    from .budget import Budget
+    from .retry import RetryPolicy
+    from .routing import ModelRouter
 
 
 PermissionMode = Literal["default", "bypassPermissions"]
@@ -23,6 +28,7 @@ class StageSpec:
     default_model: str
     allowed_tools: list[str] | None
     permission_mode: PermissionMode
+    timeout_seconds: float | None = None
 
 
 @dataclass
@@ -38,6 +44,9 @@ class StageExecution:
     error: str | None = None
     usage: dict[str, Any] | None = None
     total_cost_usd: float | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    failure_kind: str | None = None
+    session: str | None = None
 
 
 @dataclass(frozen=True)
@@ -70,6 +79,28 @@ class IterationEvaluation:
     timestamp_utc: str
 
 
+@dataclass(frozen=True)
+class SpecTask:
+    number: int
+    line: int
+    status: str
+    description: str
+    after: tuple[int, ...] = ()
+    size: float = 1.0
+
+    @property
+    def done(self) -> bool:
+        return self.status == "x"
+
+
+@dataclass(frozen=True)
+class ScheduledTask:
+    task: SpecTask
+    priority: float
+    start: float
+    end: float
+
+
 @dataclass
 class RunContext:
     run_dir: Path
@@ -85,6 +116,21 @@ class RunContext:
     report_dir: Path
     state_dir: Path
     max_fix_attempts: int = 1
+    jobs: int = 1
+    resume: bool = False
+    active_task_ids: set[int] = field(default_factory=set)
+    profile: bool = False
+    speculate: int = 0
+    speculative: bool = False
+    router: ModelRouter | None = None
+    model_escalation: dict[int, int] = field(default_factory=dict)
+    compact_handoff: bool = False
+    budget: Budget | None = None
+    stage_timeout: float | None = None
+    retry_policy: RetryPolicy | None = None
+    full_revalidate: bool = False
+    populate_queue: bool = True
+    spec_dir: Path | None = None
 
 
 @dataclass
@@ -93,12 +139,18 @@ class ValidationCheckResult:
     kind: str
     passed: bool
     details: str
+    duration_ms: float | None = None
+    inputs: list[str] | None = None
+    reused: bool = False
+    cached: bool = False
 
 
 @dataclass
 class ValidationResult:
     passed: bool
     checks: list[ValidationCheckResult]
+    head: str | None = None
+    observed: dict[str, str] = field(default_factory=dict)
 
     def summary(self) -> str:
         if self.passed:
@@ -121,5 +173,6 @@ class Validator(Protocol):
         run_dir: Path,
         handoff_file: Path,
         criteria: list[SuccessCriterion] | None = None,
+        previous: ValidationResult | None = None,
     ) -> ValidationResult:
         ...
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+import os
 from pathlib import Path
 import re
+import signal
 import subprocess
+import time
 
+from .defaults import DEFAULT_VALIDATION_JOBS
+from .file_matcher import FileMatcher, match_pattern
+from .git_snapshot import git_snapshot
 from .types import SuccessCriterion, ValidationCheckResult, ValidationResult, Validator
+from .validation_cache import ValidationCache, validation_cache_key
 
 CRITERION_RE = re.compile(
     r"^\s*(file_exists|file_contains|file_not_contains|command_succeeds|git_diff_includes)\s*:\s*(.+)\s*$"
@@ -19,13 +28,57 @@ def _read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
+def _kill_process_group(process: subprocess.Popen[str]) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+
+def _criterion_inputs(kind: str, payload: str) -> list[str] | None:
+    if kind == "file_exists":
+        return [Path(os.path.normpath(_strip_ticks(payload))).as_posix()]
+    if kind in {"file_contains", "file_not_contains"}:
+        file_part, _ = SuccessCriteriaValidator._split_file_pattern(payload)
+        return [Path(os.path.normpath(_strip_ticks(file_part))).as_posix()]
+    # A command can read any file, not just the ones it names, so it depends on the whole tree.
+    return None
+
+
+def _touched_paths(previous: ValidationResult, head: str | None, observed: dict[str, str]) -> set[str] | None:
+    if previous.head != head:
+        return None
+    return {path for path in previous.observed.keys() | observed.keys() if previous.observed.get(path) != observed.get(path)}
+
+
+def _touches(inputs: list[str] | None, touched: set[str] | None) -> bool:
+    if touched is None:
+        return True
+    if inputs is None:
+        return bool(touched)
+    return any(path == item or path.startswith(f"{item}/") for path in touched for item in inputs)
+
+
 class SuccessCriteriaValidator(Validator):
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_VALIDATION_JOBS,
+        command_timeout: float | None = None,
+        cache: ValidationCache | None = None,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.max_workers = max_workers
+        self.command_timeout = command_timeout
+        self.cache = cache
+
     def validate(
         self,
         task_id: int,
         run_dir: Path,
         handoff_file: Path,
         criteria: list[SuccessCriterion] | None = None,
+        previous: ValidationResult | None = None,
     ) -> ValidationResult:
         if not handoff_file.exists():
             return ValidationResult(
@@ -54,72 +107,179 @@ class SuccessCriteriaValidator(Validator):
                 ],
             )
 
-        checks: list[ValidationCheckResult] = []
+        snapshot = git_snapshot(run_dir)
+        head = snapshot.head()
+        observed = snapshot.dirty_digests()
+        reusable: dict[str, ValidationCheckResult] = {}
+        if previous is not None:
+            touched = _touched_paths(previous, head, observed)
+            reusable = {
+                check.criterion: check
+                for check in previous.checks
+                if check.passed and not _touches(check.inputs, touched)
+            }
+
+        commands = [
+            _strip_ticks(criterion.value)
+            for criterion in active_criteria
+            if criterion.kind == "command_succeeds" and f"{criterion.kind}: {criterion.value}" not in reusable
+        ]
+        command_count = len(commands)
+        tree_hash = None
+        if self.cache is not None and any(self.cache.allows(command) for command in commands):
+            tree_hash = snapshot.tree_hash()
+        workers = min(self.max_workers, command_count)
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            checks = self._run_checks(active_criteria, run_dir, executor, reusable, tree_hash)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            if command_count:
+                snapshot.mark_stale()
+
+        passed = all(check.passed for check in checks)
+        return ValidationResult(passed=passed, checks=checks, head=head, observed=observed)
+
+    def _run_checks(
+        self,
+        criteria: list[SuccessCriterion],
+        run_dir: Path,
+        executor: ThreadPoolExecutor | None,
+        reusable: dict[str, ValidationCheckResult] | None = None,
+        tree_hash: str | None = None,
+    ) -> list[ValidationCheckResult]:
+        slots: list[ValidationCheckResult | Future[ValidationCheckResult]] = []
+        inputs: dict[str, list[str] | None] = {}
         diff_names = self._diff_names(run_dir)
         diff_patch = self._diff_patch(run_dir)
-        for criterion in active_criteria:
-            kind = criterion.kind
-            payload = criterion.value
-            label = f"{kind}: {payload}"
-
-            if kind == "file_exists":
-                path = run_dir / _strip_ticks(payload)
-                checks.append(ValidationCheckResult(label, kind, path.exists(), f"path={path}"))
-                continue
-
-            if kind in {"file_contains", "file_not_contains"}:
-                file_part, pattern_part = self._split_file_pattern(payload)
-                file_path = run_dir / _strip_ticks(file_part)
-                if not file_path.exists():
-                    checks.append(ValidationCheckResult(label, kind, False, f"path not found: {file_path}"))
+        commands_since_read = False
+        with FileMatcher() as matcher:
+            for criterion in criteria:
+                kind = criterion.kind
+                payload = criterion.value
+                label = f"{kind}: {payload}"
+                if reusable and label in reusable:
+                    slots.append(replace(reusable[label], reused=True, duration_ms=0.0))
+                    continue
+                inputs[label] = _criterion_inputs(kind, payload)
+                if kind == "command_succeeds":
+                    command = _strip_ticks(payload)
+                    cache_key = None
+                    if self.cache is not None and tree_hash is not None and self.cache.allows(command):
+                        cache_key = validation_cache_key(command, tree_hash)
+                        hit = self.cache.get(cache_key, command)
+                        if hit is not None:
+                            passed, details = hit
+                            slots.append(ValidationCheckResult(label, kind, passed, details, duration_ms=0.0, cached=True))
+                            continue
+                    commands_since_read = True
+                    if executor is None:
+                        slots.append(self._run_command(label, command, run_dir, cache_key))
+                    else:
+                        slots.append(executor.submit(self._run_command, label, command, run_dir, cache_key))
                     continue
-                content = _read_text(file_path)
-                pattern = _strip_ticks(pattern_part)
-                matched, mode = self._match_pattern(content, pattern)
-                passed = matched if kind == "file_contains" else not matched
-                checks.append(
-                    ValidationCheckResult(
-                        label,
-                        kind,
-                        passed,
-                        f"path={file_path} pattern={pattern} mode={mode}",
-                    )
-                )
-                continue
 
-            if kind == "command_succeeds":
-                command = _strip_ticks(payload)
-                completed = subprocess.run(
-                    command,
-                    cwd=run_dir,
-                    shell=True,
-                    text=True,
-                    capture_output=True,
-                    check=False,
-                )
-                details = f"exit={completed.returncode}"
-                if completed.stderr.strip():
-                    details = f"{details} stderr={completed.stderr.strip()[:200]}"
-                checks.append(ValidationCheckResult(label, kind, completed.returncode == 0, details))
-                continue
+                # File checks may depend on earlier commands; only adjacent commands overlap.
+                slots = [slot.result() if isinstance(slot, Future) else slot for slot in slots]
+                if commands_since_read:
+                    matcher.clear()
+                    commands_since_read = False
+                started = time.monotonic()
+                result = self._check(kind, payload, label, run_dir, diff_names, diff_patch, matcher)
+                if result is not None:
+                    result.duration_ms = (time.monotonic() - started) * 1000
+                    slots.append(result)
 
-            if kind == "git_diff_includes":
-                needle = _strip_ticks(payload)
-                by_name = any(needle in name for name in diff_names)
-                by_patch = bool(needle) and (needle in diff_patch)
-                passed = by_name or by_patch
-                checks.append(
-                    ValidationCheckResult(
-                        label,
-                        kind,
-                        passed,
-                        f"matched={passed} by_name={by_name} by_patch={by_patch} files={','.join(diff_names) or 'none'}",
-                    )
-                )
-                continue
+        checks = [slot.result() if isinstance(slot, Future) else slot for slot in slots]
+        for check in checks:
+            if not check.reused:
+                check.inputs = inputs.get(check.criterion)
+        return checks
 
-        passed = all(check.passed for check in checks)
-        return ValidationResult(passed=passed, checks=checks)
+    def _check(
+        self,
+        kind: str,
+        payload: str,
+        label: str,
+        run_dir: Path,
+        diff_names: list[str],
+        diff_patch: str,
+        matcher: FileMatcher | None = None,
+    ) -> ValidationCheckResult | None:
+        if kind == "file_exists":
+            path = run_dir / _strip_ticks(payload)
+            return ValidationCheckResult(label, kind, path.exists(), f"path={path}")
+
+        if kind in {"file_contains", "file_not_contains"}:
+            file_part, pattern_part = self._split_file_pattern(payload)
+            file_path = run_dir / _strip_ticks(file_part)
+            if not file_path.exists():
+                return ValidationCheckResult(label, kind, False, f"path not found: {file_path}")
+            pattern = _strip_ticks(pattern_part)
+            found = (matcher or FileMatcher()).search(file_path, pattern)
+            if found is None:
+                return ValidationCheckResult(label, kind, False, f"path not readable: {file_path}")
+            matched, mode = found
+            passed = matched if kind == "file_contains" else not matched
+            return ValidationCheckResult(
+                label,
+                kind,
+                passed,
+                f"path={file_path} pattern={pattern} mode={mode}",
+            )
+
+        if kind == "git_diff_includes":
+            needle = _strip_ticks(payload)
+            by_name = any(needle in name for name in diff_names)
+            by_patch = bool(needle) and (needle in diff_patch)
+            passed = by_name or by_patch
+            return ValidationCheckResult(
+                label,
+                kind,
+                passed,
+                f"matched={passed} by_name={by_name} by_patch={by_patch} files={','.join(diff_names) or 'none'}",
+            )
+
+        return None
+
+    def _run_command(
+        self, label: str, command: str, run_dir: Path, cache_key: str | None = None
+    ) -> ValidationCheckResult:
+        started = time.monotonic()
+        process = subprocess.Popen(
+            command,
+            cwd=run_dir,
+            shell=True,
+            text=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        try:
+            _, stderr = process.communicate(timeout=self.command_timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            process.communicate()
+            return ValidationCheckResult(
+                label,
+                "command_succeeds",
+                False,
+                f"timeout after {self.command_timeout:g}s",
+                duration_ms=(time.monotonic() - started) * 1000,
+            )
+        details = f"exit={process.returncode}"
+        if stderr.strip():
+            details = f"{details} stderr={stderr.strip()[:200]}"
+        if cache_key is not None and self.cache is not None:
+            self.cache.put(cache_key, command, process.returncode == 0, details)
+        return ValidationCheckResult(
+            label,
+            "command_succeeds",
+            process.returncode == 0,
+            details,
+            duration_ms=(time.monotonic() - started) * 1000,
+        )
 
     def _extract_criteria_from_handoff(self, handoff_file: Path) -> list[SuccessCriterion]:
         criteria: list[SuccessCriterion] = []
@@ -170,44 +330,12 @@ class SuccessCriteriaValidator(Validator):
 
     @staticmethod
     def _match_pattern(content: str, pattern: str) -> tuple[bool, str]:
-        if pattern.startswith("/") and pattern.endswith("/") and len(pattern) >= 2:
-            regex = pattern[1:-1]
-            return re.search(regex, content, flags=re.MULTILINE) is not None, "regex"
-        return pattern in content, "literal"
+        return match_pattern(content.encode("utf-8"), pattern)
 
     @staticmethod
     def _diff_names(run_dir: Path) -> list[str]:
-        names: list[str] = []
-        for command in (["git", "diff", "--name-only"], ["git", "diff", "--cached", "--name-only"]):
-            completed = subprocess.run(
-                command,
-                cwd=run_dir,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            if completed.returncode == 0:
-                names.extend(line.strip() for line in completed.stdout.splitlines() if line.strip())
-
-        seen: set[str] = set()
-        ordered: list[str] = []
-        for name in names:
-            if name not in seen:
-                seen.add(name)
-                ordered.append(name)
-        return ordered
+        return git_snapshot(run_dir).changed_files()
 
     @staticmethod
     def _diff_patch(run_dir: Path) -> str:
-        chunks: list[str] = []
-        for command in (["git", "diff"], ["git", "diff", "--cached"]):
-            completed = subprocess.run(
-                command,
-                cwd=run_dir,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            if completed.returncode == 0 and completed.stdout:
-                chunks.append(completed.stdout)
-        return "\n".join(chunks)
+        return git_snapshot(run_dir).patch()
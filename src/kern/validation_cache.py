@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from fnmatch import fnmatchcase
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Iterable
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def validation_cache_key(command: str, tree_hash: str) -> str:
+    payload = {"command": command, "tree": tree_hash}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ValidationCache:
+    def __init__(
+        self,
+        cache_dir: Path,
+        commands: Iterable[str],
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.commands = tuple(commands)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    def allows(self, command: str) -> bool:
+        return any(fnmatchcase(command, pattern) for pattern in self.commands)
+
+    def get(self, key: str, command: str) -> tuple[bool, str] | None:
+        path = self._path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(payload, dict) or payload.get("command") != command:
+            return None
+        created = payload.get("created")
+        passed = payload.get("passed")
+        details = payload.get("details")
+        if not isinstance(created, (int, float)) or not isinstance(passed, bool) or not isinstance(details, str):
+            return None
+        if time.time() - created > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return passed, details
+
+    def put(self, key: str, command: str, passed: bool, details: str) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        payload: dict[str, Any] = {"command": command, "passed": passed, "details": details, "created": time.time()}
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(payload, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        expired_before = time.time() - self.ttl_seconds
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                info = path.stat()
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes and mtime >= expired_before:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import difflib
+from pathlib import Path
+import subprocess
+from typing import Iterable
+
+
+class WorktreeError(RuntimeError):
+    pass
+
+
+def worktrees_dir(kern_dir: Path) -> Path:
+    return kern_dir / "worktrees"
+
+
+def create_worktree(run_dir: Path, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _git(run_dir, ["worktree", "add", "--detach", str(path), "HEAD"])
+    return path
+
+
+def remove_worktree(run_dir: Path, path: Path) -> None:
+    _git(run_dir, ["worktree", "remove", "--force", str(path)])
+
+
+def integrate_worktree(run_dir: Path, worktree: Path, carry: Iterable[str] = ()) -> str:
+    edits = {path: _line_edits(worktree, path) for path in carry}
+    for path, changes in edits.items():
+        if changes:
+            _git(worktree, ["checkout", "HEAD", "--", path])
+    target = _git(run_dir, ["rev-parse", "HEAD"])
+    try:
+        _git(worktree, ["rebase", target])
+    except WorktreeError:
+        subprocess.run(["git", "rebase", "--abort"], cwd=worktree, capture_output=True, check=False)
+        for path, changes in edits.items():
+            _apply_line_edits(worktree / path, changes)
+        raise
+    head = _git(worktree, ["rev-parse", "HEAD"])
+    if head != target:
+        _git(run_dir, ["merge", "--ff-only", head])
+    for path, changes in edits.items():
+        _apply_line_edits(run_dir / path, changes)
+    return head
+
+
+def _line_edits(worktree: Path, path: str) -> list[tuple[str, str]]:
+    try:
+        current = (worktree / path).read_text(encoding="utf-8").splitlines()
+        committed = _git(worktree, ["show", f"HEAD:{path}"]).splitlines()
+    except (OSError, WorktreeError):
+        return []
+    edits: list[tuple[str, str]] = []
+    matcher = difflib.SequenceMatcher(a=committed, b=current, autojunk=False)
+    for tag, a_start, a_end, b_start, b_end in matcher.get_opcodes():
+        if tag == "replace" and a_end - a_start == b_end - b_start:
+            edits.extend(zip(committed[a_start:a_end], current[b_start:b_end]))
+    return edits
+
+
+def _apply_line_edits(path: Path, edits: list[tuple[str, str]]) -> None:
+    if not edits:
+        return
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return
+    lines = text.splitlines()
+    for old, new in edits:
+        if old in lines:
+            lines[lines.index(old)] = new
+    path.write_text("\n".join(lines) + ("\n" if text.endswith("\n") else ""), encoding="utf-8")
+
+
+def _git(cwd: Path, args: list[str]) -> str:
+    completed = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        detail = completed.stderr.strip() or completed.stdout.strip() or f"exit={completed.returncode}"
+        raise WorktreeError(f"git {' '.join(args)} failed: {detail}")
+    return completed.stdout.strip()
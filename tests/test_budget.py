@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from kern.budget import Budget, StageMeter, active_meter, estimate_cost, metered
+
+
+def test_meter_sums_messages_and_trips_token_ceiling() -> None:
+    meter = StageMeter(model="sonnet", max_tokens=1000)
+    start = {"type": "message_start", "message": {"usage": {"input_tokens": 300, "output_tokens": 1}}}
+    assert meter.observe(start) is None
+    assert meter.observe({"type": "message_delta", "usage": {"output_tokens": 200}}) is None
+    assert meter.observe({"type": "content_block_delta", "delta": {"text": "x"}}) is None
+    assert meter.observe(start) is None
+    assert meter.usage()["input_tokens"] == 600
+    reason = meter.observe({"type": "message_delta", "usage": {"output_tokens": 450}})
+    assert reason == "token budget exceeded (1250 > 1000)"
+    assert meter.exceeded == reason
+
+
+def test_meter_trips_estimated_cost() -> None:
+    meter = StageMeter(model="claude-opus", max_cost_usd=0.01)
+    event = {"type": "message_start", "message": {"usage": {"input_tokens": 1000, "output_tokens": 0}}}
+    assert meter.observe(event) is not None
+    assert meter.exceeded.startswith("cost budget exceeded ($0.0150")
+    assert estimate_cost("unknown-model", {"input_tokens": 10}) is None
+
+
+def test_budget_limits_follow_spend() -> None:
+    budget = Budget(max_cost_per_task=1.0, max_cost_per_run=1.5)
+    assert Budget().meter(1, "sonnet") is None
+    assert budget.meter(1, "sonnet").max_cost_usd == 1.0
+    budget.charge(1, 0.75)
+    budget.charge(2, 0.5)
+    assert budget.meter(1, "sonnet", stage_max_tokens=10).max_cost_usd == 0.25
+    assert budget.meter(2, "sonnet").max_cost_usd == 0.25
+    assert budget.exhausted(1) is None
+    budget.charge(1, 0.25)
+    assert budget.exhausted(1).startswith("run cost budget exhausted")
+
+
+def test_metered_sets_active_meter() -> None:
+    meter = StageMeter(model="haiku")
+    assert active_meter() is None
+    with metered(meter):
+        assert active_meter() is meter
+    assert active_meter() is None
+
+
+def test_scoped_budgets_share_run_total_but_not_task_spend() -> None:
+    shared = Budget(max_cost_per_task=1.0, max_cost_per_run=1.5)
+    repo_a, repo_b = shared.scoped(), shared.scoped()
+    repo_a.charge(1, 1.0)
+    assert repo_a.exhausted(1).startswith("task 1 cost budget exhausted")
+    assert repo_b.exhausted(1) is None
+    repo_b.charge(1, 0.5)
+    assert shared.run_cost_usd == 1.5
+    assert repo_b.exhausted(2).startswith("run cost budget exhausted")
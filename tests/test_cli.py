@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import json
+from pathlib import Path
+
 import kern.cli as cli
 
 
@@ -13,7 +16,7 @@ def test_version_flag(capsys) -> None:
 def test_cli_delegates_to_runtime(monkeypatch) -> None:
     seen = {}
 
-    def fake_run(task_id, max_tasks, hint, dry_run, verbose):
+    def fake_run(task_id, max_tasks, hint, dry_run, verbose, **options):
         seen.update(
             {
                 "task_id": task_id,
@@ -21,12 +24,13 @@ def test_cli_delegates_to_runtime(monkeypatch) -> None:
                 "hint": hint,
                 "dry_run": dry_run,
                 "verbose": verbose,
+                **options,
             }
         )
         return 0
 
     monkeypatch.setattr(cli, "run", fake_run)
-    code = cli.main(["-c", "3", "--hint", "x", "-n", "-v", "7"])
+    code = cli.main(["-c", "3", "--hint", "x", "-n", "-v", "-j", "2", "7"])
     assert code == 0
     assert seen == {
         "task_id": 7,
@@ -34,6 +38,24 @@ def test_cli_delegates_to_runtime(monkeypatch) -> None:
         "hint": "x",
         "dry_run": True,
         "verbose": True,
+        "jobs": 2,
+        "resume": False,
+        "validation_jobs": 4,
+        "command_timeout": None,
+        "cache_commands": [],
+        "profile": False,
+        "speculate": 0,
+        "route": False,
+        "compact_handoff": False,
+        "max_cost_per_task": None,
+        "max_cost_per_run": None,
+        "max_tokens_per_stage": None,
+        "stage_timeout": None,
+        "stage_retries": 2,
+        "retry_backoff": 2.0,
+        "full_revalidate": False,
+        "session_pool": False,
+        "store": "files",
     }
 
 
@@ -42,3 +64,44 @@ def test_count_must_be_positive(capsys) -> None:
     captured = capsys.readouterr()
     assert code == 1
     assert "--count must be >= 1" in captured.err
+
+
+def test_jobs_must_be_positive(capsys) -> None:
+    code = cli.main(["-j", "0"])
+    captured = capsys.readouterr()
+    assert code == 1
+    assert "--jobs must be >= 1" in captured.err
+
+
+def test_resume_selects_task(monkeypatch) -> None:
+    seen = {}
+
+    def fake_run(task_id, max_tasks, hint, dry_run, verbose, **options):
+        seen.update({"task_id": task_id, "resume": options["resume"]})
+        return 0
+
+    monkeypatch.setattr(cli, "run", fake_run)
+    assert cli.main(["--resume", "7"]) == 0
+    assert seen == {"task_id": 7, "resume": True}
+    assert cli.main(["--resume", "7", "8"]) == 1
+
+
+def test_profile_subcommand_reads_latest_run(monkeypatch, tmp_path: Path, capsys) -> None:
+    run_dir = tmp_path / ".kern" / "runs" / "20260101T000000Z-1"
+    run_dir.mkdir(parents=True)
+    event = {
+        "task_id": 3,
+        "stage_number": 2,
+        "stage_name": "Design",
+        "duration_ms": 500,
+        "monotonic_start": 10.0,
+        "monotonic_end": 10.5,
+    }
+    (run_dir / "events.jsonl").write_text(json.dumps(event) + "\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    code = cli.main(["profile"])
+    captured = capsys.readouterr()
+    assert code == 0
+    assert "Run 20260101T000000Z-1" in captured.out
+    assert "task 3  stage 2 Design" in captured.out
+    assert cli.main(["profile", "missing"]) == 1
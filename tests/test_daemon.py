@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import stat
+import tempfile
+
+from kern.client import daemon_request, format_event
+import kern.daemon as daemon
+import kern.git_snapshot as git_snapshot
+import kern.runtime as runtime
+
+
+def _exchange(socket_path: Path, payload: dict) -> list[dict]:
+    return list(daemon_request(socket_path, payload))
+
+
+def test_daemon_runs_jobs_and_streams_events(monkeypatch, tmp_path: Path) -> None:
+    calls = []
+
+    async def fake_run_async(task_id, max_tasks, hint, dry_run, verbose, *, run_dir, on_event, **options):
+        calls.append({"task_id": task_id, "max_tasks": max_tasks, "run_dir": run_dir, **options})
+        on_event({"event": "phase", "task_id": task_id, "phase": "render"})
+        on_event({"task_id": task_id, "stage_number": 2, "stage_name": "Design", "success": True, "duration_ms": 5})
+        return 0 if task_id == 7 else 1
+
+    monkeypatch.setattr(daemon, "run_async", fake_run_async)
+
+    async def scenario() -> tuple[list[dict], list[dict], list[dict], list[dict]]:
+        with tempfile.TemporaryDirectory() as short:
+            socket_path = Path(short) / "kern.sock"
+            server = daemon.KernDaemon(socket_path, max_jobs=1, run_options={"route": True})
+            stop = asyncio.Event()
+            serving = asyncio.create_task(server.serve(stop))
+            while not socket_path.exists():
+                await asyncio.sleep(0.01)
+            assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+            request = {"op": "submit", "repo": str(tmp_path), "task_id": 7, "hint": "x"}
+            followed = await asyncio.to_thread(_exchange, socket_path, request)
+            failed = await asyncio.to_thread(_exchange, socket_path, {**request, "task_id": 8})
+            status = await asyncio.to_thread(_exchange, socket_path, {"op": "status"})
+            rejected = await asyncio.to_thread(_exchange, socket_path, {"op": "submit", "repo": "relative"})
+            stop.set()
+            await serving
+            assert not socket_path.exists()
+        return followed, failed, status, rejected
+
+    followed, failed, status, rejected = asyncio.run(scenario())
+    assert followed[0]["job"]["id"] == 1
+    assert [format_event(message["event"]) for message in followed[1:-1]] == ["task 7  stage 2 Design  ok  5ms"]
+    assert followed[-1]["job"]["state"] == "succeeded"
+    assert failed[-1]["job"]["exit_code"] == 1
+    assert [job["state"] for job in status[0]["jobs"]] == ["succeeded", "failed"]
+    assert rejected == [{"error": "repo must be an absolute path"}]
+    assert calls[0] == {
+        "task_id": 7,
+        "max_tasks": 5,
+        "run_dir": tmp_path.resolve(),
+        "route": True,
+        "populate_queue": True,
+        "keep_git_snapshots": True,
+    }
+
+
+def test_daemon_skips_stage_zero_while_spec_is_unchanged(monkeypatch, tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] a\n", encoding="utf-8")
+    populated = []
+
+    async def fake_run_async(task_id, max_tasks, hint, dry_run, verbose, *, run_dir, on_event, **options):
+        populated.append(options["populate_queue"])
+        return 0
+
+    monkeypatch.setattr(daemon, "run_async", fake_run_async)
+
+    async def scenario() -> None:
+        server = daemon.KernDaemon(tmp_path / "kern.sock")
+        request = {"repo": str(tmp_path), "count": 1}
+        for edit in (None, None, "# Tasks\n- [ ] a\n- [ ] b\n", None):
+            if edit is not None:
+                (tmp_path / "SPEC.md").write_text(edit, encoding="utf-8")
+            job = server.submit(request)
+            while not job.finished:
+                await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert populated == [True, False, True, False]
+
+
+def test_daemon_runs_keep_git_metadata_warm(tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] a\n", encoding="utf-8")
+    for keep in (True, False):
+        code = asyncio.run(
+            runtime.run_async(None, 1, "", True, False, run_dir=tmp_path, keep_git_snapshots=keep)
+        )
+        assert code == 0
+        assert (tmp_path.resolve() in git_snapshot._SNAPSHOTS) is keep  # noqa: SLF001
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from kern.file_matcher import FileMatcher, compile_pattern
+from kern.types import SuccessCriterion
+from kern.validation import SuccessCriteriaValidator
+
+
+def test_matcher_reads_each_file_once_and_maps_large_files(tmp_path: Path) -> None:
+    small = tmp_path / "small.txt"
+    small.write_text("alpha\nbeta\n", encoding="utf-8")
+    large = tmp_path / "large.lock"
+    large.write_bytes(b"x" * 4096 + b"\nversion = 1.2.3\n")
+    with FileMatcher(mmap_threshold=1024) as matcher:
+        assert matcher.search(small, "beta") == (True, "literal")
+        assert matcher.search(small, "/^al.*$/") == (True, "regex")
+        assert matcher.search(large, "/^version = \\d+\\.\\d+/") == (True, "regex")
+        assert matcher.search(large, "missing") == (False, "literal")
+        assert matcher.search(tmp_path / "nope", "x") is None
+        assert matcher.reads == 2
+    assert compile_pattern("^al.*$") is compile_pattern("^al.*$")
+
+
+def test_file_contains_handles_non_utf8_files(tmp_path: Path) -> None:
+    (tmp_path / "blob.bin").write_bytes(b"\xff\xfe\x00header\x00\xc3(")
+    handoff = tmp_path / "task-1.md"
+    handoff.write_text("# Task Handoff\n", encoding="utf-8")
+    criteria = [
+        SuccessCriterion(kind="file_contains", value="blob.bin :: header"),
+        SuccessCriterion(kind="file_not_contains", value="blob.bin :: footer"),
+    ]
+    result = SuccessCriteriaValidator().validate(1, tmp_path, handoff, criteria=criteria)
+    assert [check.passed for check in result.checks] == [True, True]
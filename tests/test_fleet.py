@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from kern.budget import Budget
+import kern.fleet as fleet
+
+
+def _repos(tmp_path: Path, names: list[str]) -> list[Path]:
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.mkdir()
+        paths.append(path)
+    return paths
+
+
+def test_load_repos_resolves_relative_paths_and_skips_comments(tmp_path: Path) -> None:
+    a, b = _repos(tmp_path, ["a", "b"])
+    repos_file = tmp_path / "repos.txt"
+    repos_file.write_text(f"# services\na\n{b}  # absolute\n\na\n", encoding="utf-8")
+    assert fleet.load_repos(repos_file) == [a.resolve(), b.resolve()]
+    repos_file.write_text("missing\n", encoding="utf-8")
+    try:
+        fleet.load_repos(repos_file)
+    except fleet.FleetError as exc:
+        assert "repos.txt:1: missing is not a directory" in str(exc)
+    else:
+        raise AssertionError("expected FleetError")
+
+
+def test_scheduler_round_robins_repos_under_shared_budget(monkeypatch, tmp_path: Path) -> None:
+    repos = _repos(tmp_path, ["a", "b", "c"])
+    queues = {repos[0]: [1, 2, 3], repos[1]: [10], repos[2]: [20, 21, 22]}
+    turns: list[tuple[str, int | None]] = []
+    running = {"now": 0, "peak": 0}
+
+    async def fake_run_async(task_id, max_tasks, hint, dry_run, verbose, *, run_dir, on_event, budget, **options):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        queue = queues[run_dir]
+        task = queue.pop(0) if queue else None
+        turns.append((run_dir.name, task))
+        if task is None:
+            on_event({"run_id": "r", "stage_number": 1, "success": True, "queue_empty": True, "task_id": None})
+            return 0
+        on_event({"run_id": f"r{task}", "stage_number": 1, "success": True, "task_id": task, "total_cost_usd": 1.0})
+        budget.charge(task, 1.0)
+        return 1 if task == 20 else 0
+
+    monkeypatch.setattr(fleet, "run_async", fake_run_async)
+    scheduler = fleet.FleetScheduler(
+        repos,
+        fleet_dir=tmp_path / "fleet",
+        max_concurrent=2,
+        budget=Budget(max_cost_per_run=4.0),
+    )
+    report = asyncio.run(scheduler.run())
+
+    assert running["peak"] == 2
+    assert turns[:3] == [("a", 1), ("b", 10), ("c", 20)]
+    statuses = {repo["label"]: (repo["status"], repo["tasks_completed"]) for repo in report["repos"]}
+    assert statuses == {"a": ("budget", 2), "b": ("done", 1), "c": ("failed", 0)}
+    assert report["cost_usd"] == 4.0
+    assert report["failed"] == ["c"]
+    assert json.loads((tmp_path / "fleet" / "report.json").read_text(encoding="utf-8")) == report
+    events = (tmp_path / "fleet" / "events.jsonl").read_text(encoding="utf-8").splitlines()
+    assert {json.loads(line)["repo"] for line in events} == {"a", "b", "c"}
+
+
+def test_task_budget_is_kept_per_repo(monkeypatch, tmp_path: Path) -> None:
+    repos = _repos(tmp_path, ["a", "b"])
+    queues = {repos[0]: [1, 2], repos[1]: [1, 2]}
+    blocked: list[tuple[str, int]] = []
+
+    async def fake_run_async(task_id, max_tasks, hint, dry_run, verbose, *, run_dir, on_event, budget, **options):
+        queue = queues[run_dir]
+        if not queue:
+            on_event({"run_id": "r", "stage_number": 1, "success": True, "queue_empty": True, "task_id": None})
+            return 0
+        task = queue.pop(0)
+        if budget.exhausted(task) is not None:
+            blocked.append((run_dir.name, task))
+            return 1
+        on_event({"run_id": f"r{task}", "stage_number": 1, "success": True, "task_id": task})
+        budget.charge(task, 0.75)
+        await asyncio.sleep(0)
+        return 0
+
+    monkeypatch.setattr(fleet, "run_async", fake_run_async)
+    shared = Budget(max_cost_per_task=1.0, max_cost_per_run=10.0)
+    report = asyncio.run(fleet.FleetScheduler(repos, fleet_dir=tmp_path / "fleet", budget=shared).run())
+
+    assert blocked == []
+    assert {repo["label"]: repo["tasks_completed"] for repo in report["repos"]} == {"a": 2, "b": 2}
+    assert report["cost_usd"] == 3.0
+    assert shared.task_cost_usd == {}
@@ -0,0 +1,74 @@
+from pathlib import Path
+import subprocess
+
+from kern.git_snapshot import GitSnapshot, close_git_snapshots, git_snapshot
+
+
+def _init_repo(path: Path) -> None:
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    subprocess.run(["git", "config", "user.name", "kern"], cwd=path, check=True)
+    subprocess.run(["git", "config", "user.email", "kern@example.com"], cwd=path, check=True)
+    (path / "a.txt").write_text("a\n", encoding="utf-8")
+    (path / "b.txt").write_text("b\n", encoding="utf-8")
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=path, check=True)
+
+
+def test_snapshot_matches_git_diff_name_order(tmp_path: Path) -> None:
+    _init_repo(tmp_path)
+    (tmp_path / "b.txt").write_text("b2\n", encoding="utf-8")
+    subprocess.run(["git", "add", "b.txt"], cwd=tmp_path, check=True)
+    (tmp_path / "a.txt").write_text("a2\n", encoding="utf-8")
+    snapshot = GitSnapshot(tmp_path)
+    assert snapshot.changed_files() == ["a.txt", "b.txt"]
+    assert snapshot.has_changes() is True
+    assert "+a2" in snapshot.patch()
+    assert "+b2" in snapshot.patch()
+    assert "[" in snapshot.recent_commits()
+
+
+def test_snapshot_reuses_output_until_tree_changes(tmp_path: Path) -> None:
+    _init_repo(tmp_path)
+    (tmp_path / "a.txt").write_text("a2\n", encoding="utf-8")
+    snapshot = GitSnapshot(tmp_path)
+    first = snapshot.patch()
+    calls = snapshot.git_calls
+    snapshot.diff_stat()
+    snapshot.changed_files()
+    snapshot.patch()
+    assert snapshot.git_calls == calls + 1
+
+    snapshot.mark_stale()
+    assert snapshot.patch() == first
+    assert snapshot.git_calls == calls + 2
+
+    (tmp_path / "a.txt").write_text("a3 changed size\n", encoding="utf-8")
+    snapshot.mark_stale()
+    assert "+a3 changed size" in snapshot.patch()
+
+
+def test_snapshot_reports_branch_and_root_from_status(tmp_path: Path) -> None:
+    _init_repo(tmp_path)
+    subprocess.run(["git", "checkout", "-qb", "feature/x"], cwd=tmp_path, check=True)
+    (tmp_path / "sub").mkdir()
+    snapshot = GitSnapshot(tmp_path / "sub")
+    assert snapshot.branch() == "feature/x"
+    calls = snapshot.git_calls
+    assert snapshot.root() == tmp_path.resolve()
+    snapshot.root()
+    assert snapshot.git_calls == calls + 1
+
+
+def test_closing_snapshots_drops_the_root_and_paths_under_it(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    worktree = repo / ".kern" / "worktrees" / "run-1"
+    other = tmp_path / "other"
+    for path in (worktree, other):
+        path.mkdir(parents=True, exist_ok=True)
+    snapshots = {path: git_snapshot(path) for path in (repo, worktree, other)}
+
+    close_git_snapshots(repo)
+    assert git_snapshot(repo) is not snapshots[repo]
+    assert git_snapshot(worktree) is not snapshots[worktree]
+    assert git_snapshot(other) is snapshots[other]
+    close_git_snapshots(tmp_path)
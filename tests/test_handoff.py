@@ -1,6 +1,16 @@
 from pathlib import Path
 
-from kern.handoff import append_handoff_block, ensure_handoff_dir, handoff_path, init_handoff_file
+from kern.handoff import (
+    TRUNCATED_MARKER,
+    append_handoff_block,
+    append_validation_result,
+    ensure_handoff_dir,
+    handoff_path,
+    handoff_view_path,
+    init_handoff_file,
+    write_handoff_view,
+)
+from kern.types import ValidationCheckResult, ValidationResult
 
 
 def test_init_and_append_handoff(tmp_path: Path) -> None:
@@ -22,3 +32,46 @@ def test_append_handoff_requires_block(tmp_path: Path) -> None:
     except RuntimeError:
         return
     raise AssertionError("append_handoff_block should fail when required block is missing")
+
+
+def test_handoff_view_keeps_latest_sections_and_state(tmp_path: Path) -> None:
+    handoff_dir = tmp_path / ".kern" / "handoff"
+    ensure_handoff_dir(handoff_dir)
+    file_path = handoff_path(handoff_dir, 4)
+    init_handoff_file(file_path, task_id=4, hint="", run_dir=tmp_path)
+    for block in ("## Research\n- old", "## Design\n- design", "## Research\n- new", "## Implement\n- done"):
+        append_handoff_block(file_path, block, required=True)
+    failed = ValidationCheckResult(criterion="tests", kind="command_succeeds", passed=False, details="exit 1")
+    passed = ValidationCheckResult(criterion="tests", kind="command_succeeds", passed=True, details="ok")
+    append_validation_result(file_path, ValidationResult(passed=False, checks=[failed]), attempt=1)
+    append_validation_result(file_path, ValidationResult(passed=True, checks=[passed]), attempt=2)
+    state = {"planned_files": ["src/a.py"], "success_criteria": [{"kind": "file_exists", "value": "src/a.py"}]}
+
+    view_file = handoff_view_path(handoff_dir, 4, 3)
+    full_bytes, view_bytes = write_handoff_view(file_path, view_file, 3, state)
+    assert full_bytes == len(file_path.read_bytes())
+    view = view_file.read_text(encoding="utf-8")
+    assert view_bytes == len(view.encode("utf-8"))
+    assert "Task ID: 4" in view
+    assert f"Full log: {file_path}" in view
+    assert "- new" in view and "- old" not in view
+    assert "## Implement" not in view and "## Validation" not in view
+    assert "- Planned files: src/a.py" in view
+    assert "  - file_exists: src/a.py" in view
+
+    write_handoff_view(file_path, view_file, 5, state)
+    view = view_file.read_text(encoding="utf-8")
+    assert "## Research" not in view
+    assert view.count("## Validation\n") == 1
+    assert "- Attempt: 2" in view
+    assert "## Validation History\n- Attempt 1: FAILED (tests)" in view
+
+
+def test_handoff_view_is_size_bounded(tmp_path: Path) -> None:
+    file_path = tmp_path / "task-1.md"
+    file_path.write_text("# Task Handoff\n\n## Research\n" + "- line\n" * 5000, encoding="utf-8")
+    view_file = tmp_path / "views" / "task-1-stage-2.md"
+    _, view_bytes = write_handoff_view(file_path, view_file, 2, {}, max_bytes=2048)
+    view = view_file.read_text(encoding="utf-8")
+    assert view_bytes <= 2048
+    assert TRUNCATED_MARKER in view
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from kern.profiling import Span, critical_path, format_profile, time_sinks
+
+
+def test_critical_path_follows_latest_finishing_chain() -> None:
+    spans = [
+        Span(task_id=None, label="stage 0", start=0.0, end=1.0),
+        Span(task_id=1, label="stage 1", start=1.0, end=2.0),
+        Span(task_id=2, label="stage 1", start=1.0, end=1.5),
+        Span(task_id=1, label="stage 2", start=2.0, end=5.0),
+        Span(task_id=2, label="stage 2", start=1.5, end=3.0),
+    ]
+    path = critical_path(spans)
+    assert [(span.task_id, span.label) for span in path] == [
+        (None, "stage 0"),
+        (1, "stage 1"),
+        (1, "stage 2"),
+    ]
+
+
+def test_time_sinks_split_profiled_stages_and_checks() -> None:
+    events = [
+        {"stage_number": 5, "duration_ms": 900, "profile": {"render_ms": 2, "model_ms": 800, "parse_ms": 1}},
+        {"stage_number": 2, "duration_ms": 300},
+        {"event": "phase", "stage_number": 5, "phase": "validation", "duration_ms": 120},
+        {"event": "validation_check", "criterion": "command_succeeds: pytest", "duration_ms": 110},
+    ]
+    sinks = time_sinks(events)
+    assert sinks[0] == ("stage 5 model", 800.0, 1)
+    assert ("stage 2 total", 300.0, 1) in sinks
+    assert ("check command_succeeds: pytest", 110.0, 1) in sinks
+    assert "No timed events" in format_profile("run", events)
@@ -11,6 +11,15 @@ def test_parse_prompt_template_reads_model(tmp_path: Path) -> None:
     assert parsed.body.strip() == "Hello {TASK_ID}"
 
 
+def test_parse_prompt_template_reads_limits(tmp_path: Path) -> None:
+    template = tmp_path / "template.md"
+    template.write_text("---\nmodel: opus\ntimeout: 900\nmax_tokens: 200000\n---\nHello\n", encoding="utf-8")
+    parsed = parse_prompt_template(template)
+    assert parsed.model == "opus"
+    assert parsed.timeout_seconds == 900.0
+    assert parsed.max_tokens == 200000
+
+
 def test_render_prompt_replaces_placeholders() -> None:
     rendered = render_prompt("Task {TASK_ID} / {HINT}", {"TASK_ID": "7", "HINT": "ok"})
     assert rendered == "Task 7 / ok"
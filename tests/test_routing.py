@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from kern.routing import ModelRouter, TaskSize, task_size
+from kern.stats import Aggregate, index_path
+
+
+def _history(count: int, failures: int = 0, cost: float = 0.1, duration_ms: int = 1000) -> Aggregate:
+    aggregate = Aggregate()
+    for index in range(count):
+        aggregate.add_event(
+            {
+                "duration_ms": duration_ms,
+                "success": index >= failures,
+                "total_cost_usd": cost,
+            }
+        )
+    return aggregate
+
+
+def test_task_size_reads_stage1_research_metadata() -> None:
+    metadata = {"research": {"files": ["a.py", "b.py", ""], "constraints": ["x"]}}
+    assert task_size(metadata) == TaskSize(files=2, constraints=1)
+    assert task_size({"research": {"pattern": "x"}}) is None
+    assert task_size(None) is None
+
+
+def test_router_downsizes_small_tasks_and_escalates() -> None:
+    router = ModelRouter()
+    small = TaskSize(files=1, constraints=0)
+    large = TaskSize(files=12, constraints=3)
+    assert router.choose(2, "opus", small) == "haiku"
+    assert router.choose(5, "opus", small) == "sonnet"
+    assert router.choose(2, "opus", large) == "opus"
+    assert router.choose(2, "opus", None) == "opus"
+    assert router.choose(1, "opus", small) == "opus"
+    assert router.choose(2, "sonnet", small, escalation=1) == "sonnet"
+    assert router.choose(2, "opus", small, escalation=5) == "opus"
+    assert router.choose(2, "sonnet", small, escalation=5) == "sonnet"
+    assert router.choose(2, "haiku", None, escalation=1) == "haiku"
+    assert router.can_escalate("haiku", "sonnet")
+    assert not router.can_escalate("sonnet", "sonnet")
+    assert not router.can_escalate("haiku", "custom-model")
+
+
+def test_router_skips_models_with_poor_history() -> None:
+    router = ModelRouter(
+        history={
+            "2 haiku": _history(10, failures=4),
+            "3 haiku": _history(10, cost=0.5, duration_ms=5000),
+            "3 opus": _history(10, cost=0.2, duration_ms=2000),
+        }
+    )
+    small = TaskSize(files=1, constraints=1)
+    assert router.choose(2, "opus", small) == "sonnet"
+    assert router.choose(3, "opus", small) == "sonnet"
+    assert router.choose(4, "opus", small) == "haiku"
+
+
+def test_router_reads_stats_without_writing_the_index(tmp_path: Path) -> None:
+    kern_dir = tmp_path / ".kern"
+    (kern_dir / "runs" / "run-1").mkdir(parents=True)
+    (kern_dir / "runs" / "run-1" / "events.jsonl").write_text(
+        json.dumps({"stage_number": 2, "model": "haiku", "duration_ms": 10, "success": True}) + "\n",
+        encoding="utf-8",
+    )
+    router = ModelRouter.from_kern_dir(kern_dir)
+    assert router.history["2 haiku"].count == 1
+    assert not index_path(kern_dir).exists()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from kern.profiling import latest_run_id, load_events
+from kern.run_store import RunStore, export_store, store_path
+from kern.runlog import RunLogger
+from kern.state import save_task_state
+from kern.stats import collect_stats
+from kern.types import IterationEvaluation, StageExecution, StageSpec
+
+
+def _log_stage(logger: RunLogger, task_id: int, number: int) -> None:
+    logger.log_stage_event(
+        task_id=task_id,
+        stage=StageSpec(number, f"Stage{number}", Path("p.md"), "haiku", None, "default"),
+        model="haiku",
+        started_at="2026-01-01T00:00:00Z",
+        ended_at="2026-01-01T00:00:01Z",
+        duration_ms=1000,
+        execution=StageExecution(raw_output="", success=True, task_id=task_id, skip=False, total_cost_usd=0.5),
+    )
+
+
+def _evaluation(score: int) -> IterationEvaluation:
+    return IterationEvaluation(
+        task_id=3,
+        attempt=1,
+        score=score,
+        critical_failures=[],
+        advisories=[],
+        passed_soft_gate=True,
+        timestamp_utc="2026-01-01T00:00:00Z",
+    )
+
+
+def test_sqlite_store_replaces_jsonl_and_exports_file_layout(tmp_path: Path) -> None:
+    kern_dir = tmp_path / ".kern"
+    save_task_state(kern_dir / "state", 3, {"task_id": 3, "planned_files": ["a.py"]})
+    logger = RunLogger(kern_dir, "run-1", store=RunStore(store_path(kern_dir)))
+    logger.log_phase(task_id=3, stage_number=2, phase="render", monotonic_start=1.0, monotonic_end=1.5)
+    _log_stage(logger, 3, 2)
+    logger.append_evaluation(_evaluation(70))
+    assert logger.previous_score(3) == 70
+    _log_stage(logger, 3, 3)
+    logger.close()
+
+    assert not (kern_dir / "runs").exists()
+    store = RunStore(store_path(kern_dir))
+    assert [event["stage_number"] for _, event in store.events(task_id=3, kind="stage")] == [2, 3]
+    assert [event["phase"] for _, event in store.events(run_id="run-1", kind="phase")] == ["render"]
+    assert store.task_states() == {3: {"task_id": 3, "planned_files": ["a.py"]}}
+
+    counts = export_store(store, kern_dir / "export")
+    store.close()
+    assert counts == {"runs": 1, "reports": 1, "states": 1}
+    exported = (kern_dir / "export" / "runs" / "run-1" / "events.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line).get("event", "stage") for line in exported] == ["phase", "stage", "stage"]
+    report = json.loads((kern_dir / "export" / "reports" / "task-3.jsonl").read_text(encoding="utf-8"))
+    assert report["score"] == 70
+    state = json.loads((kern_dir / "export" / "state" / "task-3.json").read_text(encoding="utf-8"))
+    assert state["planned_files"] == ["a.py"]
+
+    assert latest_run_id(kern_dir) == "run-1"
+    assert len(load_events(kern_dir, "run-1")) == 3
+    index, read = collect_stats(kern_dir)
+    assert read == 1
+    assert index.groups["task"]["3"].count == 2
+    assert index.groups["task"]["3"].evaluations == 1
+    assert collect_stats(kern_dir)[1] == 0
+
+
+def test_store_batches_writes_and_shares_database_across_connections(tmp_path: Path) -> None:
+    path = tmp_path / "kern.db"
+    first = RunStore(path, batch_size=3)
+    second = RunStore(path)
+    first.append_event({"run_id": "a", "event": "phase"})
+    first.append_event({"run_id": "a", "event": "phase"})
+    assert list(second.events()) == []
+    first.append_event({"run_id": "a", "event": "phase"})
+    second.append_event({"run_id": "b", "task_id": 1, "stage_number": 1})
+    second.flush()
+    assert [event["run_id"] for _, event in second.events()] == ["a", "a", "a", "b"]
+    assert first.run_ids() == ["a", "b"]
+    assert first.max_ids() == (4, 0)
+    first.close()
+    second.close()
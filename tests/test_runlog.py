@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from kern.runlog import RunLogger
+from kern.types import IterationEvaluation
+
+
+def _evaluation(attempt: int, score: int) -> IterationEvaluation:
+    return IterationEvaluation(
+        task_id=3,
+        attempt=attempt,
+        score=score,
+        critical_failures=[],
+        advisories=[],
+        passed_soft_gate=True,
+        timestamp_utc="2026-01-01T00:00:00Z",
+    )
+
+
+def test_report_index_tracks_scores_incrementally(tmp_path: Path) -> None:
+    logger = RunLogger(tmp_path / ".kern", "run")
+    assert logger.previous_score(3) is None
+
+    logger.append_evaluation(_evaluation(1, 70))
+    logger.append_evaluation(_evaluation(2, 90))
+    logger.append_evaluation(_evaluation(1, 80))
+
+    index_file = tmp_path / ".kern" / "reports" / "task-3.index.json"
+    index = json.loads(index_file.read_text(encoding="utf-8"))
+    assert logger.previous_score(3) == 80
+    assert index["attempts"] == 3
+    assert index["best_score"] == 90
+    assert index["offset"] == (tmp_path / ".kern" / "reports" / "task-3.jsonl").stat().st_size
+
+
+def test_report_index_rebuilds_when_missing_or_corrupt(tmp_path: Path) -> None:
+    logger = RunLogger(tmp_path / ".kern", "run")
+    logger.append_evaluation(_evaluation(1, 60))
+    logger.append_evaluation(_evaluation(2, 85))
+    index_file = tmp_path / ".kern" / "reports" / "task-3.index.json"
+
+    index_file.unlink()
+    assert logger.previous_score(3) == 85
+
+    index_file.write_text("{not json", encoding="utf-8")
+    assert logger.report_index(3)["attempts"] == 2
+
+    index_file.write_text(json.dumps({"task_id": 3, "offset": 10**9, "attempts": 9}), encoding="utf-8")
+    assert logger.report_index(3)["best_score"] == 85
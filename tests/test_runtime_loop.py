@@ -1,8 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, replace
+import json
 from pathlib import Path
+import re
+import subprocess
 
+import pytest
+
+from kern.budget import active_meter
+from kern.run_store import RunStore
 import kern.runtime as runtime
 from kern.types import (
     MachineEnvelope,
@@ -36,7 +44,9 @@ class FakeValidator:
     def __post_init__(self) -> None:
         self.calls = 0
 
-    def validate(self, task_id: int, run_dir: Path, handoff_file: Path, criteria=None) -> ValidationResult:
+    def validate(
+        self, task_id: int, run_dir: Path, handoff_file: Path, criteria=None, previous=None
+    ) -> ValidationResult:
         self.calls += 1
         if not self.results:
             return ValidationResult(
@@ -46,6 +56,11 @@ class FakeValidator:
         return self.results.pop(0)
 
 
+class LegacyValidator(FakeValidator):
+    def validate(self, task_id: int, run_dir: Path, handoff_file: Path, criteria=None) -> ValidationResult:
+        return super().validate(task_id, run_dir, handoff_file, criteria)
+
+
 def stage_output(
     raw: str,
     *,
@@ -135,7 +150,8 @@ def test_skip_short_circuits_after_research(tmp_path: Path) -> None:
     assert "## Plan" not in content
 
 
-def test_validate_fix_retry_then_commit(monkeypatch, tmp_path: Path) -> None:
+@pytest.mark.parametrize(("store", "validator_type"), [("files", FakeValidator), ("sqlite", LegacyValidator)])
+def test_validate_fix_retry_then_commit(monkeypatch, tmp_path: Path, store: str, validator_type: type) -> None:
     (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
     monkeypatch.setattr(runtime, "_git_has_changes", lambda _: True)
 
@@ -147,7 +163,7 @@ def test_validate_fix_retry_then_commit(monkeypatch, tmp_path: Path) -> None:
         passed=True,
         checks=[ValidationCheckResult("file_exists: foo.txt", "file_exists", True, "ok")],
     )
-    validator = FakeValidator([fail, success])
+    validator = validator_type([fail, success])
     runner = FakeRunner(
         stages={
             1: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Research\n- Summary: r", stage=1)],
@@ -186,7 +202,523 @@ def test_validate_fix_retry_then_commit(monkeypatch, tmp_path: Path) -> None:
         stage_runner=runner,
         validator=validator,
         run_dir=tmp_path,
+        store=store,
     )
     assert code == 0
     assert validator.calls == 2
     assert runner.calls == [1, 2, 3, 4, 5, 5, 6]
+    assert (tmp_path / ".kern" / "runs").exists() == (store == "files")
+    if store == "sqlite":
+        run_store = RunStore(tmp_path / ".kern" / "kern.db")
+        assert [event["stage_number"] for _, event in run_store.events(task_id=5, kind="stage")] == [1, 2, 3, 4, 5, 5, 6]
+        assert [evaluation["attempt"] for _, evaluation in run_store.evaluations(task_id=5)] == [1, 2]
+        assert run_store.task_states()[5]["completed_stages"] == [1, 2, 3, 4, 5, 6]
+        run_store.close()
+
+
+@dataclass
+class ParallelFakeRunner:
+    pending: list[int]
+
+    def __post_init__(self) -> None:
+        self.calls: list[tuple[int, int | None]] = []
+
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        match = re.search(r"^Task ID: (\d*)$", prompt, flags=re.MULTILINE)
+        task_id = int(match.group(1)) if match and match.group(1) else None
+        self.calls.append((stage.number, task_id))
+        if stage.number == 0:
+            return stage_output("SUCCESS", stage=0)
+        if stage.number == 1 and task_id is None:
+            if not self.pending:
+                return stage_output("SUCCESS task_id=none", queue_empty=True, handoff="## Research", stage=1)
+            task_id = self.pending.pop(0)
+            _mark_spec_line(cwd, task_id, "~")
+        await asyncio.sleep(0)
+        if stage.number == 5:
+            (cwd / f"task-{task_id}.txt").write_text("done\n", encoding="utf-8")
+            subprocess.run(["git", "add", "-N", f"task-{task_id}.txt"], cwd=cwd, check=True)
+        if stage.number == 6:
+            subprocess.run(["git", "add", f"task-{task_id}.txt"], cwd=cwd, check=True)
+            subprocess.run(["git", "commit", "-qm", f"task {task_id}"], cwd=cwd, check=True)
+            _mark_spec_line(cwd, task_id, "x")
+            return stage_output("SUCCESS", handoff="## Review & Commit", stage=6)
+        criteria = [SuccessCriterion(kind="file_exists", value=f"task-{task_id}.txt")] if stage.number == 4 else None
+        return stage_output(
+            f"SUCCESS task_id={task_id}",
+            task_id=task_id,
+            handoff=f"## Stage {stage.number}",
+            stage=stage.number,
+            criteria=criteria,
+        )
+
+
+def _mark_spec_line(cwd: Path, task_id: int, mark: str) -> None:
+    # Like the real prompts: Stage 1 marks the SPEC line [~], Stage 6 marks it [x] after the commit.
+    spec = cwd / "SPEC.md"
+    lines = spec.read_text(encoding="utf-8").splitlines()
+    items = [index for index, line in enumerate(lines) if line.startswith("- [")]
+    line = lines[items[task_id - 1]]
+    lines[items[task_id - 1]] = f"- [{mark}]{line[5:]}"
+    spec.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_parallel_jobs_commit_each_task_onto_main(tmp_path: Path) -> None:
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "config", "user.name", "kern"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "config", "user.email", "kern@example.com"], cwd=tmp_path, check=True)
+    (tmp_path / ".gitignore").write_text(".kern/\n", encoding="utf-8")
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] a\n- [ ] b\n- [ ] c\n", encoding="utf-8")
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=tmp_path, check=True)
+
+    runner = ParallelFakeRunner(pending=[1, 2, 3])
+    code = runtime.run(
+        task_id=None,
+        max_tasks=5,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        jobs=2,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    log = subprocess.run(["git", "log", "--format=%s"], cwd=tmp_path, capture_output=True, text=True, check=True)
+    assert code == 0
+    assert sorted(log.stdout.split("\n")[:3]) == ["task 1", "task 2", "task 3"]
+    for task_id in (1, 2, 3):
+        assert (tmp_path / f"task-{task_id}.txt").exists()
+        assert (tmp_path / ".kern" / "handoff" / f"task-{task_id}.md").exists()
+        state = json.loads((tmp_path / ".kern" / "state" / f"task-{task_id}.json").read_text(encoding="utf-8"))
+        assert state["completed_stages"] == [1, 2, 3, 4, 5, 6]
+    assert sorted(task for stage, task in runner.calls if stage == 6) == [1, 2, 3]
+    assert not list((tmp_path / ".kern" / "worktrees").iterdir())
+    assert (tmp_path / "SPEC.md").read_text(encoding="utf-8") == "# Tasks\n- [x] a\n- [x] b\n- [x] c\n"
+
+
+@dataclass
+class ReadyLinesRunner(ParallelFakeRunner):
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        if stage.number == 1 and re.search(r"^Task ID: $", prompt, flags=re.MULTILINE):
+            ready = re.search(r"^Ready SPEC Lines: (.*)$", prompt, flags=re.MULTILINE).group(1).split(", ")
+            active = re.search(r"^Active Tasks: (.*)$", prompt, flags=re.MULTILINE).group(1).split(", ")
+            # Task N sits on SPEC line N + 1, below the "# Tasks" heading.
+            choices = [task for task in self.pending if str(task + 1) in ready and str(task) not in active]
+            if not choices:
+                self.calls.append((1, None))
+                return stage_output("SUCCESS task_id=none", queue_empty=True, handoff="## Research", stage=1)
+            self.pending.remove(choices[0])
+            self.pending.insert(0, choices[0])
+        return await super().run_stage(stage, prompt, cwd, model)
+
+
+def test_parallel_jobs_follow_dependencies_marked_on_main(tmp_path: Path) -> None:
+    _init_repo(tmp_path, "# Tasks\n- [ ] a\n- [ ] b (after: 1)\n- [ ] c (after: 2)\n- [ ] d\n")
+    runner = ReadyLinesRunner(pending=[1, 2, 3, 4])
+    code = runtime.run(
+        task_id=None,
+        max_tasks=5,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        jobs=2,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    log = subprocess.run(["git", "log", "--format=%s"], cwd=tmp_path, capture_output=True, text=True, check=True)
+    commits = log.stdout.split("\n")[:4][::-1]
+    assert code == 0
+    assert sorted(commits) == ["task 1", "task 2", "task 3", "task 4"]
+    assert commits.index("task 1") < commits.index("task 2") < commits.index("task 3")
+    assert (tmp_path / "SPEC.md").read_text(encoding="utf-8").count("- [x]") == 4
+
+
+def _init_repo(path: Path, spec: str) -> None:
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    subprocess.run(["git", "config", "user.name", "kern"], cwd=path, check=True)
+    subprocess.run(["git", "config", "user.email", "kern@example.com"], cwd=path, check=True)
+    (path / ".gitignore").write_text(".kern/\n", encoding="utf-8")
+    (path / "SPEC.md").write_text(spec, encoding="utf-8")
+    (path / "shared.txt").write_text("v1\n", encoding="utf-8")
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=path, check=True)
+
+
+@dataclass
+class SharedFileRunner(ParallelFakeRunner):
+    touch_shared_in: int | None = None
+
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        match = re.search(r"^Task ID: (\d*)$", prompt, flags=re.MULTILINE)
+        task_id = int(match.group(1)) if match and match.group(1) else None
+        if stage.number == 6 and task_id == self.touch_shared_in:
+            (cwd / "shared.txt").write_text("v2\n", encoding="utf-8")
+            subprocess.run(["git", "add", "shared.txt"], cwd=cwd, check=True)
+        if stage.number == 6:
+            await asyncio.sleep(0.05)
+        result = await super().run_stage(stage, prompt, cwd, model)
+        if stage.number == 2:
+            result.raw_output = f"read shared.txt\n{result.raw_output}"
+        return result
+
+
+def test_speculation_researches_next_task_during_commit(tmp_path: Path) -> None:
+    _init_repo(tmp_path, "# Tasks\n- [ ] a\n- [ ] b\n")
+    runner = SharedFileRunner(pending=[1, 2])
+    code = runtime.run(
+        task_id=None,
+        max_tasks=5,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        speculate=4,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    state = json.loads((tmp_path / ".kern" / "state" / "task-2.json").read_text(encoding="utf-8"))
+    assert code == 0
+    assert [stage for stage, task in runner.calls if task == 2] == [2, 3, 4, 5, 6]
+    assert runner.calls.index((2, 2)) < runner.calls.index((6, 1))
+    assert state["completed_stages"] == [1, 2, 3, 4, 5, 6]
+    assert not (tmp_path / ".kern" / "speculative").exists() or not any((tmp_path / ".kern" / "speculative").iterdir())
+
+
+def test_speculation_reruns_stages_that_read_committed_files(tmp_path: Path) -> None:
+    _init_repo(tmp_path, "# Tasks\n- [ ] a\n- [ ] b\n")
+    runner = SharedFileRunner(pending=[1, 2], touch_shared_in=1)
+    code = runtime.run(
+        task_id=None,
+        max_tasks=2,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        speculate=4,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    task_two = [stage for stage, task in runner.calls if task == 2]
+    assert code == 0
+    assert task_two == [2, 3, 4, 2, 3, 4, 5, 6]
+    handoff = (tmp_path / ".kern" / "handoff" / "task-2.md").read_text(encoding="utf-8")
+    assert handoff.count("## Stage 2") == 1
+
+
+def test_resume_reenters_at_first_incomplete_stage(monkeypatch, tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
+    monkeypatch.setattr(runtime, "_git_has_changes", lambda _: True)
+    state_dir = tmp_path / ".kern" / "state"
+    state_dir.mkdir(parents=True)
+    (state_dir / "task-5.json").write_text(
+        json.dumps(
+            {
+                "task_id": 5,
+                "completed_stages": [1, 2, 3, 4],
+                "success_criteria": [{"kind": "file_exists", "value": "README.md"}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    handoff_dir = tmp_path / ".kern" / "handoff"
+    handoff_dir.mkdir(parents=True)
+    (handoff_dir / "task-5.md").write_text("# Task Handoff\n## Plan\n- Steps: p\n", encoding="utf-8")
+    runner = FakeRunner(
+        stages={
+            5: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Implement\n- Summary: x", stage=5)],
+            6: [stage_output("SUCCESS", handoff="## Review & Commit\n- Commit: x", stage=6)],
+        }
+    )
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        resume=True,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    state = json.loads((state_dir / "task-5.json").read_text(encoding="utf-8"))
+    assert code == 0
+    assert runner.calls == [5, 6]
+    assert state["completed_stages"] == [1, 2, 3, 4, 5, 6]
+
+
+def test_profile_records_phase_breakdown(monkeypatch, tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
+    monkeypatch.setattr(runtime, "_git_has_changes", lambda _: False)
+    state_dir = tmp_path / ".kern" / "state"
+    state_dir.mkdir(parents=True)
+    (state_dir / "task-5.json").write_text(
+        json.dumps(
+            {
+                "task_id": 5,
+                "completed_stages": [1, 2, 3, 4],
+                "success_criteria": [{"kind": "file_exists", "value": "README.md"}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    handoff_dir = tmp_path / ".kern" / "handoff"
+    handoff_dir.mkdir(parents=True)
+    (handoff_dir / "task-5.md").write_text("# Task Handoff\n## Plan\n- Steps: p\n", encoding="utf-8")
+    runner = FakeRunner(
+        stages={5: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Implement\n- Summary: x", stage=5)]}
+    )
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        resume=True,
+        profile=True,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    events_file = next((tmp_path / ".kern" / "runs").glob("*/events.jsonl"))
+    events = [json.loads(line) for line in events_file.read_text(encoding="utf-8").splitlines()]
+    stage_event = next(event for event in events if event.get("stage_number") == 5 and "event" not in event)
+    phases = {event["phase"] for event in events if event.get("event") == "phase"}
+    assert code == 0
+    assert set(stage_event["profile"]) == {"render_ms", "model_ms"}
+    assert stage_event["monotonic_end"] >= stage_event["monotonic_start"]
+    assert phases == {"handoff_write", "validation"}
+    assert any(event.get("event") == "validation_check" for event in events)
+
+
+def test_route_escalates_after_contract_failure(monkeypatch, tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
+    monkeypatch.setattr(runtime, "_git_has_changes", lambda _: False)
+    first = stage_output("SUCCESS task_id=5", task_id=5, handoff="## Research\n- Summary: r", stage=1)
+    first.machine = replace(first.machine, metadata={"research": {"files": ["README.md"], "constraints": []}})
+    broken = StageExecution(
+        raw_output="oops",
+        success=False,
+        task_id=None,
+        skip=False,
+        error="Missing <<MACHINE>> block for stage 2",
+    )
+    runner = FakeRunner(
+        stages={
+            1: [first],
+            2: [broken, stage_output("SUCCESS task_id=5", task_id=5, handoff="## Design\n- Decisions: d", stage=2)],
+            3: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Structure\n- Files: s", stage=3)],
+            4: [
+                stage_output(
+                    "SUCCESS task_id=5",
+                    task_id=5,
+                    handoff="## Plan\n- Steps: p",
+                    stage=4,
+                    criteria=[SuccessCriterion(kind="file_exists", value="SPEC.md")],
+                )
+            ],
+            5: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Implement\n- Summary: x", stage=5)],
+        }
+    )
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        route=True,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    events_file = next((tmp_path / ".kern" / "runs").glob("*/events.jsonl"))
+    events = [json.loads(line) for line in events_file.read_text(encoding="utf-8").splitlines()]
+    models = [(event["stage_number"], event["model"]) for event in events]
+    assert code == 0
+    assert runner.calls == [1, 2, 2, 3, 4, 5]
+    assert models == [(1, "opus"), (2, "haiku"), (2, "sonnet"), (3, "haiku"), (4, "haiku"), (5, "sonnet")]
+    assert events[1]["routed_from"] == "opus"
+
+
+def test_route_does_not_escalate_after_transport_failure(tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
+    first = stage_output("SUCCESS task_id=5", task_id=5, handoff="## Research\n- Summary: r", stage=1)
+    first.machine = replace(first.machine, metadata={"research": {"files": ["README.md"], "constraints": []}})
+    broken = StageExecution(
+        raw_output="", success=False, task_id=None, skip=False, error="CLI exited", failure_kind="sdk_error"
+    )
+    runner = FakeRunner(stages={1: [first], 2: [broken]})
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        route=True,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    assert code == 1
+    assert runner.calls == [1, 2]
+
+
+@dataclass
+class MeteredRunner(FakeRunner):
+    stream_tokens: int = 0
+
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        meter = active_meter()
+        if meter is not None and stage.number == 5:
+            self.calls.append(stage.number)
+            meter.observe({"type": "message_start", "message": {"usage": {"input_tokens": self.stream_tokens}}})
+            return StageExecution(
+                raw_output="",
+                success=False,
+                task_id=None,
+                skip=False,
+                error=f"Stage 5 cancelled: {meter.exceeded}",
+                usage=meter.usage(),
+                failure_kind="budget",
+            )
+        return await super().run_stage(stage, prompt, cwd, model)
+
+
+def _budget_stages(cost: float) -> dict[int, list[StageExecution]]:
+    stages = {
+        1: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Research\n- Summary: r", stage=1)],
+        2: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Design\n- Decisions: d", stage=2)],
+        3: [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Structure\n- Files: s", stage=3)],
+        4: [
+            stage_output(
+                "SUCCESS task_id=5",
+                task_id=5,
+                handoff="## Plan\n- Steps: p",
+                stage=4,
+                criteria=[SuccessCriterion(kind="file_exists", value="README.md")],
+            )
+        ],
+    }
+    for queue in stages.values():
+        queue[0].total_cost_usd = cost
+    return stages
+
+
+def test_task_budget_stops_before_next_stage(tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
+    runner = FakeRunner(stages=_budget_stages(0.5))
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        max_cost_per_task=1.0,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    assert code == 1
+    assert runner.calls == [1, 2]
+
+
+def test_token_ceiling_cancels_stage_and_logs_budget_failure(tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
+    runner = MeteredRunner(stages=_budget_stages(0.0), stream_tokens=5000)
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        max_tokens_per_stage=1000,
+        route=True,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    assert code == 1
+    assert runner.calls == [1, 2, 3, 4, 5]
+    events_file = next((tmp_path / ".kern" / "runs").glob("*/events.jsonl"))
+    events = [json.loads(line) for line in events_file.read_text(encoding="utf-8").splitlines()]
+    last = events[-1]
+    assert last["stage_number"] == 5
+    assert last["failure_kind"] == "budget"
+    assert last["usage"]["input_tokens"] == 5000
+    assert "token budget exceeded (5000 > 1000)" in last["error"]
+
+
+@dataclass
+class HangingRunner(FakeRunner):
+    hang_stage: int = 2
+    write_before_hang: str | None = None
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self.cancelled = 0
+
+    async def run_stage(self, stage: StageSpec, prompt: str, cwd: Path, model: str) -> StageExecution:
+        if stage.number == self.hang_stage and not self.cancelled:
+            self.calls.append(stage.number)
+            if self.write_before_hang is not None:
+                (cwd / self.write_before_hang).write_text("half\n", encoding="utf-8")
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return await super().run_stage(stage, prompt, cwd, model)
+
+
+def test_stage_timeout_cancels_and_retries(monkeypatch, tmp_path: Path) -> None:
+    (tmp_path / "SPEC.md").write_text("# Tasks\n- [ ] task\n", encoding="utf-8")
+    monkeypatch.setattr(runtime, "_git_has_changes", lambda _: True)
+    stages = _budget_stages(0.0)
+    stages[5] = [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Implement\n- Summary: i", stage=5)]
+    stages[6] = [stage_output("SUCCESS", handoff="## Review & Commit\n- Commit: x", stage=6)]
+    runner = HangingRunner(stages=stages)
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        stage_timeout=0.05,
+        retry_backoff=0.0,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    assert code == 0
+    assert runner.cancelled == 1
+    assert runner.calls == [1, 2, 2, 3, 4, 5, 6]
+    events_file = next((tmp_path / ".kern" / "runs").glob("*/events.jsonl"))
+    events = [json.loads(line) for line in events_file.read_text(encoding="utf-8").splitlines()]
+    design = [event for event in events if event.get("stage_number") == 2]
+    assert design[0]["failure_kind"] == "timeout"
+    assert design[0]["retry_in_ms"] == 0
+    assert design[1]["success"] is True
+    assert design[1]["attempt"] == 2
+
+
+def test_stage_timeout_does_not_retry_stage_that_changed_the_tree(tmp_path: Path) -> None:
+    _init_repo(tmp_path, "# Tasks\n- [ ] task\n")
+    stages = _budget_stages(0.0)
+    stages[5] = [stage_output("SUCCESS task_id=5", task_id=5, handoff="## Implement\n- Summary: i", stage=5)]
+    runner = HangingRunner(stages=stages, hang_stage=5, write_before_hang="half.py")
+    code = runtime.run(
+        task_id=5,
+        max_tasks=1,
+        hint="",
+        dry_run=False,
+        verbose=False,
+        stage_timeout=0.05,
+        retry_backoff=0.0,
+        stage_runner=runner,
+        validator=FakeValidator([]),
+        run_dir=tmp_path,
+    )
+    assert code == 1
+    assert runner.cancelled == 1
+    assert runner.calls == [1, 2, 3, 4, 5]
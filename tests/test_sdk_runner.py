@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from claude_code_sdk import AssistantMessage, ResultMessage, TextBlock
+
+import kern.sdk_runner as sdk_runner
+from kern.stages import stage_specs
+
+
+def _fake_query(messages: list[object], consumed: list[object]):
+    async def fake_query(prompt, options):
+        for message in messages:
+            consumed.append(message)
+            yield message
+
+    return fake_query
+
+
+def _assistant(text: str) -> AssistantMessage:
+    return AssistantMessage(content=[TextBlock(text=text)], model="opus")
+
+
+def test_run_stage_aborts_on_definitive_failure(monkeypatch, tmp_path: Path) -> None:
+    consumed: list[object] = []
+    messages = [
+        _assistant(
+            '<<MACHINE>>\n{"stage":2,"status":"failed","task_id":7,"queue_empty":false,"skip":false,"summary":"no"}\n<<END_MACHINE>>'
+        ),
+        _assistant("still working"),
+        ResultMessage(subtype="success", duration_ms=1, duration_api_ms=1, is_error=False, num_turns=1, session_id="s"),
+    ]
+    monkeypatch.setattr(sdk_runner, "query", _fake_query(messages, consumed))
+    runner = sdk_runner.ClaudeSdkRunner(env={})
+    stage = stage_specs(tmp_path)[2]
+    execution = asyncio.run(runner.run_stage(stage, "prompt", tmp_path, "opus"))
+    assert execution.success is False
+    assert "aborted early" in (execution.error or "")
+    assert len(consumed) == 1
+
+
+def test_run_stage_parses_final_result(monkeypatch, tmp_path: Path) -> None:
+    output = "\n".join(
+        [
+            "<<MACHINE>>",
+            '{"stage":2,"status":"success","task_id":7,"queue_empty":false,"skip":false,"summary":"ok"}',
+            "<<END_MACHINE>>",
+            "<<HANDOFF>>",
+            "## Design",
+            "<<END_HANDOFF>>",
+            "SUCCESS task_id=7",
+        ]
+    )
+    messages = [
+        _assistant(output),
+        ResultMessage(
+            subtype="success",
+            duration_ms=1,
+            duration_api_ms=1,
+            is_error=False,
+            num_turns=1,
+            session_id="s",
+            total_cost_usd=0.5,
+            result=output,
+        ),
+    ]
+    monkeypatch.setattr(sdk_runner, "query", _fake_query(messages, []))
+    runner = sdk_runner.ClaudeSdkRunner(env={})
+    execution = asyncio.run(runner.run_stage(stage_specs(tmp_path)[2], "prompt", tmp_path, "opus"))
+    assert execution.success is True
+    assert execution.task_id == 7
+    assert execution.total_cost_usd == 0.5
+
+
+def test_run_stage_marks_overloaded_result_transient(monkeypatch, tmp_path: Path) -> None:
+    messages = [
+        ResultMessage(
+            subtype="error_during_execution",
+            duration_ms=1,
+            duration_api_ms=1,
+            is_error=True,
+            num_turns=1,
+            session_id="s",
+            result="API Error: 529 overloaded_error",
+        ),
+    ]
+    monkeypatch.setattr(sdk_runner, "query", _fake_query(messages, []))
+    runner = sdk_runner.ClaudeSdkRunner(env={})
+    execution = asyncio.run(runner.run_stage(stage_specs(tmp_path)[2], "prompt", tmp_path, "opus"))
+    assert execution.success is False
+    assert execution.failure_kind == "transient"
+
+
+def test_run_stage_bounds_wait_for_stream_close(monkeypatch, tmp_path: Path) -> None:
+    class WedgedStream:
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            await asyncio.sleep(3600)
+
+        async def aclose(self):
+            await asyncio.sleep(3600)
+
+    def wedged_query(prompt, options):
+        return WedgedStream()
+
+    async def run_with_deadline():
+        task = asyncio.create_task(runner.run_stage(stage_specs(tmp_path)[2], "prompt", tmp_path, "opus"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), 5)
+
+    monkeypatch.setattr(sdk_runner, "query", wedged_query)
+    monkeypatch.setattr(sdk_runner, "CLOSE_TIMEOUT_SECONDS", 0.05)
+    runner = sdk_runner.ClaudeSdkRunner(env={})
+    (result,) = asyncio.run(run_with_deadline())
+    assert isinstance(result, asyncio.CancelledError)
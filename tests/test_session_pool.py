@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from claude_code_sdk import AssistantMessage, ResultMessage, TextBlock
+
+from kern.session_pool import PooledSdkRunner
+from kern.stages import stage_specs
+
+OUTPUT = "\n".join(
+    [
+        "<<MACHINE>>",
+        '{"stage":STAGE,"status":"STATUS","task_id":7,"queue_empty":false,"skip":false,"summary":"ok"}',
+        "<<END_MACHINE>>",
+        "<<HANDOFF>>",
+        "## Block",
+        "<<END_HANDOFF>>",
+        "SUCCESS task_id=7",
+    ]
+)
+
+
+class FakeClient:
+    def __init__(self, options, log: list[FakeClient], status: str = "success") -> None:
+        self.options = options
+        self.status = status
+        self.prompts: list[str] = []
+        self.tasks: dict[str, asyncio.Task | None] = {}
+        log.append(self)
+
+    async def connect(self) -> None:
+        self.tasks["connect"] = asyncio.current_task()
+
+    async def disconnect(self) -> None:
+        self.tasks["disconnect"] = asyncio.current_task()
+
+    async def query(self, prompt: str) -> None:
+        self.prompts.append(prompt)
+
+    async def receive_response(self):
+        prompt = self.prompts[-1]
+        if prompt != "/clear":
+            stage = prompt.split()[-1]
+            text = OUTPUT.replace("STAGE", stage).replace("STATUS", self.status)
+            yield AssistantMessage(content=[TextBlock(text=text)], model="opus")
+            if self.status == "failed":
+                yield AssistantMessage(content=[TextBlock(text="still working")], model="opus")
+        yield ResultMessage(
+            subtype="success", duration_ms=1, duration_api_ms=1, is_error=False, num_turns=1, session_id="s"
+        )
+
+
+def test_pool_reuses_sessions_per_permission_profile(tmp_path: Path) -> None:
+    clients: list[FakeClient] = []
+    runner = PooledSdkRunner(env={}, client_factory=lambda options: FakeClient(options, clients))
+    specs = stage_specs(tmp_path)
+
+    async def scenario() -> list[str | None]:
+        seen = []
+        for number in (2, 3, 5):
+            execution = await runner.run_stage(specs[number], f"run stage {number}", tmp_path, "opus")
+            assert execution.success is True
+            assert "startup_ms" in execution.timings
+            seen.append(execution.session)
+        await runner.aclose()
+        return seen
+
+    assert asyncio.run(scenario()) == ["cold", "warm", "cold"]
+    assert len(clients) == 2
+    assert clients[0].prompts == ["run stage 2", "/clear", "run stage 3"]
+    assert clients[1].options.permission_mode == "bypassPermissions"
+    assert clients[1].prompts == ["run stage 5"]
+    for client in clients:
+        assert client.tasks["connect"] is client.tasks["disconnect"]
+
+
+def test_abandoned_turn_discards_session(tmp_path: Path) -> None:
+    clients: list[FakeClient] = []
+    runner = PooledSdkRunner(env={}, client_factory=lambda options: FakeClient(options, clients, status="failed"))
+    specs = stage_specs(tmp_path)
+
+    async def scenario() -> None:
+        for number in (2, 3):
+            execution = await runner.run_stage(specs[number], f"run stage {number}", tmp_path, "opus")
+            assert execution.success is False
+            assert execution.session == "cold"
+        await runner.aclose()
+
+    asyncio.run(scenario())
+    assert len(clients) == 2
+    assert all(client.tasks.get("disconnect") is not None for client in clients)
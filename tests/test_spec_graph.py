@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import kern.runtime as runtime
+from kern.spec_graph import (
+    SpecGraphError,
+    critical_path,
+    makespan,
+    parse_spec_tasks,
+    project_schedule,
+    ready_tasks,
+)
+
+SPEC = """# Spec
+- [x] Bootstrap repo
+- [ ] Small docs fix
+- [ ] Schema migration (size: 3)
+- [~] API endpoints (after: 3) (size: 2)
+- [ ] Client SDK (after: 1, 4)
+"""
+
+
+def test_parse_spec_tasks_reads_annotations() -> None:
+    tasks = parse_spec_tasks(SPEC)
+    assert [(task.number, task.line, task.status) for task in tasks] == [
+        (1, 2, "x"),
+        (2, 3, " "),
+        (3, 4, " "),
+        (4, 5, "~"),
+        (5, 6, " "),
+    ]
+    assert tasks[3].description == "API endpoints"
+    assert (tasks[3].after, tasks[3].size) == ((3,), 2.0)
+    assert tasks[4].after == (1, 4)
+
+
+def test_ready_tasks_follow_critical_path_priority() -> None:
+    tasks = parse_spec_tasks(SPEC)
+    assert [task.number for task in ready_tasks(tasks)] == [3, 2]
+    assert [task.number for task in critical_path(tasks)] == [3, 4, 5]
+
+
+def test_project_schedule_overlaps_independent_tasks() -> None:
+    tasks = parse_spec_tasks(SPEC)
+    schedule = project_schedule(tasks, workers=2)
+    assert [(item.task.number, item.start, item.end) for item in schedule] == [
+        (3, 0.0, 3.0),
+        (2, 0.0, 1.0),
+        (4, 3.0, 5.0),
+        (5, 5.0, 6.0),
+    ]
+    assert makespan(schedule) == 6.0
+    assert makespan(project_schedule(tasks, workers=1)) == 7.0
+    assert [item.task.number for item in project_schedule(tasks, workers=2, limit=2)] == [3, 2]
+
+
+@pytest.mark.parametrize(
+    ("spec", "message"),
+    [
+        ("- [ ] a (after: 2)\n- [ ] b (after: 1)\n", "dependency cycle between tasks 1, 2"),
+        ("- [ ] a (after: 1)\n", "depends on itself"),
+        ("- [ ] a (after: 4)\n", "unknown task 4"),
+        ("- [ ] a (size: -1)\n", "size must be a positive number"),
+    ],
+)
+def test_invalid_dependencies_are_rejected(spec: str, message: str) -> None:
+    with pytest.raises(SpecGraphError, match=message):
+        parse_spec_tasks(spec)
+
+
+def test_dry_run_prints_schedule_and_ready_lines(tmp_path: Path, capsys) -> None:
+    (tmp_path / "SPEC.md").write_text(SPEC, encoding="utf-8")
+    runtime._print_dry_run_queue(tmp_path, max_tasks=5, workers=2)  # noqa: SLF001
+    err = capsys.readouterr().err
+    assert "#3 line 4 [0-3] priority 6: Schema migration" in err
+    assert "#5 line 6 [5-6] priority 1 after 1, 4: Client SDK" in err
+    assert "Projected makespan: 6 size units on 2 worker(s); critical path 6 (#3 -> #4 -> #5)" in err
+    assert runtime._ready_spec_lines(tmp_path) == "4, 3"  # noqa: SLF001
+    assert runtime._ready_spec_lines(tmp_path / "missing") == "any"  # noqa: SLF001
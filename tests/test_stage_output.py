@@ -1,4 +1,4 @@
-from kern.stage_output import extract_handoff_block, parse_stage_output
+from kern.stage_output import StageStreamParser, extract_handoff_block, parse_stage_output
 
 
 def test_parse_stage_output_stage1_with_task_and_skip() -> None:
@@ -106,3 +106,60 @@ def test_parse_stage0_allows_missing_success_line_when_no_failure_token() -> Non
 
 def test_extract_handoff_block_missing_markers() -> None:
     assert extract_handoff_block("SUCCESS") is None
+
+
+def test_stream_parser_detects_blocks_incrementally() -> None:
+    parser = StageStreamParser(2)
+    assert parser.feed("Reading the handoff file.") is None
+    assert parser.feed(
+        '<<MACHINE>>\n{"stage":2,"status":"success","task_id":7,"queue_empty":false,"skip":false,"summary":"ok"}\n<<END_MACHINE>>'
+    ) is None
+    assert parser.machine is not None
+    assert parser.has_handoff is False
+    assert parser.feed("<<HANDOFF>>\n## Design\n<<END_HANDOFF>>") is None
+    assert parser.has_handoff is True
+
+
+def test_stream_parser_fails_on_failed_machine_status() -> None:
+    parser = StageStreamParser(5)
+    reason = parser.feed(
+        '<<MACHINE>>\n{"stage":5,"status":"failed","task_id":7,"queue_empty":false,"skip":false,"summary":"tests broken"}\n<<END_MACHINE>>'
+    )
+    assert reason == "Machine status is 'failed': tests broken"
+    assert "aborted early" in (parser.aborted().error or "")
+
+
+def test_stream_parser_accepts_failure_words_the_final_parser_accepts() -> None:
+    chunks = [
+        "ERROR: flaky test output from pytest",
+        '<<MACHINE>>\n{"stage":3,"status":"success","task_id":7,"queue_empty":false,"skip":false,"summary":"ok",'
+        '"planned_files":["src/parser.py"]}\n<<END_MACHINE>>',
+        "<<HANDOFF>>\n## Structure\nError handling: wrap parser in try/except\nFailed lookups return None\n<<END_HANDOFF>>",
+        "SUCCESS task_id=7",
+    ]
+    parser = StageStreamParser(3)
+    assert [parser.feed(chunk) for chunk in chunks] == [None, None, None, None]
+    assert parse_stage_output("\n".join(chunks), 3).success is True
+
+
+def test_stream_parser_and_final_parse_use_the_last_machine_block() -> None:
+    chunks = [
+        "I will end with a block like <<MACHINE>>\n{...}\n<<END_MACHINE>> and a status line.",
+        "The block must open with <<MACHINE>> on its own line.",
+        '<<MACHINE>>\n{"stage":4,"status":"success","task_id":7,"queue_empty":false,"skip":false,"summary":"ok"}\n'
+        "<<END_MACHINE>>",
+        "<<HANDOFF>>\n## Tests\n<<END_HANDOFF>>",
+        "SUCCESS task_id=7",
+    ]
+    parser = StageStreamParser(4)
+    assert [parser.feed(chunk) for chunk in chunks] == [None, None, None, None, None]
+    assert parser.machine is not None and parser.machine.status == "success"
+    result = parse_stage_output("\n".join(chunks), 4)
+    assert result.success is True
+    assert result.machine is not None and result.machine.summary == "ok"
+
+
+def test_stream_parser_stage0_fails_on_explicit_failure() -> None:
+    parser = StageStreamParser(0)
+    assert parser.feed("Queue synchronized.") is None
+    assert parser.feed("ERROR: TaskList unavailable") is not None
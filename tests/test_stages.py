@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+from kern.stages import is_read_only, stage_specs
+
+
+def test_stages_that_can_run_subagents_are_not_read_only(tmp_path: Path) -> None:
+    specs = stage_specs(tmp_path)
+    assert [number for number, spec in specs.items() if is_read_only(spec)] == []
+    research_only = replace(specs[2], allowed_tools=["Read", "Glob", "Grep", "TaskGet", "TaskUpdate"])
+    assert is_read_only(research_only)
+    assert not is_read_only(replace(research_only, permission_mode="bypassPermissions"))
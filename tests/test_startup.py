@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from pathlib import Path
+import subprocess
+import sys
+
+STARTUP_BUDGET_US = 250_000
+HEAVY_MODULES = ("claude_code_sdk", "kern.runtime", "kern.sdk_runner", "kern.validation")
+
+
+def _import_times(statement: str, cwd: Path | None = None) -> tuple[dict[str, int], str]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=cwd,
+    )
+    cumulative: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = (part.strip() for part in line.split("|"))
+        if total.isdigit():
+            cumulative[name] = int(total)
+    return cumulative, completed.stdout
+
+
+def test_cli_import_stays_light() -> None:
+    imported, _ = _import_times("import kern.cli")
+    assert not [name for name in HEAVY_MODULES if name in imported]
+    assert imported["kern.cli"] < STARTUP_BUDGET_US
+
+
+def test_dry_run_does_not_load_sdk_or_validation(tmp_path: Path) -> None:
+    statement = (
+        "import sys; from kern.cli import main; main(['-n']); "
+        f"print(sorted(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    )
+    _, stdout = _import_times(statement, cwd=tmp_path)
+    assert stdout.strip().splitlines()[-1] == "['kern.runtime']"
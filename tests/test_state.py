@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from kern.state import (
+    TaskStateError,
+    close_task_states,
+    copy_stage_state,
+    load_completed_stages,
+    load_planned_files,
+    mark_stage_completed,
+    task_state,
+    task_state_path,
+    update_task_state_from_machine,
+)
+from kern.types import MachineEnvelope
+
+
+def test_state_is_written_behind_at_stage_boundaries(tmp_path: Path) -> None:
+    state_dir = tmp_path / ".kern" / "state"
+    path = task_state_path(state_dir, 4)
+    machine = MachineEnvelope(
+        stage=3, status="success", task_id=4, queue_empty=False, skip=False, summary="", planned_files=["src/a.py"]
+    )
+
+    update_task_state_from_machine(state_dir, 4, machine)
+    assert load_planned_files(state_dir, 4) == ["src/a.py"]
+    assert not path.exists()
+
+    mark_stage_completed(state_dir, 4, 3)
+    assert json.loads(path.read_text(encoding="utf-8"))["planned_files"] == ["src/a.py"]
+    assert not path.with_suffix(".json.tmp").exists()
+
+    path.write_text(json.dumps({"task_id": 4, "completed_stages": [1]}), encoding="utf-8")
+    assert load_completed_stages(state_dir, 4) == {3}
+    close_task_states(tmp_path)
+    assert load_completed_stages(state_dir, 4) == {1}
+    close_task_states(tmp_path)
+
+
+def test_corrupt_state_is_reported_and_moved_aside(tmp_path: Path) -> None:
+    state_dir = tmp_path / "state"
+    path = task_state_path(state_dir, 2)
+    state_dir.mkdir()
+    path.write_text('{"task_id": 2, "planned_fi', encoding="utf-8")
+
+    with pytest.raises(TaskStateError, match="task-2.json.corrupt"):
+        load_planned_files(state_dir, 2)
+    assert not path.exists()
+    assert path.with_suffix(".json.corrupt").read_text(encoding="utf-8").startswith('{"task_id": 2')
+    assert load_planned_files(state_dir, 2) == []
+    close_task_states(tmp_path)
+
+
+def test_copy_stage_state_copies_only_the_kept_stages(tmp_path: Path) -> None:
+    source_dir = tmp_path / "speculative" / "state"
+    state_dir = tmp_path / "state"
+    task_state(source_dir, 5).replace(
+        {
+            "task_id": 5,
+            "completed_stages": [1, 2, 3, 4],
+            "planned_files": ["src/new.py"],
+            "success_criteria": [{"kind": "file_exists", "value": "src/new.py"}],
+            "stage_metadata": {"2": {"design": "new"}, "4": {"tests": 3}},
+            "scratch": "speculative only",
+        }
+    )
+    task_state(state_dir, 5).replace(
+        {"task_id": 5, "attempts": 2, "success_criteria": [{"kind": "file_exists", "value": "src/old.py"}]}
+    )
+
+    copy_stage_state(source_dir, state_dir, 5, [1, 2, 3])
+
+    assert task_state(state_dir, 5).payload == {
+        "task_id": 5,
+        "attempts": 2,
+        "planned_files": ["src/new.py"],
+        "success_criteria": [{"kind": "file_exists", "value": "src/old.py"}],
+        "stage_metadata": {"2": {"design": "new"}},
+    }
+    close_task_states(tmp_path)
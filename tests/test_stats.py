@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from kern.stats import Aggregate, collect_stats, format_stats, stats_payload
+
+
+def _write_events(path: Path, events: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        for event in events:
+            fh.write(json.dumps(event) + "\n")
+
+
+def _event(stage: int, duration_ms: int, task_id: int = 1, model: str = "opus") -> dict:
+    return {
+        "task_id": task_id,
+        "stage_number": stage,
+        "stage_name": "Plan",
+        "model": model,
+        "duration_ms": duration_ms,
+        "success": True,
+        "usage": {"input_tokens": 10, "output_tokens": 4},
+        "total_cost_usd": 0.5,
+    }
+
+
+def test_histogram_percentiles_are_close_to_exact() -> None:
+    aggregate = Aggregate()
+    for duration in range(1, 1001):
+        aggregate.add_event({"duration_ms": duration * 10})
+    for percent, exact in ((50, 5000), (95, 9500), (99, 9900)):
+        assert abs(aggregate.percentile(percent) - exact) / exact < 0.05
+
+
+def test_stats_index_reads_only_new_data(tmp_path: Path) -> None:
+    kern_dir = tmp_path / ".kern"
+    events_file = kern_dir / "runs" / "r1" / "events.jsonl"
+    _write_events(events_file, [_event(4, 100), _event(4, 300), {"event": "phase", "stage_number": 4}])
+    _write_events(kern_dir / "reports" / "task-1.jsonl", [{"task_id": 1, "score": 90, "passed_soft_gate": True}])
+
+    index, read_files = collect_stats(kern_dir)
+    assert read_files == 2
+    assert index.groups["stage"]["4 Plan"].count == 2
+    assert (kern_dir / "stats" / "index.json").exists()
+
+    index, read_files = collect_stats(kern_dir)
+    assert read_files == 0
+    assert index.groups["stage"]["4 Plan"].count == 2
+
+    _write_events(events_file, [_event(4, 200, task_id=2, model="sonnet")])
+    index, read_files = collect_stats(kern_dir)
+    payload = stats_payload(index)
+    assert read_files == 1
+    assert payload["stage"]["4 Plan"]["count"] == 3
+    assert payload["stage"]["4 Plan"]["cost_usd"] == 1.5
+    assert payload["model"]["sonnet"]["tokens"] == {"input_tokens": 10, "output_tokens": 4}
+    assert payload["task"]["1"]["mean_score"] == 90
+    assert "By stage:" in format_stats(index)
+
+
+def test_stats_index_rebuilds_after_truncation(tmp_path: Path) -> None:
+    kern_dir = tmp_path / ".kern"
+    events_file = kern_dir / "runs" / "r1" / "events.jsonl"
+    _write_events(events_file, [_event(2, 100), _event(2, 100)])
+    collect_stats(kern_dir)
+
+    events_file.write_text(json.dumps(_event(2, 100)) + "\n", encoding="utf-8")
+    index, _ = collect_stats(kern_dir)
+    assert index.groups["stage"]["2 Plan"].count == 1
@@ -1,7 +1,11 @@
 from pathlib import Path
+import subprocess
+import sys
+import time
 
 from kern.types import SuccessCriterion
 from kern.validation import SuccessCriteriaValidator
+from kern.validation_cache import ValidationCache
 
 
 def test_extract_criteria_reads_only_plan_section(tmp_path: Path) -> None:
@@ -45,3 +49,126 @@ def test_match_pattern_supports_regex_wrapper() -> None:
     matched, mode = SuccessCriteriaValidator._match_pattern("abc123", "/abc\\d+/")  # noqa: SLF001
     assert matched is True
     assert mode == "regex"
+
+
+def test_commands_run_concurrently_in_criterion_order(tmp_path: Path) -> None:
+    handoff = tmp_path / "task-1.md"
+    handoff.write_text("# Task Handoff\n", encoding="utf-8")
+    criteria = [
+        SuccessCriterion(kind="command_succeeds", value="sleep 0.4; exit 1"),
+        SuccessCriterion(kind="command_succeeds", value="sleep 0.4"),
+        SuccessCriterion(kind="command_succeeds", value="sleep 0.4"),
+    ]
+    started = time.monotonic()
+    result = SuccessCriteriaValidator(max_workers=3).validate(1, tmp_path, handoff, criteria=criteria)
+    elapsed = time.monotonic() - started
+    assert elapsed < 1.0
+    assert [check.criterion for check in result.checks] == [f"command_succeeds: {c.value}" for c in criteria]
+    assert [check.passed for check in result.checks] == [False, True, True]
+
+
+def test_command_timeout_fails_criterion(tmp_path: Path) -> None:
+    handoff = tmp_path / "task-1.md"
+    handoff.write_text("# Task Handoff\n", encoding="utf-8")
+    criteria = [SuccessCriterion(kind="command_succeeds", value="sleep 5")]
+    result = SuccessCriteriaValidator(command_timeout=0.2).validate(1, tmp_path, handoff, criteria=criteria)
+    assert result.passed is False
+    assert result.checks[0].details == "timeout after 0.2s"
+
+
+def test_fix_attempt_reuses_untouched_passing_checks(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    (repo / "a.txt").write_text("a\n", encoding="utf-8")
+    (repo / "b.txt").write_text("b\n", encoding="utf-8")
+    subprocess.run(["git", "add", "."], cwd=repo, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init"], cwd=repo, check=True
+    )
+    handoff = tmp_path / "task-1.md"
+    handoff.write_text("# Task Handoff\n", encoding="utf-8")
+    runs = tmp_path / "runs.log"
+    criteria = [
+        SuccessCriterion(kind="file_contains", value="a.txt: a"),
+        SuccessCriterion(kind="command_succeeds", value=f"cat b.txt && echo b >> {runs}"),
+        SuccessCriterion(kind="file_exists", value="c.txt"),
+    ]
+    validator = SuccessCriteriaValidator()
+    first = validator.validate(1, repo, handoff, criteria=criteria)
+    assert [check.passed for check in first.checks] == [True, True, False]
+    assert first.checks[0].inputs == ["a.txt"]
+    assert first.checks[1].inputs is None
+
+    (repo / "c.txt").write_text("c\n", encoding="utf-8")
+    second = validator.validate(1, repo, handoff, criteria=criteria, previous=first)
+    assert second.passed is True
+    assert [check.reused for check in second.checks] == [True, False, False]
+    assert runs.read_text(encoding="utf-8").split() == ["b", "b"]
+
+    third = validator.validate(1, repo, handoff, criteria=criteria, previous=second)
+    assert [check.reused for check in third.checks] == [True, True, True]
+
+    full = validator.validate(1, repo, handoff, criteria=criteria)
+    assert not any(check.reused for check in full.checks)
+
+
+def test_command_is_rerun_when_a_file_it_does_not_name_changes(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    (repo / "tests").mkdir(parents=True)
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    (repo / "mod.py").write_text("VALUE = 1\n", encoding="utf-8")
+    (repo / "tests" / "test_mod.py").write_text(
+        "import sys\nsys.path.insert(0, '.')\nimport mod\nassert mod.VALUE == 1\n", encoding="utf-8"
+    )
+    subprocess.run(["git", "add", "."], cwd=repo, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init"], cwd=repo, check=True
+    )
+    handoff = tmp_path / "task-1.md"
+    handoff.write_text("# Task Handoff\n", encoding="utf-8")
+    criteria = [SuccessCriterion(kind="command_succeeds", value=f"{sys.executable} tests/test_mod.py")]
+    validator = SuccessCriteriaValidator()
+    first = validator.validate(1, repo, handoff, criteria=criteria)
+    assert first.passed is True
+
+    (repo / "mod.py").write_text("VALUE = 2\n", encoding="utf-8")
+    second = validator.validate(1, repo, handoff, criteria=criteria, previous=first)
+    assert second.passed is False
+    assert not second.checks[0].reused
+
+
+def test_allowlisted_commands_are_cached_by_tree_contents(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    (repo / "a.txt").write_text("a\n", encoding="utf-8")
+    subprocess.run(["git", "add", "."], cwd=repo, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init"], cwd=repo, check=True
+    )
+    handoff = tmp_path / "task-1.md"
+    handoff.write_text("# Task Handoff\n", encoding="utf-8")
+    runs = tmp_path / "runs.log"
+    criteria = [
+        SuccessCriterion(kind="command_succeeds", value=f"grep -q a a.txt && echo cached >> {runs}"),
+        SuccessCriterion(kind="command_succeeds", value=f"echo other >> {runs}"),
+    ]
+    cache = ValidationCache(repo / ".kern" / "cache" / "validation", ["grep *"])
+    validator = SuccessCriteriaValidator(cache=cache)
+
+    first = validator.validate(1, repo, handoff, criteria=criteria)
+    second = validator.validate(2, repo, handoff, criteria=criteria)
+    assert second.passed is True
+    assert [check.cached for check in first.checks] == [False, False]
+    assert [check.cached for check in second.checks] == [True, False]
+    assert sorted(runs.read_text(encoding="utf-8").split()) == ["cached", "other", "other"]
+
+    (repo / "a.txt").write_text("b\n", encoding="utf-8")
+    third = validator.validate(2, repo, handoff, criteria=criteria)
+    assert [check.passed for check in third.checks] == [False, True]
+    assert not third.checks[0].cached
+
+    cache.ttl_seconds = 0
+    fourth = validator.validate(2, repo, handoff, criteria=criteria)
+    assert not fourth.checks[0].cached